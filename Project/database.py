@@ -0,0 +1,46 @@
+from Project import app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, raiseload
+import sqlite3
+
+# Maximum number of bound parameters per IN (...) clause (SQLite limit is 999 on older builds)
+IN_CLAUSE_CHUNK = 500
+
+# Split a list of ids into chunks that fit in one IN (...) clause
+def chunked(ids):
+    ids = list(dict.fromkeys(ids))
+    for i in range(0, len(ids), IN_CLAUSE_CHUNK):
+        yield ids[i:i + IN_CLAUSE_CHUNK]
+
+# Connection settings applied to every new database connection
+# SQLite gets the SQLITE_PRAGMAS profile: WAL journaling lets readers go on while a
+# write commits, and busy_timeout makes writers queue up instead of failing with
+# "database is locked". PostgreSQL already has both, it only gets the same lock wait
+@event.listens_for(Engine, 'connect')
+def _apply_connection_profile(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        for name, value in app.config['SQLITE_PRAGMAS'].items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.execute(f"PRAGMA busy_timeout = {int(app.config['DB_BUSY_TIMEOUT'])}")
+        cursor.close()
+    elif type(dbapi_connection).__module__.startswith('psycopg'):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET lock_timeout = {int(app.config['DB_BUSY_TIMEOUT'])}")
+        cursor.close()
+        dbapi_connection.commit()
+
+# Strict loading (STRICT_LOADING): a relationship that would be loaded with its own
+# SELECT on attribute access raises instead, so N+1 query patterns fail loudly in
+# tests. Relationships loaded by the query (joinedload / selectinload) or already
+# in the identity map keep working
+@event.listens_for(Session, 'do_orm_execute')
+def _raise_on_lazy_load(execute_state):
+    if (
+        app.config['STRICT_LOADING']
+        and execute_state.is_select
+        and not execute_state.is_relationship_load
+        and not execute_state.is_column_load
+    ):
+        execute_state.statement = execute_state.statement.options(raiseload('*', sql_only=True))
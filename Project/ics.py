@@ -0,0 +1,235 @@
+from Project.recurrence import parse_rule, limit_rule, format_rule
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import re
+
+# Streaming iCalendar (RFC 5545) reading and writing for the bulk import / export
+# Both sides work one line / one event at a time, so a file with tens of thousands
+# of events is never held in memory as a whole
+
+PRODID = '-//Collaborative Calendar//Event Scheduling//EN'
+
+# Longest line written, in octets, before it is folded
+MAX_LINE_OCTETS = 75
+
+# Logical lines of a text stream as (line_number, line), numbered by the physical
+# line they start on: folded lines (continuations start with a space or a tab) are
+# joined back, blank lines are dropped
+def unfold_lines(stream):
+    pending = None
+    pending_number = 0
+    for line_number, line in enumerate(stream, 1):
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield pending_number, pending
+        pending = line
+        pending_number = line_number
+    if pending:
+        yield pending_number, pending
+
+# Split a content line into (NAME, {PARAM: value}, value)
+# Parameter values may be quoted, so ':' and ';' only count outside quotes
+def parse_content_line(line):
+    in_quotes = False
+    separators = []
+    for position, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and char in ';:':
+            separators.append(position)
+            if char == ':':
+                break
+    if not separators or line[separators[-1]] != ':':
+        raise ValueError(f'Malformed line: {line[:40]}')
+
+    bounds = [-1] + separators
+    fields = [line[bounds[i] + 1:bounds[i + 1]] for i in range(len(separators))]
+    params = {}
+    for field in fields[1:]:
+        name, _, value = field.partition('=')
+        params[name.upper()] = value.strip('"')
+    return fields[0].upper(), params, line[separators[-1] + 1:]
+
+# Components of a stream as (line_number, {NAME: [(params, value)]}), one per VEVENT,
+# line_number being the physical line of its BEGIN:VEVENT
+# Components nested in an event (VALARM) and the other top level components
+# (VTIMEZONE, VTODO, ...) are skipped
+def parse_events(stream):
+    properties = None
+    nested = 0
+    for line_number, line in unfold_lines(stream):
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError:
+            # Not a content line, e.g. stray text from a broken export
+            continue
+        if name == 'BEGIN':
+            if properties is not None:
+                nested += 1
+            elif value.upper() == 'VEVENT':
+                properties = {}
+                start_line = line_number
+        elif name == 'END':
+            if nested:
+                nested -= 1
+            elif properties is not None and value.upper() == 'VEVENT':
+                yield start_line, properties
+                properties = None
+        elif properties is not None and not nested:
+            properties.setdefault(name, []).append((params, value))
+
+def unescape_text(value):
+    return re.sub(r'\\([\\;,nN])', lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+
+# A DATE-TIME or DATE value as a UTC datetime (and whether it was a DATE)
+# Floating times are taken as UTC, like the times sent by the calendar page
+def parse_ics_datetime(value, params):
+    value = value.strip()
+    if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d').replace(tzinfo=timezone.utc), True
+    if value.endswith('Z'):
+        return datetime.strptime(value[:-1], '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc), False
+    moment = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    if 'TZID' in params:
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params['TZID'].lstrip('/')))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone {params['TZID']}")
+        return moment.astimezone(timezone.utc), False
+    return moment.replace(tzinfo=timezone.utc), False
+
+DURATION = re.compile(r'([+-]?)P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+def parse_duration(value):
+    match = DURATION.match(value.strip().upper())
+    if not match or not any(match.groups()[1:]):
+        raise ValueError(f'Malformed duration {value}')
+    weeks, days, hours, minutes, seconds = (int(part or 0) for part in match.groups()[1:])
+    duration = timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+    return -duration if match.group(1) == '-' else duration
+
+# Event fields of a parsed VEVENT: title, description, start, end, rule, exceptions
+# (a set of UTC start times) and attendees (emails)
+# Raises ValueError for events that cannot be imported
+def event_from_properties(properties):
+    def first(name):
+        values = properties.get(name)
+        return values[0] if values else None
+
+    if first('DTSTART') is None:
+        raise ValueError('Missing DTSTART')
+    start, all_day = parse_ics_datetime(first('DTSTART')[1], first('DTSTART')[0])
+    if first('DTEND') is not None:
+        end, _ = parse_ics_datetime(first('DTEND')[1], first('DTEND')[0])
+    elif first('DURATION') is not None:
+        end = start + parse_duration(first('DURATION')[1])
+    else:
+        # RFC 5545: a day for dates, an instant otherwise
+        end = start + timedelta(days=1) if all_day else start
+    if end < start:
+        raise ValueError('DTEND is before DTSTART')
+
+    rule = None
+    if first('RRULE') is not None:
+        rule = format_rule(limit_rule(parse_rule(first('RRULE')[1]), start))
+
+    exceptions = set()
+    for params, value in properties.get('EXDATE', ()):
+        exceptions.update(parse_ics_datetime(item, params)[0] for item in value.split(',') if item)
+
+    attendees = []
+    for _, value in properties.get('ATTENDEE', ()):
+        if value.lower().startswith('mailto:'):
+            attendees.append(value[len('mailto:'):].strip().lower())
+
+    summary = first('SUMMARY')
+    description = first('DESCRIPTION')
+    return {
+        'title': unescape_text(summary[1]).strip() if summary else '',
+        'description': unescape_text(description[1]) if description else '',
+        'start': start,
+        'end': end,
+        'rule': rule,
+        'exceptions': exceptions,
+        'attendees': attendees
+    }
+
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+def format_ics_datetime(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+# A content line folded into lines of at most MAX_LINE_OCTETS octets (continuation
+# lines start with a space), never splitting a UTF-8 character, CRLF terminated
+def fold_line(line):
+    if len(line.encode()) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+    parts = []
+    current = ''
+    size = 0
+    for char in line:
+        char_size = len(char.encode())
+        if size + char_size > MAX_LINE_OCTETS:
+            parts.append(current)
+            current = ' '
+            size = 1
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+def calendar_header(name):
+    return ''.join(fold_line(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(name)}'
+    ))
+
+def calendar_footer():
+    return fold_line('END:VCALENDAR')
+
+# Participation status of each status bucket of load_participants
+PARTSTATS = (
+    ('accepted_participants', 'ACCEPTED'),
+    ('pending_participants', 'NEEDS-ACTION'),
+    ('declined_participants', 'DECLINED')
+)
+
+# VEVENT text of a feed row, with the participants of a group event as attendees
+# (as returned by load_participants, None for individual events)
+def event_component(row, participants, host, stamp):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{row.event_id}@{host}',
+        f'DTSTAMP:{stamp}',
+        f'SEQUENCE:{row.version_number - 1}',
+        f'DTSTART:{format_ics_datetime(row.start_time)}',
+        f'DTEND:{format_ics_datetime(row.end_time)}',
+        f'SUMMARY:{escape_text(row.event_name)}'
+    ]
+    if row.description:
+        lines.append(f'DESCRIPTION:{escape_text(row.description)}')
+    if row.recurrence_rule:
+        lines.append(f'RRULE:{row.recurrence_rule}')
+        if row.recurrence_exceptions:
+            exceptions = [
+                format_ics_datetime(datetime.fromisoformat(value))
+                for value in row.recurrence_exceptions.split(',') if value
+            ]
+            lines.append('EXDATE:' + ','.join(exceptions))
+    if participants:
+        for bucket, partstat in PARTSTATS:
+            for participant in participants[bucket]:
+                name = participant['name'].replace('"', "'")
+                lines.append(f'ATTENDEE;CN="{name}";PARTSTAT={partstat}:mailto:{participant["email"]}')
+    lines.append('END:VEVENT')
+    return ''.join(fold_line(line) for line in lines)
@@ -0,0 +1,359 @@
+from Project import app, db
+from Project.models import Event, Participate, ChangeLog, change_replay_floor
+from Project.database import chunked
+from Project.recurrence import occurrences
+from sqlalchemy import func, select, literal
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import threading
+import time
+
+# Intervals added / removed since the last rebuild before a tree is rebuilt: overlap
+# queries scan these linearly, so the bound keeps them at O(log n + k + sqrt n)
+def _rebuild_threshold(size):
+    return 32 + int(size ** 0.5)
+
+# Interval tree over (start, end, key) intervals, end exclusive, one interval per key
+# The intervals are kept sorted by start in flat lists, the tree is implicit: the
+# node of a range [lo, hi) is its middle element and max_end[mid] is the largest end
+# of the range, which lets a query skip every subtree ending before it starts
+# Changes go to a small buffer first and are folded in by an O(n log n) rebuild
+class IntervalTree:
+    def __init__(self, intervals=()):
+        self._items = {key: (start, end) for start, end, key in intervals}
+        self._rebuild()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _rebuild(self):
+        ordered = sorted((start, end, key) for key, (start, end) in self._items.items())
+        self._starts = [start for start, _, _ in ordered]
+        self._ends = [end for _, end, _ in ordered]
+        self._keys = [key for _, _, key in ordered]
+        self._max_end = list(self._ends)
+        self._fill_max_end(0, len(ordered))
+        self._added = {}
+        self._removed = set()
+
+    def _fill_max_end(self, lo, hi):
+        # Iterative post-order over the implicit tree
+        stack = [(lo, hi, False)]
+        while stack:
+            lo, hi, children_done = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if children_done:
+                best = self._ends[mid]
+                if lo < mid:
+                    best = max(best, self._max_end[(lo + mid) // 2])
+                if mid + 1 < hi:
+                    best = max(best, self._max_end[(mid + 1 + hi) // 2])
+                self._max_end[mid] = best
+            else:
+                stack.append((lo, hi, True))
+                stack.append((lo, mid, False))
+                stack.append((mid + 1, hi, False))
+
+    def add(self, start, end, key):
+        if key in self._items:
+            self.remove(key)
+        self._items[key] = (start, end)
+        self._added[key] = (start, end)
+        self._maybe_rebuild()
+
+    def remove(self, key):
+        if self._items.pop(key, None) is None:
+            return
+        if self._added.pop(key, None) is None:
+            self._removed.add(key)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if len(self._added) + len(self._removed) > _rebuild_threshold(len(self._items)):
+            self._rebuild()
+
+    # Intervals overlapping [start, end), as (start, end, key) sorted by start
+    def overlap(self, start, end):
+        return self._search(start, end, False)
+
+    # Intervals containing the instant point, i.e. start <= point < end
+    def stab(self, point):
+        return self._search(point, point, True)
+
+    # Intervals ending after start and starting before end (at or before end when
+    # closed), pruning the subtrees that end too early or start too late
+    def _search(self, start, end, closed):
+        found = []
+        stack = [(0, len(self._starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue
+            stack.append((lo, mid))
+            mid_start = self._starts[mid]
+            if mid_start < end or (closed and mid_start == end):
+                if self._ends[mid] > start and self._keys[mid] not in self._removed:
+                    found.append((mid_start, self._ends[mid], self._keys[mid]))
+                stack.append((mid + 1, hi))
+        for key, (item_start, item_end) in self._added.items():
+            if (item_start < end or (closed and item_start == end)) and item_end > start:
+                found.append((item_start, item_end, key))
+        found.sort()
+        return found
+
+# End of the span of a series that never ends
+SERIES_OPEN_END = datetime.max.replace(tzinfo=timezone.utc)
+
+# Interval of a loaded row in the tree: a recurring event spans its whole series
+def _interval(row):
+    if row.recurrence_rule is None:
+        return row.start_time, row.end_time, row.event_id
+    return row.start_time, row.recurrence_end or SERIES_OPEN_END, row.event_id
+
+# (first start, first end, rule, exceptions) of a loaded recurring event
+def _series(row):
+    return row.start_time, row.end_time, row.recurrence_rule, row.recurrence_exceptions
+
+# Events of one group (keys are event ids) or of one user (its individual events and
+# the group events it participates in, with the participation status) as an interval
+# tree, kept in step with the database through the ChangeLog
+# A recurring event is a single interval spanning its whole series, the series
+# (first start, first end, rule, exceptions) is kept aside and its occurrences are
+# expanded for the intervals a query hits
+class EventIntervals:
+    def __init__(self, tree, statuses, series, cursor):
+        self.lock = threading.Lock()
+        self.tree = tree
+        self.statuses = statuses
+        self.series = series
+        self.cursor = cursor
+        self.built_at = time.monotonic()
+
+    # Add or replace an event from a loaded row
+    def put(self, row):
+        self.tree.add(*_interval(row))
+        self.statuses[row.event_id] = row[4]
+        if row.recurrence_rule is None:
+            self.series.pop(row.event_id, None)
+        else:
+            self.series[row.event_id] = _series(row)
+
+    def remove(self, event_id):
+        self.tree.remove(event_id)
+        self.statuses.pop(event_id, None)
+        self.series.pop(event_id, None)
+
+    # Events (occurrences of recurring events) overlapping [start, end) as
+    # (start, end, event_id, status), sorted by start
+    def overlap(self, start, end):
+        with self.lock:
+            return self._expand(self.tree.overlap(start, end), start, end)
+
+    # Events going on at the instant point, same form as overlap()
+    def stab(self, point):
+        with self.lock:
+            return self._expand(self.tree.stab(point), point, point + timedelta(microseconds=1))
+
+    def _expand(self, intervals, start, end):
+        found = []
+        for event_start, event_end, event_id in intervals:
+            status = self.statuses[event_id]
+            if event_id in self.series:
+                first_start, first_end, rule, exceptions = self.series[event_id]
+                found.extend(
+                    (occurrence_start, occurrence_end, event_id, status)
+                    for occurrence_start, occurrence_end in occurrences(first_start, first_end, rule, exceptions, start, end)
+                )
+            else:
+                found.append((event_start, event_end, event_id, status))
+        found.sort()
+        return found
+
+# Recurrence columns loaded with every row
+SERIES_COLUMNS = (Event.recurrence_rule, Event.recurrence_exceptions, Event.recurrence_end)
+
+# Rows (owner_id, event_id, start, end, status, rule, exceptions, rule_end) of the
+# events of some groups, all of them or only those in event_ids
+def _group_rows(group_ids, event_ids=None):
+    query = (
+        select(Event.group_id, Event.event_id, Event.start_time, Event.end_time, literal(None), *SERIES_COLUMNS)
+        .where(Event.group_id.in_(group_ids))
+    )
+    if event_ids is not None:
+        query = query.where(Event.event_id.in_(event_ids))
+    return db.session.execute(query).all()
+
+# Same for users: their individual events and the group events they participate in
+def _user_rows(user_ids, event_ids=None):
+    individual = (
+        select(Event.creator, Event.event_id, Event.start_time, Event.end_time, literal('Individual'), *SERIES_COLUMNS)
+        .where(Event.creator.in_(user_ids), Event.group_id == 1)
+    )
+    participated = (
+        select(Participate.user_id, Event.event_id, Event.start_time, Event.end_time, Participate.status, *SERIES_COLUMNS)
+        .join(Participate.event)
+        .where(Participate.user_id.in_(user_ids), Event.group_id != 1)
+    )
+    if event_ids is not None:
+        individual = individual.where(Event.event_id.in_(event_ids))
+        participated = participated.where(Event.event_id.in_(event_ids))
+    return db.session.execute(individual).all() + db.session.execute(participated).all()
+
+# ChangeLog entries (owner_id, change_id, event_id) of some groups / users after a change
+def _group_changes(group_ids, after):
+    return db.session.execute(
+        select(ChangeLog.group_id, ChangeLog.change_id, ChangeLog.event_id)
+        .where(ChangeLog.group_id.in_(group_ids), ChangeLog.user_id.is_(None), ChangeLog.change_id > after)
+    ).all()
+
+def _user_changes(user_ids, after):
+    return db.session.execute(
+        select(ChangeLog.user_id, ChangeLog.change_id, ChangeLog.event_id)
+        .where(ChangeLog.user_id.in_(user_ids), ChangeLog.change_id > after)
+    ).all()
+
+# Row and change loaders of each kind of index
+INDEX_KINDS = {
+    'group': (_group_rows, _group_changes),
+    'user': (_user_rows, _user_changes)
+}
+
+# Process-local, lazily built interval indexes of groups and users
+# An index is built on first use and brought up to date on every use by replaying
+# the ChangeLog entries after its cursor, so changes made by other workers are seen
+# too. Many indexes are built / refreshed together with a few set-based queries.
+# Indexes are rebuilt after max_age seconds as a safety net, and the least recently
+# used ones are evicted once all of them hold more than max_intervals intervals
+class IntervalIndexRegistry:
+    def __init__(self, max_intervals=500000, max_age=300):
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        self.max_intervals = max_intervals
+        self.max_age = max_age
+        self.size = 0
+        self.builds = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    # Interval index of the events of a group
+    def group(self, group_id):
+        return self.get_many('group', [group_id])[group_id]
+
+    # Interval indexes of the events on the dashboards of users, as {user_id: index}
+    # The statuses are the participation status of group events and 'Individual'
+    # for the user's own events
+    def users(self, user_ids):
+        return self.get_many('user', user_ids)
+
+    def get_many(self, kind, owner_ids):
+        load_rows, load_changes = INDEX_KINDS[kind]
+        indexes = {}
+        now = time.monotonic()
+        with self._lock:
+            for owner_id in owner_ids:
+                index = self._indexes.get((kind, owner_id))
+                if index is not None and now - index.built_at <= self.max_age:
+                    self._indexes.move_to_end((kind, owner_id))
+                    indexes[owner_id] = index
+        missing = [owner_id for owner_id in dict.fromkeys(owner_ids) if owner_id not in indexes]
+        if indexes:
+            self._refresh(kind, indexes, load_rows, load_changes)
+        if missing:
+            indexes.update(self._build(kind, missing, load_rows))
+        return indexes
+
+    def _build(self, kind, owner_ids, load_rows):
+        # Changes after the cursor are replayed by the next refresh
+        cursor = db.session.query(func.max(ChangeLog.change_id)).scalar() or 0
+        rows = {owner_id: [] for owner_id in owner_ids}
+        for chunk in chunked(owner_ids):
+            for row in load_rows(chunk):
+                rows[row[0]].append(row)
+
+        indexes = {}
+        for owner_id, owner_rows in rows.items():
+            indexes[owner_id] = EventIntervals(
+                IntervalTree(_interval(row) for row in owner_rows),
+                {row.event_id: row[4] for row in owner_rows},
+                {row.event_id: _series(row) for row in owner_rows if row.recurrence_rule is not None},
+                cursor
+            )
+        with self._lock:
+            for owner_id, index in indexes.items():
+                old = self._indexes.pop((kind, owner_id), None)
+                if old is not None:
+                    self.size -= len(old.tree)
+                self._indexes[(kind, owner_id)] = index
+                self.size += len(index.tree)
+            self.builds += len(indexes)
+            self._evict()
+        return indexes
+
+    def _refresh(self, kind, indexes, load_rows, load_changes):
+        # Event ids changed for each owner since its own cursor, replay window included
+        changed = {}
+        newest = {}
+        floors = {}
+        for owner_id, index in indexes.items():
+            if index.cursor not in floors:
+                floors[index.cursor] = change_replay_floor(index.cursor)
+        for chunk in chunked(indexes):
+            after = min(floors[indexes[owner_id].cursor] for owner_id in chunk)
+            for owner_id, change_id, event_id in load_changes(chunk, after):
+                if change_id > floors[indexes[owner_id].cursor]:
+                    changed.setdefault(owner_id, set()).add(event_id)
+                    newest[owner_id] = max(newest.get(owner_id, 0), change_id)
+        if not changed:
+            return
+
+        rows = {}
+        event_ids = set().union(*changed.values())
+        for owner_chunk in chunked(changed):
+            for event_chunk in chunked(event_ids):
+                for row in load_rows(owner_chunk, event_chunk):
+                    rows[(row[0], row.event_id)] = row
+
+        growth = {}
+        for owner_id, owner_event_ids in changed.items():
+            index = indexes[owner_id]
+            with index.lock:
+                before = len(index.tree)
+                for event_id in owner_event_ids:
+                    row = rows.get((owner_id, event_id))
+                    if row is not None:
+                        index.put(row)
+                    else:
+                        index.remove(event_id)
+                index.cursor = max(index.cursor, newest[owner_id])
+                growth[owner_id] = len(index.tree) - before
+
+        with self._lock:
+            for owner_id, delta in growth.items():
+                # Evicted meanwhile, its intervals are no longer counted
+                if self._indexes.get((kind, owner_id)) is indexes[owner_id]:
+                    self.size += delta
+            self.refreshes += len(changed)
+            self._evict()
+
+    def _evict(self):
+        while len(self._indexes) > 1 and self.size > self.max_intervals:
+            _, evicted = self._indexes.popitem(last=False)
+            self.size -= len(evicted.tree)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'indexes': len(self._indexes),
+                'intervals': self.size,
+                'builds': self.builds,
+                'refreshes': self.refreshes,
+                'evictions': self.evictions
+            }
+
+interval_indexes = IntervalIndexRegistry(app.config['INTERVAL_INDEX_MAX_INTERVALS'], app.config['INTERVAL_INDEX_MAX_AGE'])
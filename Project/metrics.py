@@ -0,0 +1,228 @@
+from Project import app
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import threading
+import time
+
+# Request instrumentation: per-route latency histograms, SQL statement counts and
+# time, rows returned and written, response bytes and N+1 query detection, rendered in the
+# Prometheus text format by /metrics. Everything is process-local, like the other
+# caches: with several workers each one reports its own numbers (Prometheus sums
+# them over the scraped instances)
+
+# Histogram bucket bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+# Statements per request
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        entry = self.series.get(labels)
+        if entry is None:
+            entry = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][position] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{_labels(labels, le=_number(bound))}}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{_labels(labels, le="+Inf")}}} {count}')
+            lines.append(f'{self.name}_sum{{{_labels(labels)}}} {_number(total)}')
+            lines.append(f'{self.name}_count{{{_labels(labels)}}} {count}')
+        return lines
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{{_labels(labels)}}} {_number(value)}')
+        return lines
+
+# Labels are stored as tuples of (name, value) pairs
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Metrics of one request, collected in flask.g while it runs (and while its
+# response streams), recorded when the response is closed
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.rows_returned = 0
+        self.rows_written = 0
+        self.response_bytes = 0
+        self.statements = {}
+        self.query_started = None
+
+    # Statements run at least N_PLUS_ONE_THRESHOLD times: the same SQL text (the
+    # parameters are bound separately) repeated per row of an earlier result
+    def repeated_statements(self):
+        threshold = app.config['N_PLUS_ONE_THRESHOLD']
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('http_requests_total', 'Requests by route, method and status')
+        self.latency = Histogram('http_request_duration_seconds', 'Request latency including streaming', LATENCY_BUCKETS)
+        self.response_bytes = Counter('http_response_bytes_total', 'Response body bytes sent')
+        self.query_counts = Histogram('db_queries_per_request', 'SQL statements per request', QUERY_COUNT_BUCKETS)
+        self.query_time = Histogram('db_query_duration_seconds_per_request', 'Time spent in SQL per request', SQL_TIME_BUCKETS)
+        self.queries = Counter('db_queries_total', 'SQL statements by route')
+        self.rows_returned = Counter('db_rows_returned_total', 'Rows read by the feed, update, invite and notification queries by route')
+        self.rows_written = Counter('db_rows_written_total', 'Rows inserted, updated or deleted by route')
+        self.n_plus_one = Counter('db_n_plus_one_total', 'Requests that repeated a statement N_PLUS_ONE_THRESHOLD times or more')
+
+    def record(self, route, method, status, metrics):
+        duration = time.perf_counter() - metrics.started
+        labels = (('route', route), ('method', method))
+        with self._lock:
+            self.requests.inc(labels + (('status', status),))
+            self.latency.observe(labels, duration)
+            self.response_bytes.inc(labels, metrics.response_bytes)
+            self.query_counts.observe(labels, metrics.queries)
+            self.query_time.observe(labels, metrics.query_time)
+            self.queries.inc(labels, metrics.queries)
+            self.rows_returned.inc(labels, metrics.rows_returned)
+            self.rows_written.inc(labels, metrics.rows_written)
+            if metrics.repeated_statements():
+                self.n_plus_one.inc(labels)
+
+    # Prometheus text exposition; gauges is {name: (help, value)} for values owned
+    # by other modules (cache sizes and hit counts)
+    def render(self, gauges=None):
+        lines = []
+        with self._lock:
+            for metric in (
+                self.requests, self.latency, self.response_bytes, self.query_counts,
+                self.query_time, self.queries, self.rows_returned, self.rows_written, self.n_plus_one
+            ):
+                lines.extend(metric.render())
+        for name, (help, value) in sorted((gauges or {}).items()):
+            lines.extend([f'# HELP {name} {help}', f'# TYPE {name} gauge', f'{name} {_number(value)}'])
+        return '\n'.join(lines) + '\n'
+
+metrics_registry = MetricsRegistry()
+
+def _current():
+    if has_request_context():
+        return g.get('request_metrics')
+    return None
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current()
+    if metrics is not None:
+        metrics.query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current()
+    if metrics is None or metrics.query_started is None:
+        return
+    metrics.query_time += time.perf_counter() - metrics.query_started
+    metrics.query_started = None
+    metrics.queries += 1
+    metrics.statements[statement] = metrics.statements.get(statement, 0) + 1
+    if cursor.rowcount > 0 and not statement.lstrip()[:6].upper() == 'SELECT':
+        metrics.rows_written += cursor.rowcount
+
+# Count the rows a query of the current request returned, returns them unchanged
+# The engine events only see the statements (SQLite reports no row count for a
+# SELECT), so the routes report the rows where they consume them
+def count_rows(rows):
+    metrics = _current()
+    if metrics is not None:
+        metrics.rows_returned += len(rows)
+    return rows
+
+# Body of a streamed response, counting the bytes sent
+def _count_bytes(body, metrics):
+    try:
+        for chunk in body:
+            metrics.response_bytes += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+@app.before_request
+def _start_request_metrics():
+    if app.config['METRICS_ENABLED']:
+        g.request_metrics = RequestMetrics()
+
+@app.after_request
+def _finish_request_metrics(response):
+    # Stays in g: a streamed body still runs queries after this point
+    metrics = g.get('request_metrics')
+    if metrics is None:
+        return response
+
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    method = request.method
+    status = response.status_code
+    if response.is_streamed:
+        response.response = _count_bytes(response.response, metrics)
+    else:
+        metrics.response_bytes = response.content_length or 0
+
+    # Recorded once the body is sent, so streamed responses include their streaming
+    # time and the queries run while streaming
+    def record():
+        metrics_registry.record(route, method, status, metrics)
+        repeated = metrics.repeated_statements()
+        if repeated:
+            statement, count = max(repeated.items(), key=lambda item: item[1])
+            app.logger.warning(
+                'Possible N+1 query pattern on %s %s: statement run %d times: %s',
+                method, route, count, ' '.join(statement.split())[:300]
+            )
+    response.call_on_close(record)
+
+    # Opt-in profile of this request, for the statements run before the response
+    # is returned (a streamed body runs more while it is sent)
+    profile = app.config['PROFILE_HEADER']
+    if profile is None:
+        profile = app.debug
+    if profile and request.headers.get('X-Debug-Profile') == '1':
+        duration = (time.perf_counter() - metrics.started) * 1000
+        response.headers['Server-Timing'] = (
+            f'app;dur={duration:.1f}, db;dur={metrics.query_time * 1000:.1f};desc="{metrics.queries} queries"'
+        )
+        response.headers['X-Request-Profile'] = (
+            f'queries={metrics.queries}; db_ms={metrics.query_time * 1000:.1f}; '
+            f'rows_returned={metrics.rows_returned}; rows_written={metrics.rows_written}; n_plus_one={len(metrics.repeated_statements())}'
+        )
+    return response
@@ -3,8 +3,8 @@ from flask_admin import Admin,AdminIndexView
 from flask import redirect,url_for,flash
 from flask_login import UserMixin,LoginManager,current_user
 from flask_admin.contrib.sqla import ModelView
-from sqlalchemy import inspect
-from datetime import datetime, timezone
+from sqlalchemy import inspect, DateTime, TypeDecorator, select, func
+from datetime import datetime, timedelta, timezone
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -14,6 +14,27 @@ login_manager.login_view = 'signin'
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# Timestamp column kept in UTC. Values are converted to UTC on the way in (naive
+# values are taken to be UTC already, like the client's) and always come back as
+# aware UTC datetimes, also from SQLite, which stores them without a time zone
+class UTCDateTime(TypeDecorator):
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
 class User(db.Model, UserMixin):
     user_id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -29,16 +50,31 @@ class User(db.Model, UserMixin):
 
 class Event(db.Model):
     event_id = db.Column(db.Integer, primary_key=True)
-    start_time = db.Column(db.DateTime(timezone=True), nullable=False)
-    end_time = db.Column(db.DateTime(timezone=True), nullable=False)
+    start_time = db.Column(UTCDateTime, nullable=False)
+    end_time = db.Column(UTCDateTime, nullable=False)
     event_name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.String(1000))
     version_number = db.Column(db.Integer, nullable=False, default=1)
     cache_number = db.Column(db.Integer, nullable=False)
     creator = db.Column(db.Integer, db.ForeignKey('user.user_id'))
     group_id = db.Column(db.Integer, db.ForeignKey('group.group_id'))
+    # Recurring events: the RRULE of the series (start_time / end_time are its first
+    # occurrence), the start times of the skipped occurrences and the end of the last
+    # occurrence, NULL when the series never ends (see Project/recurrence.py)
+    recurrence_rule = db.Column(db.String(200))
+    recurrence_exceptions = db.Column(db.Text)
+    recurrence_end = db.Column(UTCDateTime)
     
-    participations = db.relationship('Participate', backref='event', lazy=True)
+    # Participations are deleted explicitly before their event, passive_deletes
+    # keeps a delete from loading them only to null their event_id
+    participations = db.relationship('Participate', backref='event', lazy=True, passive_deletes=True)
+
+    __table_args__ = (
+        # Date-window lookups of the calendar feeds
+        db.Index('ix_event_group_window', 'group_id', 'start_time', 'end_time'),
+        # Individual events of a user (group 1) on the dashboard
+        db.Index('ix_event_creator_group', 'creator', 'group_id', 'start_time'),
+    )
 
     __mapper_args__ = {
         'version_id_col': version_number
@@ -50,8 +86,9 @@ class Group(db.Model):
     description = db.Column(db.String(1000))
     version_number = db.Column(db.Integer, nullable=False, default=1)
     
-    members = db.relationship('Member', backref='group', lazy=True)
-    events = db.relationship('Event', backref='host_group', lazy=True)
+    # Members and events are deleted explicitly before their group
+    members = db.relationship('Member', backref='group', lazy=True, passive_deletes=True)
+    events = db.relationship('Event', backref='host_group', lazy=True, passive_deletes=True)
 
     __mapper_args__ = {
         'version_id_col': version_number
@@ -61,7 +98,7 @@ class Participate(db.Model):
     participate_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'))
     event_id = db.Column(db.Integer, db.ForeignKey('event.event_id'))
-    invite_time = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    invite_time = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     read_status = db.Column(db.String(50), default='Unread', nullable=False)
     status = db.Column(db.String(50), default='Pending', nullable=False)
     
@@ -69,13 +106,18 @@ class Participate(db.Model):
         db.UniqueConstraint('user_id', 'event_id', name='uq_user_event'),
         db.CheckConstraint("status IN ('Accepted', 'Declined', 'Pending')"),
         db.CheckConstraint("read_status IN ('Read', 'Unread')"),
+        # Invites and notifications of a user, newest first
+        db.Index('ix_participate_user_status', 'user_id', 'status', 'invite_time'),
+        db.Index('ix_participate_user_read', 'user_id', 'read_status', 'invite_time'),
+        # Participants of an event by status
+        db.Index('ix_participate_event_status', 'event_id', 'status'),
     )
 
 class Member(db.Model):
     member_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'))
     group_id = db.Column(db.Integer, db.ForeignKey('group.group_id'))
-    invite_time = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    invite_time = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     read_status = db.Column(db.String(50), default='Unread', nullable=False)
     permission = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), default='Pending', nullable=False)
@@ -84,4 +126,80 @@ class Member(db.Model):
         db.CheckConstraint("permission IN ('Admin', 'Editor', 'Viewer')"),
         db.CheckConstraint("read_status IN ('Read', 'Unread')"),
         db.CheckConstraint("status IN ('Accepted', 'Declined', 'Pending')"),
-    )
\ No newline at end of file
+        # One membership per user and group, also the permission lookup of every route
+        db.Index('uq_member_user_group', 'user_id', 'group_id', unique=True),
+        # Invites and notifications of a user, newest first
+        db.Index('ix_member_user_status', 'user_id', 'status', 'invite_time'),
+        db.Index('ix_member_user_read', 'user_id', 'read_status', 'invite_time'),
+        # Members of a group by status
+        db.Index('ix_member_group_status', 'group_id', 'status'),
+    )
+
+# Append-only log of event changes, read by the /data/<group_id>/updates feed
+# Each change is written once for the group feed (user_id is NULL) and once
+# for the personal feed of every affected user
+class ChangeLog(db.Model):
+    change_id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False)
+    group_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    action = db.Column(db.String(50), nullable=False)
+    change_time = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_change_log_group', 'group_id', 'user_id', 'change_id'),
+        db.Index('ix_change_log_user', 'user_id', 'change_id'),
+        db.CheckConstraint("action IN ('Created', 'Updated', 'Deleted')"),
+        # Never reuse a change_id, even after the newest rows are deleted
+        {'sqlite_autoincrement': True},
+    )
+
+# Change ids are handed out when a change is written but only become visible when
+# its transaction commits. SQLite commits one writer at a time, in id order; on
+# PostgreSQL a transaction holding a lower id can commit after a reader has taken the
+# newest id as its cursor. Readers therefore replay the changes written in the last
+# CHANGE_REPLAY_SECONDS before their cursor as well (replaying a change is harmless,
+# it reloads the event) and keep the largest id they have seen as their cursor
+# Returns the change_id to read the log after for a reader at cursor
+def change_replay_floor(cursor):
+    seconds = app.config['CHANGE_REPLAY_SECONDS']
+    if not seconds or not cursor:
+        return cursor
+    cursor_time = db.session.scalar(
+        select(ChangeLog.change_time)
+        .where(ChangeLog.change_id <= cursor)
+        .order_by(ChangeLog.change_id.desc())
+        .limit(1)
+    )
+    if cursor_time is None:
+        return cursor
+    # Walks back from the cursor over the changes of the replay window only
+    floor = db.session.scalar(
+        select(ChangeLog.change_id)
+        .where(ChangeLog.change_id <= cursor, ChangeLog.change_time <= cursor_time - timedelta(seconds=seconds))
+        .order_by(ChangeLog.change_id.desc())
+        .limit(1)
+    )
+    return floor or 0
+
+# A reader can only be brought up to date from the log when it still holds every change
+# after the reader's cursor: a cursor past the newest change (the log was reset or the
+# database restored) or before the oldest one still kept (older rows were deleted)
+# cannot be, the reader reloads its whole feed instead
+def change_cursor_expired(cursor):
+    oldest, newest = db.session.execute(
+        select(func.min(ChangeLog.change_id), func.max(ChangeLog.change_id))
+    ).one()
+    if newest is None:
+        return cursor != 0
+    return cursor > newest or cursor < oldest - 1
+
+# Cached badge counts of a user (pending invites, unread notifications)
+# Kept up to date incrementally by the routes; a missing row or a row without
+# counted means the counts are unknown and get recounted from Member / Participate
+# on the next read
+class BadgeCounter(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), primary_key=True)
+    pending_invites = db.Column(db.Integer, nullable=False, default=0)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0)
+    counted = db.Column(db.Boolean)
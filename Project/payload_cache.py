@@ -0,0 +1,69 @@
+from flask import json
+from Project import app
+from collections import OrderedDict
+import threading
+
+# Process-local LRU cache of the viewer independent part of serialised group events
+# Entries are keyed by (event_id, cache_number): every change to an event's payload
+# bumps its cache_number, so an entry never needs updating, it just stops being hit
+# The cache is bounded both by entries and by (approximate, JSON encoded) bytes
+class PayloadCache:
+    def __init__(self, max_entries=20000, max_bytes=64 * 1024 * 1024):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Columns an entry must still match, guards against event ids reused after a deletion
+    @staticmethod
+    def _signature(event):
+        return (event.version_number, event.event_name, event.start_time, event.end_time)
+
+    # Cached value for the event at its current cache_number, or None
+    def get(self, event):
+        key = (event.event_id, event.cache_number)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._signature(event):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, event, value, payload):
+        key = (event.event_id, event.cache_number)
+        size = len(json.dumps(payload))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[key] = (self._signature(event), value, size)
+            self.size += size
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted[2]
+                self.evictions += 1
+
+    # Drop every cached version of the given (deleted) events
+    def discard(self, event_ids):
+        event_ids = set(event_ids)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in event_ids]:
+                self.size -= self._entries.pop(key)[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+event_payload_cache = PayloadCache(app.config['EVENT_CACHE_MAX_ENTRIES'], app.config['EVENT_CACHE_MAX_BYTES'])
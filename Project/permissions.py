@@ -0,0 +1,92 @@
+from flask import jsonify, current_app
+from flask_login import current_user
+from Project import db
+from Project.models import Member
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from functools import wraps
+import threading
+import time
+
+# Rank of each role, a role grants everything the lower ones do
+ROLE_RANK = {'Viewer': 1, 'Editor': 2, 'Admin': 3}
+
+# Process-local cache of group permissions keyed by (user_id, group_id)
+# Non-members are cached too (as None). Entries expire after PERMISSION_CACHE_TTL
+# seconds, which bounds how long another worker can serve a revoked permission;
+# this process drops them as soon as a membership change commits
+class PermissionCache:
+    def __init__(self, max_entries=10000):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.max_entries = max_entries
+
+    def get(self, user_id, group_id):
+        key = (user_id, group_id)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        mem = Member.query.filter_by(user_id=user_id, group_id=group_id).first()
+        permission = mem.permission if mem else None
+        ttl = current_app.config.get('PERMISSION_CACHE_TTL', 60)
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest half, dicts keep insertion order
+                for old_key in list(self._entries)[:self.max_entries // 2]:
+                    del self._entries[old_key]
+            self._entries[key] = (time.monotonic() + ttl, permission)
+        return permission
+
+    # Drop the entry of one membership, or every entry of a group when user_id is None
+    def invalidate(self, group_id, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                self._entries.pop((user_id, group_id), None)
+            else:
+                for key in [key for key in self._entries if key[1] == group_id]:
+                    del self._entries[key]
+
+permission_cache = PermissionCache()
+
+# Group permission of a user: 'Admin', 'Editor', 'Viewer' or None for non-members
+def cached_permission(user_id, group_id):
+    return permission_cache.get(user_id, group_id)
+
+# Forget a cached membership now and again once the current transaction commits,
+# so a request reading the old row in between cannot re-cache it
+def invalidate_permission(group_id, user_id=None):
+    permission_cache.invalidate(group_id, user_id)
+    db.session.info.setdefault('permission_invalidations', []).append((group_id, user_id))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    for group_id, user_id in session.info.pop('permission_invalidations', ()):
+        permission_cache.invalidate(group_id, user_id)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_invalidations(session, previous_transaction):
+    session.info.pop('permission_invalidations', None)
+
+# Route decorator for routes taking a group_id: answers 403 unless the current user
+# is a member of the group with at least the `required` role, and passes the
+# member's role to the route as `permission`
+# With personal=True, group 1 (the user's own calendar) skips the check and gets None
+def group_permission_required(required='Viewer', personal=False):
+    def decorator(route):
+        @wraps(route)
+        def wrapper(*args, **kwargs):
+            group_id = kwargs['group_id']
+            if personal and group_id == 1:
+                return route(*args, permission=None, **kwargs)
+
+            permission = cached_permission(current_user.user_id, group_id)
+            if permission is None:
+                return jsonify({'error': 'Access denied'}), 403
+            if ROLE_RANK[permission] < ROLE_RANK[required]:
+                return jsonify({'error': 'Permission denied'}), 403
+            return route(*args, permission=permission, **kwargs)
+        return wrapper
+    return decorator
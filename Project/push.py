@@ -0,0 +1,137 @@
+from flask import current_app, json
+from Project import db
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import asyncio
+import queue
+import threading
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+
+# Messages buffered per connection before a slow client starts losing them
+CONNECTION_QUEUE_SIZE = 100
+
+# In-process publish/subscribe of push messages to the open /stream connections
+# It only reaches the connections held by this process: multi-worker deployments
+# set app.extensions['push_broker'] to a broker with the same subscribe /
+# unsubscribe / publish methods that relays messages between workers
+# A connection is anything with a put_nowait that raises queue.Full when it is full
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def subscribe(self, user_id, connection=None):
+        if connection is None:
+            connection = queue.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+        with self._lock:
+            self._connections.setdefault(user_id, set()).add(connection)
+        return connection
+
+    def unsubscribe(self, user_id, connection):
+        with self._lock:
+            connections = self._connections.get(user_id)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self._connections[user_id]
+
+    def publish(self, user_ids, message):
+        with self._lock:
+            connections = [
+                connection
+                for user_id in user_ids
+                for connection in self._connections.get(user_id, ())
+            ]
+        for connection in connections:
+            try:
+                connection.put_nowait(message)
+            except queue.Full:
+                # The client refetches everything on reconnect, dropping is safe
+                pass
+
+def get_broker():
+    return current_app.extensions.setdefault('push_broker', InProcessBroker())
+
+# Queue a push message for the given users, sent once the current transaction commits
+# type is one of 'calendar' (events of group_id changed), 'invites' or 'groups'
+def notify(user_ids, type, **data):
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    message = dict(data, type=type)
+    db.session.info.setdefault('push_messages', []).append((user_ids, message))
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session):
+    pending = session.info.pop('push_messages', None)
+    if pending:
+        broker = get_broker()
+        for user_ids, message in pending:
+            broker.publish(user_ids, message)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('push_messages', None)
+
+# Server-Sent Events frame of a push message
+def format_message(message):
+    return f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+# Server-Sent Events body for one connection of a user, holding a thread while it is open
+def event_stream(broker, user_id):
+    connection = broker.subscribe(user_id)
+    try:
+        # Ask the browser to reconnect quickly after a dropped connection
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                message = connection.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_message(message)
+    finally:
+        broker.unsubscribe(user_id, connection)
+
+# Connection of a /stream served on an event loop: publish runs on the threads that
+# commit, so the messages are handed over to the loop
+class LoopConnection:
+    def __init__(self, loop):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+
+    def put_nowait(self, message):
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The loop is closed, the server is shutting down
+            pass
+
+    def _put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Same as a full thread connection, the client refetches on reconnect
+            pass
+
+    def get(self):
+        return self._queue.get()
+
+# Server-Sent Events body for one connection of a user, served on the running event
+# loop without holding a thread (see asgi.py)
+async def async_event_stream(broker, user_id):
+    connection = LoopConnection(asyncio.get_running_loop())
+    broker.subscribe(user_id, connection)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(connection.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_message(message)
+    finally:
+        broker.unsubscribe(user_id, connection)
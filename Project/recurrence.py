@@ -0,0 +1,200 @@
+from Project import app
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import count, islice
+import calendar
+
+# Recurring events store an RRULE (RFC 5545) in Event.recurrence_rule. The supported
+# subset is FREQ=DAILY|WEEKLY|MONTHLY|YEARLY with INTERVAL, COUNT or UNTIL and, for
+# weekly rules, BYDAY=MO,TU,... Event.start_time / end_time are the first occurrence;
+# occurrences are only expanded for the window being read, never stored
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# Parse a rule into a dict (freq, interval, count, until, byday)
+# Raises ValueError for malformed or unsupported rules
+def parse_rule(text):
+    parts = {}
+    text = text.strip().upper()
+    if text.startswith('RRULE:'):
+        text = text[len('RRULE:'):]
+    for part in text.split(';'):
+        if not part:
+            continue
+        name, sep, value = part.partition('=')
+        if not sep or not value or name in parts:
+            raise ValueError(f'Malformed recurrence rule part {part}')
+        parts[name] = value
+
+    rule = {'freq': parts.pop('FREQ', None), 'interval': 1, 'count': None, 'until': None, 'byday': None}
+    if rule['freq'] not in FREQUENCIES:
+        raise ValueError('FREQ must be one of ' + ', '.join(FREQUENCIES))
+    if 'INTERVAL' in parts:
+        rule['interval'] = int(parts.pop('INTERVAL'))
+        if rule['interval'] < 1:
+            raise ValueError('INTERVAL must be positive')
+    if 'COUNT' in parts:
+        rule['count'] = int(parts.pop('COUNT'))
+        if rule['count'] < 1:
+            raise ValueError('COUNT must be positive')
+    if 'UNTIL' in parts:
+        if rule['count'] is not None:
+            raise ValueError('COUNT and UNTIL cannot be combined')
+        rule['until'] = _parse_until(parts.pop('UNTIL'))
+    if 'BYDAY' in parts:
+        if rule['freq'] != 'WEEKLY':
+            raise ValueError('BYDAY is only supported for weekly rules')
+        days = parts.pop('BYDAY').split(',')
+        if any(day not in WEEKDAYS for day in days):
+            raise ValueError('BYDAY takes weekdays such as MO,WE,FR')
+        rule['byday'] = sorted({WEEKDAYS.index(day) for day in days})
+    if parts:
+        raise ValueError('Unsupported recurrence rule parts: ' + ', '.join(parts))
+    return rule
+
+# Bound a parsed rule of a series starting at start before it is stored: a COUNT
+# above RECURRENCE_MAX_COUNT raises ValueError, an UNTIL more than
+# RECURRENCE_UNTIL_MAX_DAYS after the start is brought back to that day
+def limit_rule(rule, start):
+    if rule['count'] is not None and rule['count'] > app.config['RECURRENCE_MAX_COUNT']:
+        raise ValueError(f"COUNT cannot exceed {app.config['RECURRENCE_MAX_COUNT']}")
+    latest = start + timedelta(days=app.config['RECURRENCE_UNTIL_MAX_DAYS'])
+    if rule['until'] is not None and rule['until'] > latest:
+        rule = dict(rule, until=latest)
+    return rule
+
+# UNTIL as a UTC datetime, a bare date includes the whole day
+def _parse_until(value):
+    value = value.rstrip('Z')
+    if 'T' in value:
+        return datetime.strptime(value, '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc)
+    return datetime.strptime(value, '%Y%m%d').replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
+
+# Canonical text of a rule, as stored
+def format_rule(rule):
+    parts = [f"FREQ={rule['freq']}"]
+    if rule['interval'] != 1:
+        parts.append(f"INTERVAL={rule['interval']}")
+    if rule['byday']:
+        parts.append('BYDAY=' + ','.join(WEEKDAYS[day] for day in rule['byday']))
+    if rule['count'] is not None:
+        parts.append(f"COUNT={rule['count']}")
+    if rule['until'] is not None:
+        parts.append('UNTIL=' + rule['until'].strftime('%Y%m%dT%H%M%SZ'))
+    return ';'.join(parts)
+
+# Skipped occurrences are stored as their start times, comma separated ISO 8601
+def parse_exceptions(text):
+    if not text:
+        return frozenset()
+    return frozenset(
+        datetime.fromisoformat(value).astimezone(timezone.utc) for value in text.split(',') if value
+    )
+
+def format_exceptions(exceptions):
+    return ','.join(value.isoformat(timespec='seconds') for value in sorted(exceptions)) or None
+
+# Months / years added to a datetime, None when the day does not exist there
+# (the 31st in a 30 day month, February 29th outside leap years)
+def _add_months(start, months):
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    if start.day > calendar.monthrange(year, month + 1)[1]:
+        return None
+    return start.replace(year=year, month=month + 1)
+
+# (index, start) of the occurrences of a series in order, index counting from the
+# first occurrence (for COUNT). Occurrences starting before skip_to may be skipped
+# without being generated, when the frequency allows jumping ahead
+def _occurrence_starts(start, rule, skip_to):
+    interval = rule['interval']
+    jump = rule['count'] is None and skip_to > start
+
+    if rule['freq'] in ('DAILY', 'WEEKLY') and not rule['byday']:
+        step = timedelta(days=interval) if rule['freq'] == 'DAILY' else timedelta(weeks=interval)
+        first = (skip_to - start) // step if skip_to > start else 0
+        for index in count(first):
+            yield index, start + index * step
+
+    elif rule['freq'] == 'WEEKLY':
+        days = rule['byday']
+        week_start = start - timedelta(days=start.weekday())
+        first_week = [day for day in days if day >= start.weekday()]
+        step = timedelta(weeks=interval)
+        first = (skip_to - week_start) // step if skip_to > week_start else 0
+        for week in count(first):
+            week_days = first_week if week == 0 else days
+            index = 0 if week == 0 else len(first_week) + (week - 1) * len(days)
+            for day in week_days:
+                yield index, week_start + week * step + timedelta(days=day)
+                index += 1
+
+    else:
+        months = interval if rule['freq'] == 'MONTHLY' else 12 * interval
+        first = 0
+        if jump:
+            elapsed = (skip_to.year - start.year) * 12 + skip_to.month - start.month
+            first = max(0, elapsed // months - 1)
+        index = first
+        misses = 0
+        for period in count(first):
+            occurrence = _add_months(start, period * months)
+            if occurrence is None:
+                # The calendar repeats every 400 years, a day missing for that long
+                # (e.g. February 29th every 100 years from 2100) never comes back
+                misses += 1
+                if misses * months > 400 * 12:
+                    return
+                continue
+            misses = 0
+            yield index, occurrence
+            index += 1
+
+# (start, end) of the occurrences overlapping [window_start, window_end), at most
+# RECURRENCE_MAX_OCCURRENCES of them looked at. Exceptions are stored in whole
+# seconds, they are matched against whole seconds for starts stored with more
+def occurrences(start, end, rule_text, exceptions_text, window_start, window_end):
+    rule = parse_rule(rule_text)
+    exceptions = parse_exceptions(exceptions_text)
+    duration = end - start
+    found = []
+    starts = _occurrence_starts(start, rule, window_start - duration)
+    for index, occurrence in islice(starts, app.config['RECURRENCE_MAX_OCCURRENCES']):
+        if rule['count'] is not None and index >= rule['count']:
+            break
+        if rule['until'] is not None and occurrence > rule['until']:
+            break
+        if occurrence >= window_end:
+            break
+        if occurrence < start:
+            continue
+        if occurrence + duration > window_start and occurrence.replace(microsecond=0) not in exceptions:
+            found.append((occurrence, occurrence + duration))
+    return found
+
+# Occurrences of an event in a window, cached per (event_id, cache_number, window):
+# every change to a series bumps its cache_number. The other columns guard against
+# event ids reused after a deletion
+@lru_cache(maxsize=4096)
+def cached_occurrences(event_id, cache_number, start, end, rule_text, exceptions_text, window_start, window_end):
+    return tuple(occurrences(start, end, rule_text, exceptions_text, window_start, window_end))
+
+# End of the last occurrence of a series, None when it never ends or has more than
+# RECURRENCE_MAX_OCCURRENCES occurrences (rules stored before limit_rule): the feeds
+# then keep it in every later window and the expansion still stops at COUNT / UNTIL
+def series_end(start, end, rule_text):
+    rule = parse_rule(rule_text)
+    if rule['count'] is None and rule['until'] is None:
+        return None
+    last = None
+    for iteration, (index, occurrence) in enumerate(_occurrence_starts(start, rule, start)):
+        if rule['count'] is not None and index >= rule['count']:
+            break
+        if rule['until'] is not None and occurrence > rule['until']:
+            break
+        if iteration >= app.config['RECURRENCE_MAX_OCCURRENCES']:
+            return None
+        if occurrence >= start:
+            last = occurrence
+    return (last or start) + (end - start)
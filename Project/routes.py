@@ -2,47 +2,630 @@ from flask import flash,redirect,url_for
 from werkzeug.security import generate_password_hash,check_password_hash
 from flask_login import login_user,login_required,current_user,logout_user
 from Project.forms import SignInForm,SignUpForm,GroupForm
-from Project.models import User,Event,Group,Participate,Member
-from flask import request, render_template, jsonify
-from sqlalchemy import func, update, exists
+from Project.models import User,Event,Group,Participate,Member,ChangeLog,BadgeCounter,change_replay_floor,change_cursor_expired
+from flask import request, render_template, jsonify, Response
+from sqlalchemy import func, update, exists, insert, select, delete, case, or_, and_, literal, null, union_all
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm.attributes import flag_modified
 from Project import app,db
+from Project.push import notify, get_broker, event_stream
+from Project.permissions import group_permission_required, cached_permission, invalidate_permission
+from Project.payload_cache import event_payload_cache
+from Project.streaming import streaming_json_response, streaming_response
+from Project.scheduling import merge_intervals, free_slots, find_conflicts
+from Project.interval_index import interval_indexes
+from Project.metrics import metrics_registry, count_rows
+from Project.database import chunked
+from Project.recurrence import parse_rule, limit_rule, format_rule, parse_exceptions, format_exceptions, cached_occurrences, series_end
+from Project.ics import parse_events, event_from_properties, calendar_header, calendar_footer, event_component, format_ics_datetime
+import hmac
+import io
 from datetime import datetime, timezone, timedelta
 import json
 import os
 
-# Helper function to convert datetime to human-readable format
-def human_readable_delta(dt):
-    now = datetime.now(timezone.utc)  # Use UTC time instead of local
-    if dt.tzinfo is None:
-        # Localize naive datetime to UTC
-        dt = dt.replace(tzinfo=timezone.utc)
-    delta = now - dt
-    seconds = delta.total_seconds()
-        
-    if seconds < 0:
-        return "in the future"
-    
-    intervals = (
-        ('year', 31536000),    # 365 * 24 * 3600
-        ('month', 2592000),    # 30 * 24 * 3600
-        ('week', 604800),      # 7 * 24 * 3600
-        ('day', 86400),       # 24 * 3600
-        ('hour', 3600),
-        ('minute', 60),
-        ('second', 1)
+# Parse the optional ?start=&end= window sent with FullCalendar's fetchInfo
+# Returns (start, end) as UTC datetimes, or None when no window was requested
+# Raises ValueError on a malformed or empty window
+def get_request_window():
+    start = request.args.get('start')
+    end = request.args.get('end')
+    if not start and not end:
+        return None
+    if not start or not end:
+        raise ValueError('Both start and end are required')
+
+    bounds = [parse_utc_datetime(start), parse_utc_datetime(end)]
+    if bounds[0] >= bounds[1]:
+        raise ValueError('End must be after start')
+    return bounds[0], bounds[1]
+
+# Parse an ISO 8601 datetime sent by the client as a UTC datetime (naive means UTC)
+# Raises ValueError when malformed
+def parse_utc_datetime(value):
+    value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+# Restrict an Event query to the events overlapping the requested window
+# A recurring event matches from its first occurrence to the end of its last one,
+# its occurrences are then expanded in Python (see expand_recurring)
+def filter_window(query, window):
+    if window is None:
+        return query
+    start, end = window
+    return query.filter(
+        Event.start_time < end,
+        or_(
+            Event.end_time > start,
+            and_(
+                Event.recurrence_rule.isnot(None),
+                or_(Event.recurrence_end.is_(None), Event.recurrence_end > start)
+            )
+        )
     )
 
-    for name, count in intervals:
-        value = int(seconds // count)
-        if value >= 1:
-            if value == 1:
-                return f"{value} {name} ago"
+# Status buckets that every serialised group event carries
+PARTICIPANT_BUCKETS = (
+    ('Accepted', 'accepted_participants'),
+    ('Pending', 'pending_participants'),
+    ('Declined', 'declined_participants')
+)
+
+# Load the participants of a set of events with one query per chunk of events
+# and bucket them by status in Python
+# Returns {event_id: {'participants': [...], 'accepted_participants': [...], ...}}
+def load_participants(event_ids):
+    participants_map = {}
+    for event_id in event_ids:
+        participants_map[event_id] = {'participants': []}
+        for _, bucket in PARTICIPANT_BUCKETS:
+            participants_map[event_id][bucket] = []
+
+    buckets = dict(PARTICIPANT_BUCKETS)
+    for chunk in chunked(event_ids):
+        rows = count_rows(
+            db.session.query(Participate.event_id, Participate.status, User.name, User.email)
+            .join(User, User.user_id == Participate.user_id)
+            .filter(Participate.event_id.in_(chunk))
+            .order_by(Participate.participate_id)
+            .all()
+        )
+        for row in rows:
+            participant = {
+                'name': row.name,
+                'email': row.email
+            }
+            participants_map[row.event_id]['participants'].append(participant)
+            participants_map[row.event_id][buckets[row.status]].append(participant)
+
+    return participants_map
+
+# Record changes of the given events in the change log: once for the group feed
+# and once for the personal feed of every affected user (the creator of an
+# individual event, the participants of a group event plus any extra user_ids)
+# Must run inside the transaction of the change, before participations are removed
+def log_event_changes(event_ids, action, user_ids=()):
+    changes = []
+    for chunk in chunked(event_ids):
+        events = (
+            db.session.query(Event.event_id, Event.group_id, Event.creator)
+            .filter(Event.event_id.in_(chunk))
+            .all()
+        )
+        affected_users = {event.event_id: set(user_ids) for event in events}
+        participations = (
+            db.session.query(Participate.event_id, Participate.user_id)
+            .filter(Participate.event_id.in_(chunk))
+            .all()
+        )
+        for participation in participations:
+            affected_users[participation.event_id].add(participation.user_id)
+
+        for event in events:
+            if event.group_id == 1:
+                users = {event.creator}
             else:
-                return f"{value} {name}s ago"
+                users = affected_users[event.event_id]
+                changes.append({'event_id': event.event_id, 'group_id': event.group_id, 'user_id': None, 'action': action})
+            for user_id in users:
+                changes.append({'event_id': event.event_id, 'group_id': event.group_id, 'user_id': user_id, 'action': action})
+
+    if changes:
+        # render_nulls: the group rows (user_id NULL) would otherwise have other keys
+        # than the user rows and split the batch into one INSERT per row
+        db.session.execute(insert(ChangeLog), changes, execution_options={'render_nulls': True})
+
+# Change of a user's badge counts when one of their invites (Member / Participate row)
+# goes from (old_status, old_read_status) to (new_status, new_read_status)
+# None stands for a row that does not exist (yet / anymore)
+def invite_badge_delta(old_status, old_read_status, new_status, new_read_status):
+    pending = int(new_status == 'Pending') - int(old_status == 'Pending')
+    unread = int(new_read_status == 'Unread') - int(old_read_status == 'Unread')
+    return pending, unread
+
+# Give the users a counter row inside the current transaction, an uncounted one when
+# they have none yet, so that every change of their badges locks the row
+def ensure_badge_counters(user_ids):
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    for chunk in chunked(user_ids):
+        db.session.execute(
+            dialect.insert(BadgeCounter)
+            .values([{'user_id': user_id, 'pending_invites': 0, 'unread_notifications': 0} for user_id in chunk])
+            .on_conflict_do_nothing(index_elements=['user_id'])
+        )
+
+# Adjust the cached badge counts of the users inside the current transaction
+# Uncounted rows are bumped too, the recount in load_badge_counts overwrites them
+def bump_badge_counts(user_ids, pending=0, unread=0):
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids or (pending == 0 and unread == 0):
+        return
+    ensure_badge_counters(user_ids)
+    for chunk in chunked(user_ids):
+        db.session.execute(
+            update(BadgeCounter)
+            .where(BadgeCounter.user_id.in_(chunk))
+            .values(
+                pending_invites = BadgeCounter.pending_invites + pending,
+                unread_notifications = BadgeCounter.unread_notifications + unread
+            )
+        )
+
+# Mark the cached badge counts of the users as unknown, for changes too broad to track one by one
+# The rows stay, so later changes still lock them against a concurrent recount
+def invalidate_badge_counts(user_ids):
+    user_ids = list(dict.fromkeys(user_ids))
+    for chunk in chunked(user_ids):
+        db.session.execute(
+            update(BadgeCounter)
+            .where(BadgeCounter.user_id.in_(chunk))
+            .values(counted = None)
+        )
+
+# Scalar subqueries counting the pending invites and unread notifications of a user
+# from Member / Participate
+def badge_count_subqueries(user_id):
+    def count(model, column, status):
+        relationship = Member.group if model is Member else Participate.event
+        return (
+            select(func.count())
+            .select_from(model)
+            .join(relationship)
+            .where(model.user_id == user_id, column == status)
+            .scalar_subquery()
+        )
+
+    pending = count(Member, Member.status, 'Pending') + count(Participate, Participate.status, 'Pending')
+    unread = count(Member, Member.read_status, 'Unread') + count(Participate, Participate.read_status, 'Unread')
+    return pending, unread
+
+# Count the pending invites and unread notifications of a user from Member / Participate
+def count_badges(user_id):
+    pending, unread = badge_count_subqueries(user_id)
+    return tuple(db.session.execute(select(pending, unread)).one())
+
+# Badge counts (pending invites, unread notifications) of a user from the counter cache,
+# falling back to a recount that refills the cache
+def load_badge_counts(user_id):
+    counter = db.session.get(BadgeCounter, user_id)
+    if counter is not None and counter.counted:
+        return counter.pending_invites, counter.unread_notifications
+
+    try:
+        ensure_badge_counters([user_id])
+        db.session.commit()
+
+        # Lock the row first: the changes that already bumped it commit before the
+        # recount reads, the ones that have not wait until the recount is stored,
+        # so every change is either in the recount or bumped on top of it
+        # (SQLite has no FOR UPDATE, there the UPDATE alone holds the write lock)
+        db.session.execute(
+            select(BadgeCounter.user_id)
+            .where(BadgeCounter.user_id == user_id)
+            .with_for_update()
+        )
+        pending, unread = badge_count_subqueries(user_id)
+        db.session.execute(
+            update(BadgeCounter)
+            .where(BadgeCounter.user_id == user_id)
+            .values(pending_invites = pending, unread_notifications = unread, counted = True)
+        )
+        db.session.commit()
+    except:
+        # The counts stay unknown, the next read recounts them again
+        db.session.rollback()
+        return count_badges(user_id)
+
+    counter = db.session.get(BadgeCounter, user_id)
+    return counter.pending_invites, counter.unread_notifications
+
+# Resolve emails to user ids with one query per IN (...) chunk
+# Returns {normalised email: user_id}, unknown emails are left out
+def resolve_user_ids(emails):
+    emails = [email.strip().lower() for email in emails]
+    user_ids = {}
+    for chunk in chunked(emails):
+        for user in db.session.query(User.user_id, User.email).filter(User.email.in_(chunk)):
+            user_ids[user.email] = user.user_id
+    return user_ids
+
+# Apply per-user badge deltas {user_id: (pending, unread)} with one UPDATE per distinct delta
+def bump_badge_deltas(deltas):
+    users_by_delta = {}
+    for user_id, delta in deltas.items():
+        users_by_delta.setdefault(delta, []).append(user_id)
+    for (pending, unread), user_ids in users_by_delta.items():
+        bump_badge_counts(user_ids, pending=pending, unread=unread)
+
+# Ids of the events of a group in which any of the users participates
+def participated_event_ids(group_id, user_ids):
+    event_ids = set()
+    for chunk in chunked(list(user_ids)):
+        event_ids.update(db.session.scalars(
+            select(Participate.event_id)
+            .join(Participate.event)
+            .where(Event.group_id == group_id, Participate.user_id.in_(chunk))
+        ))
+    return list(event_ids)
+
+# Bump the cache_number of the events so cached payloads get rebuilt
+def bump_cache_numbers(event_ids):
+    for chunk in chunked(event_ids):
+        db.session.execute(
+            update(Event)
+            .where(Event.event_id.in_(chunk))
+            .values(cache_number=Event.cache_number + 1)
+        )
+
+# Apply the member changes of the group info form with set-based statements
+# All emails are resolved in one go; events in which an updated or deleted member
+# participates are logged and get their cache_number bumped once
+# Returns the emails that do not belong to any user
+def apply_member_changes(group_id, new_members, updated_members, deleted_members):
+    user_ids = resolve_user_ids(
+        [mem['email'] for mem in new_members + updated_members + deleted_members]
+    )
+    current_member_ids = set()
+    for chunk in chunked(list(user_ids.values())):
+        current_member_ids.update(db.session.scalars(
+            select(Member.user_id).where(Member.group_id == group_id, Member.user_id.in_(chunk))
+        ))
+
+    # The last role given for an email wins
+    def roles_of(members):
+        roles = {}
+        for mem in members:
+            email = mem['email'].strip().lower()
+            if email in user_ids:
+                roles[user_ids[email]] = mem.get('role')
+        return roles
+    added = {user_id: role for user_id, role in roles_of(new_members).items() if user_id not in current_member_ids}
+    deleted = [user_id for user_id in roles_of(deleted_members) if user_id in current_member_ids]
+    updated = {user_id: role for user_id, role in roles_of(updated_members).items()
+               if user_id in current_member_ids and user_id not in deleted}
+    invalid_emails = list(dict.fromkeys(
+        email for email in (mem['email'].strip().lower() for mem in new_members) if email not in user_ids
+    ))
+
+    if added:
+        db.session.execute(insert(Member), [{
+            'user_id': user_id,
+            'group_id': group_id,
+            'permission': role
+        } for user_id, role in added.items()])
+        bump_badge_counts(added.keys(), pending=1, unread=1)
+        notify(added.keys(), 'invites')
+
+    users_by_role = {}
+    for user_id, role in updated.items():
+        users_by_role.setdefault(role, []).append(user_id)
+    for role, role_user_ids in users_by_role.items():
+        for chunk in chunked(role_user_ids):
+            db.session.execute(
+                update(Member)
+                .where(Member.group_id == group_id, Member.user_id.in_(chunk))
+                .values(permission=role)
+            )
+
+    # Log while the removed members still participate in the events
+    affected_event_ids = participated_event_ids(group_id, list(updated) + deleted)
+    log_event_changes(affected_event_ids, 'Updated')
+    bump_cache_numbers(affected_event_ids)
+
+    group_event_ids = select(Event.event_id).where(Event.group_id == group_id)
+    for chunk in chunked(deleted):
+        db.session.execute(
+            delete(Participate)
+            .where(Participate.user_id.in_(chunk), Participate.event_id.in_(group_event_ids))
+        )
+        db.session.execute(
+            delete(Member)
+            .where(Member.group_id == group_id, Member.user_id.in_(chunk))
+        )
+    invalidate_badge_counts(deleted)
+
+    if added or updated or deleted:
+        invalidate_permission(group_id)
+    return invalid_emails
+
+# Busy intervals of the users overlapping the window, as {user_id: [(start, end)]}
+# A user is busy during the group events they accepted and their individual events
+def load_busy_intervals(user_ids, window, exclude_event_id=None):
+    busy = {}
+    for user_id, index in interval_indexes.users(list(user_ids)).items():
+        busy[user_id] = [
+            (start, end)
+            for start, end, event_id, status in index.overlap(*window)
+            if status in ('Accepted', 'Individual') and event_id != exclude_event_id
+        ]
+    return busy
+
+# Create Group 1, the group of the individual events, when it does not exist yet
+# (individual events reference it as a foreign key). Returns False when that fails
+def ensure_personal_group():
+    group = Group.query.filter_by(group_id=1).first()
     
-    return "Just Now"
+    if group is None:
+        newGroup = Group(
+            group_name = 'No Group',
+            description = 'No Description'
+        )
+        
+        try:
+            db.session.add(newGroup)
+            db.session.commit()
+        except:
+            db.session.rollback()
+            return False
+    return True
+
+# Ids of the accepted members of a group, i.e. the users viewing its calendar
+def group_member_ids(group_id):
+    return db.session.scalars(
+        select(Member.user_id).where(Member.group_id == group_id, Member.status == 'Accepted')
+    ).all()
+
+# Ids of the participants of an event
+def event_participant_ids(event_id):
+    return db.session.scalars(
+        select(Participate.user_id).where(Participate.event_id == event_id)
+    ).all()
+
+# Position of the newest change, handed to the client along with a full load
+def current_change_cursor():
+    return db.session.query(func.max(ChangeLog.change_id)).scalar() or 0
+
+# Columns the calendar feeds serialise. The feeds select them as plain read-only rows:
+# no Event entities, identity map or unit-of-work bookkeeping
+FEED_COLUMNS = (
+    Event.event_id,
+    Event.event_name,
+    Event.description,
+    Event.start_time,
+    Event.end_time,
+    Event.version_number,
+    Event.cache_number,
+    Event.recurrence_rule,
+    Event.recurrence_exceptions
+)
+
+# Rows fetched from the database cursor at a time by the feeds
+FEED_BATCH_SIZE = 1000
+
+# Feed rows of a select over FEED_COLUMNS, in lists of up to FEED_BATCH_SIZE rows
+def feed_batches(statement):
+    batches = db.session.execute(
+        statement.execution_options(yield_per=FEED_BATCH_SIZE)
+    ).partitions()
+    return (count_rows(rows) for rows in batches)
+
+# Individual (group 1) events of the current user
+def individual_feed_query():
+    return select(*FEED_COLUMNS).where(Event.creator == current_user.user_id, Event.group_id == 1)
+
+# Group events the current user participates in (and has not declined)
+def participated_feed_query():
+    return (
+        select(*FEED_COLUMNS)
+        .join(Event.participations)
+        .where(Participate.user_id == current_user.user_id, Participate.status != 'Declined')
+    )
+
+# Events of a group
+def group_feed_query(group_id):
+    return select(*FEED_COLUMNS).where(Event.group_id == group_id)
+
+# ISO 8601 text of a UTC datetime read from a UTCDateTime column,
+# e.g. 2026-10-01T10:00:00+00:00
+def isoformat_utc(value):
+    return value.isoformat(timespec='seconds')
+
+# Serialise an individual (group 1) event of the current user
+def serialize_individual_event(event):
+    return {
+        'event_id': event.event_id,
+        'title': event.event_name,
+        'description': event.description,
+        'start': isoformat_utc(event.start_time),
+        'end': isoformat_utc(event.end_time),
+        'event_type': 'individual',
+        'is_pending_for_current_user': False,
+        'event_edit_permission': 'Admin',
+        'version': event.version_number,
+        'cache_number': event.cache_number,
+        'recurrence': event.recurrence_rule
+    }
+
+# Serialise the viewer independent part of a group event with its participants
+# (as returned by load_participants)
+def build_group_event_payload(event, event_participants):
+    return {
+        'event_id': event.event_id,
+        'title': event.event_name,
+        'description': event.description,
+        'start': isoformat_utc(event.start_time),
+        'end': isoformat_utc(event.end_time),
+        'participants': event_participants['participants'],
+        'accepted_participants': event_participants['accepted_participants'],
+        'pending_participants': event_participants['pending_participants'],
+        'declined_participants': event_participants['declined_participants'],
+        'version': event.version_number,
+        'cache_number': event.cache_number,
+        'recurrence': event.recurrence_rule
+    }
+
+# Serialise group events for the current user
+# The shared payloads come from event_payload_cache, participants are only loaded
+# for the events missing from it; the viewer specific fields are added per request
+# event_type is only set on the dashboard, where individual and group events are mixed
+def serialize_group_events(events, permission, event_type=None):
+    cached = {}
+    missing = []
+    for event in events:
+        entry = event_payload_cache.get(event)
+        if entry is None:
+            missing.append(event)
+        else:
+            cached[event.event_id] = entry
+
+    participants_map = load_participants([event.event_id for event in missing])
+    for event in missing:
+        payload = build_group_event_payload(event, participants_map[event.event_id])
+        pending_emails = frozenset(participant['email'] for participant in payload['pending_participants'])
+        cached[event.event_id] = (payload, pending_emails)
+        event_payload_cache.put(event, cached[event.event_id], payload)
+
+    events_data = []
+    for event in events:
+        payload, pending_emails = cached[event.event_id]
+        event_data = dict(payload)
+        event_data['is_pending_for_current_user'] = current_user.email in pending_emails
+        event_data['event_edit_permission'] = permission
+        if event_type:
+            event_data['event_type'] = event_type
+        events_data.append(event_data)
+    return events_data
+
+# Window a recurring event is expanded over when no date range was requested: from
+# its first occurrence to RECURRENCE_HORIZON_DAYS ahead (whole days, so that the
+# occurrence cache keeps hitting for the rest of the day)
+def default_recurrence_window(start):
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, max(today, start) + timedelta(days=app.config['RECURRENCE_HORIZON_DAYS'])
+
+# Replace the recurring events among serialised feed items by their occurrences in
+# the window; rows are the feed rows the items were serialised from, in the same order
+# Every occurrence is a copy of its series with its own start / end and an
+# occurrence_start, which the client sends back to edit or skip that occurrence
+def expand_recurring(rows, events_data, window):
+    expanded = []
+    for row, event_data in zip(rows, events_data):
+        if row.recurrence_rule is None:
+            expanded.append(event_data)
+            continue
+        window_start, window_end = window or default_recurrence_window(row.start_time)
+        for start, end in cached_occurrences(
+            row.event_id, row.cache_number, row.start_time, row.end_time,
+            row.recurrence_rule, row.recurrence_exceptions, window_start, window_end
+        ):
+            start = isoformat_utc(start)
+            expanded.append(dict(event_data, start=start, end=isoformat_utc(end), occurrence_start=start))
+    return expanded
+
+# Start, end, rule, exceptions and series end of an event from an add / update
+# request: 'recurrence' (an RRULE, empty for none) is optional and keeps the current
+# rule when missing. An occurrence is edited through its series: moving it moves
+# the first occurrence and the skipped occurrences by the same amount
+# Times are stored in whole seconds, as occurrence starts and exceptions are sent
+# and stored (see isoformat_utc), so that a skipped occurrence matches its start
+# Raises ValueError on malformed times or an unsupported rule
+def event_schedule(data, event=None):
+    start = parse_utc_datetime(data['start']).replace(microsecond=0)
+    end = parse_utc_datetime(data['end']).replace(microsecond=0)
+    rule = event.recurrence_rule if event is not None else None
+    exceptions = event.recurrence_exceptions if event is not None else None
+    if 'recurrence' in data:
+        rule = format_rule(limit_rule(parse_rule(data['recurrence']), start)) if data['recurrence'] else None
+    if rule is None:
+        return start, end, None, None, None
+
+    if event is not None and event.recurrence_rule is not None and data.get('occurrence_start'):
+        shift = start - parse_utc_datetime(data['occurrence_start'])
+        duration = end - start
+        start = event.start_time + shift
+        end = start + duration
+        exceptions = format_exceptions(value + shift for value in parse_exceptions(exceptions))
+    return start, end, rule, exceptions, series_end(start, end, rule)
+
+# Insert a batch of imported events (as returned by event_from_properties) into a
+# group with set-based statements: one multi-row INSERT for the events, one for
+# their participants (the attendees that are users of the app, group events only)
+# Runs inside the caller's transaction. Returns the attendee emails that are not users
+def insert_imported_events(group_id, events):
+    rows = []
+    for event in events:
+        rule_end = series_end(event['start'], event['end'], event['rule']) if event['rule'] else None
+        rows.append({
+            'event_name': (event['title'] or 'Untitled event')[:200],
+            'description': event['description'][:1000],
+            'start_time': event['start'],
+            'end_time': event['end'],
+            'recurrence_rule': event['rule'],
+            'recurrence_exceptions': format_exceptions(event['exceptions']) if event['rule'] else None,
+            'recurrence_end': rule_end,
+            'cache_number': 0,
+            'creator': current_user.user_id,
+            'group_id': group_id
+        })
+    # An ordered RETURNING (sort_by_parameter_order) makes SQLite insert row by row,
+    # so the ids come back in any order and are matched to the rows by their values;
+    # rows equal in every column are interchangeable
+    key_columns = [
+        Event.start_time, Event.end_time, Event.event_name, Event.description,
+        Event.recurrence_rule, Event.recurrence_exceptions
+    ]
+    ids_by_key = {}
+    for returned in db.session.execute(insert(Event).returning(Event.event_id, *key_columns), rows):
+        ids_by_key.setdefault(tuple(returned[1:]), []).append(returned.event_id)
+    event_ids = [ids_by_key[tuple(row[column.key] for column in key_columns)].pop() for row in rows]
+
+    unknown_emails = set()
+    participant_ids = set()
+    if group_id != 1:
+        user_ids = resolve_user_ids(email for event in events for email in event['attendees'])
+        participations = []
+        badge_deltas = {}
+        for event_id, event in zip(event_ids, events):
+            for email in dict.fromkeys(event['attendees']):
+                user_id = user_ids.get(email)
+                if user_id is None:
+                    unknown_emails.add(email)
+                    continue
+                invited = user_id != current_user.user_id
+                participations.append({
+                    'user_id': user_id,
+                    'event_id': event_id,
+                    'status': 'Pending' if invited else 'Accepted',
+                    'read_status': 'Unread' if invited else 'Read'
+                })
+                participant_ids.add(user_id)
+                if invited:
+                    pending, unread = badge_deltas.get(user_id, (0, 0))
+                    badge_deltas[user_id] = (pending + 1, unread + 1)
+        if participations:
+            db.session.execute(insert(Participate), participations)
+        bump_badge_deltas(badge_deltas)
+
+    log_event_changes(event_ids, 'Created')
+    if group_id == 1:
+        notify([current_user.user_id], 'calendar', group_id=1)
+    else:
+        notify(group_member_ids(group_id) + list(participant_ids), 'calendar', group_id=group_id)
+        notify(participant_ids - {current_user.user_id}, 'invites')
+    return unknown_emails
 
 @app.route('/')
 def base():
@@ -119,6 +702,20 @@ def user_profile():
                 user.name = form['name'].strip()
                 user.email = form['email'].strip()
                 user.password = generate_password_hash(str(form['password']))
+
+                # The name / email appear in the participant lists of the user's events
+                participated_events = db.session.scalars(
+                    select(Participate.event_id).where(Participate.user_id == user.user_id)
+                ).all()
+                db.session.execute(
+                    update(Event)
+                    .where(exists().where(
+                        Participate.event_id == Event.event_id,
+                        Participate.user_id == user.user_id
+                    ))
+                    .values(cache_number = Event.cache_number + 1)
+                )
+                log_event_changes(participated_events, 'Updated')
                 db.session.commit()
                 return jsonify(success=True), 200
             except:
@@ -141,6 +738,9 @@ def create_group():
             db.session.add(newGroup)
             db.session.flush()
 
+            # Group ids can be reused after a deletion
+            invalidate_permission(newGroup.group_id)
+
             db.session.add(Member(
                 user_id = current_user.user_id,
                 group_id = newGroup.group_id,
@@ -149,20 +749,22 @@ def create_group():
                 status = 'Accepted'
             ))
             
-            for i in range(len(group['members'])):
-                email = group['members'][i].strip().lower()
-                if email == current_user.email:
-                    continue
-                user = User.query.filter_by(email=email).first()
-                if user is None:
-                    invalid_emails.append(email)
-                    continue
-                newMember = Member(
-                    user_id = user.user_id,
-                    group_id = newGroup.group_id,
-                    permission = group['permissions'][i]
-                )
-                db.session.add(newMember)
+            # Resolve all the invited emails at once, the first permission given for an email wins
+            permissions = {}
+            for email, permission in zip(group['members'], group['permissions']):
+                permissions.setdefault(email.strip().lower(), permission)
+            permissions.pop(current_user.email, None)
+            user_ids = resolve_user_ids(permissions)
+            invalid_emails = [email for email in permissions if email not in user_ids]
+
+            if user_ids:
+                db.session.execute(insert(Member), [{
+                    'user_id': user_id,
+                    'group_id': newGroup.group_id,
+                    'permission': permissions[email]
+                } for email, user_id in user_ids.items()])
+                bump_badge_counts(user_ids.values(), pending=1, unread=1)
+                notify(user_ids.values(), 'invites')
             db.session.commit()
         except:
             db.session.rollback()
@@ -174,210 +776,462 @@ def create_group():
 @app.route('/get_pending_invites_count', methods=['GET'])
 @login_required
 def get_pending_invites_count():
-    group_invite_count = (
-        db.session.query(func.count(Member.member_id))
-        .join(Member.group)
-        .filter(
-            Member.user_id == current_user.user_id,
-            Member.status == 'Pending'
-        )
-        .scalar()
-    )
-
-    event_invite_count = (
-        db.session.query(func.count(Participate.participate_id))
-        .join(Participate.event)
-        .filter(
-            Participate.user_id == current_user.user_id,
-            Participate.status == 'Pending'
-        )
-        .scalar()
-    )
-
-    return jsonify(group_invite_count + event_invite_count) 
+    pending_invites, _ = load_badge_counts(current_user.user_id)
+    return jsonify(pending_invites) 
+
+# Responses an invite can get
+INVITE_RESPONSES = ('Accepted', 'Declined')
+
+# Apply the current user's responses to their invites with set-based statements: one
+# UPDATE (or DELETE, for declined groups) per chunk of invites given the same answer,
+# one cache_number bump and one change log insert for all the events concerned
+# responses is [(type, invite_id, status)], invite_id being the member_id or
+# participate_id listed by check_invites; other users' invites are ignored
+# Returns (invites answered, ids of the groups whose events changed)
+# Raises ValueError for an unknown invite type or status
+def respond_to_invites(responses):
+    user_id = current_user.user_id
+    # The last answer given to an invite wins
+    answers = {}
+    for type, invite_id, status in responses:
+        if type not in ('group', 'event') or status not in INVITE_RESPONSES:
+            raise ValueError(f'Invalid invite response {type} {status}')
+        answers[(type, int(invite_id))] = status
+    invite_ids = {}
+    for (type, invite_id), status in answers.items():
+        invite_ids.setdefault((type, status), []).append(invite_id)
+
+    answered = 0
+    pending = unread = 0
+    event_ids = []
+    for (type, status), ids in invite_ids.items():
+        for chunk in chunked(ids):
+            if type == 'group':
+                invites = db.session.execute(
+                    select(Member.member_id, Member.group_id, Member.status, Member.read_status)
+                    .where(Member.member_id.in_(chunk), Member.user_id == user_id)
+                ).all()
+                chunk = [invite.member_id for invite in invites]
+                if status == 'Declined':
+                    db.session.execute(
+                        delete(Member).where(Member.member_id.in_(chunk)),
+                        execution_options={'synchronize_session': False}
+                    )
+                else:
+                    db.session.execute(
+                        update(Member).where(Member.member_id.in_(chunk)).values(status = status, read_status = 'Read'),
+                        execution_options={'synchronize_session': False}
+                    )
+                for invite in invites:
+                    invalidate_permission(invite.group_id, user_id)
+                    if status == 'Declined':
+                        delta = invite_badge_delta(invite.status, invite.read_status, None, None)
+                    else:
+                        delta = invite_badge_delta(invite.status, invite.read_status, status, 'Read')
+                    pending += delta[0]
+                    unread += delta[1]
+            else:
+                invites = db.session.execute(
+                    select(Participate.participate_id, Participate.event_id, Participate.status, Participate.read_status)
+                    .where(Participate.participate_id.in_(chunk), Participate.user_id == user_id)
+                ).all()
+                chunk = [invite.participate_id for invite in invites]
+                db.session.execute(
+                    update(Participate).where(Participate.participate_id.in_(chunk)).values(status = status, read_status = 'Read'),
+                    execution_options={'synchronize_session': False}
+                )
+                for invite in invites:
+                    delta = invite_badge_delta(invite.status, invite.read_status, status, 'Read')
+                    pending += delta[0]
+                    unread += delta[1]
+                event_ids.extend(invite.event_id for invite in invites)
+            answered += len(invites)
+
+    bump_badge_counts([user_id], pending=pending, unread=unread)
+    if answered:
+        notify([user_id], 'invites')
+    if any(type == 'group' for type, _ in invite_ids):
+        notify([user_id], 'groups')
+
+    # The participant lists of the events changed
+    group_ids = set()
+    if event_ids:
+        bump_cache_numbers(event_ids)
+        log_event_changes(event_ids, 'Updated')
+        for chunk in chunked(event_ids):
+            group_ids.update(db.session.scalars(select(Event.group_id).where(Event.event_id.in_(chunk))))
+        members = {}
+        for chunk in chunked(list(group_ids)):
+            for member in db.session.execute(
+                select(Member.group_id, Member.user_id).where(Member.group_id.in_(chunk), Member.status == 'Accepted')
+            ):
+                members.setdefault(member.group_id, []).append(member.user_id)
+        for group_id in group_ids:
+            notify(members.get(group_id, []) + [user_id], 'calendar', group_id=group_id)
+    return answered, sorted(group_ids)
 
 # Group and Event Invites
+# GET returns a page of the pending invites, newest first, filtered by ?type=group|event,
+# ?group_id= and ?start=&end= (event invites overlapping that range); ?before=<cursor>
+# continues after the last page
 @app.route('/check_invites',methods=['GET','POST'])
 @login_required
 def check_invites():
     if request.method == 'GET':
-        group_invites = (
-            db.session.query(Member.member_id, Group.group_name, Group.description)
-            .join(Member.group)
-            .filter(
-                Member.user_id == current_user.user_id,
-                Member.status == 'Pending'
-            )
-            .order_by(Member.invite_time.desc())
-            .all()
-        )
-
-        group_invites_list = [{
-            'id': invite.member_id,
-            'type': 'group',
-            'name': invite.group_name,
-            'description': invite.description
-        } for invite in group_invites]
-
-        event_invites = (
-            db.session.query(
-                Participate.participate_id,
-                Event.event_name,
-                Event.description,
-                Event.start_time,
-                Event.end_time,
-                User.name,
-                Group.group_name
+        try:
+            invite_type = request.args.get('type')
+            if invite_type not in (None, '', 'group', 'event'):
+                raise ValueError(f'Unknown invite type {invite_type}')
+            group_id = request.args.get('group_id', type=int)
+            window = get_request_window()
+            before = request.args.get('before')
+            before = parse_notification_cursor(before) if before else None
+        except ValueError:
+            return jsonify({'error': 'Invalid filter or cursor'}), 400
+        limit = page_size()
+
+        # Event invites, first so that the union takes its column types from them
+        # Descriptions are left out, /invite_description loads one when it is opened
+        branches = []
+        if invite_type != 'group':
+            events = (
+                select(
+                    literal('event').label('type'),
+                    Participate.participate_id.label('row_id'),
+                    Participate.invite_time.label('invite_time'),
+                    Event.event_name.label('name'),
+                    Event.start_time.label('start_time'),
+                    Event.end_time.label('end_time'),
+                    Event.recurrence_rule.label('recurrence'),
+                    User.name.label('creator'),
+                    Group.group_name.label('group_name')
+                )
+                .join(Event, Event.event_id == Participate.event_id)
+                .join(User, User.user_id == Event.creator)
+                .join(Group, Group.group_id == Event.group_id)
+                .where(Participate.user_id == current_user.user_id, Participate.status == 'Pending')
             )
-            .join(Participate.event)
-            .join(Event.event_creator)
-            .join(Event.host_group)
-            .filter(
-                Participate.user_id == current_user.user_id,
-                Participate.status == 'Pending'
+            if group_id is not None:
+                events = events.where(Event.group_id == group_id)
+            events = filter_window(events, window)
+            if before:
+                events = events.where(notification_keyset(Participate.invite_time, Participate.participate_id, 'event', before, True))
+            branches.append(events)
+
+        # Group invites have no date, a date range only lists event invites
+        if invite_type != 'event' and window is None:
+            groups = (
+                select(
+                    literal('group').label('type'),
+                    Member.member_id.label('row_id'),
+                    Member.invite_time.label('invite_time'),
+                    Group.group_name.label('name'),
+                    null().label('start_time'),
+                    null().label('end_time'),
+                    null().label('recurrence'),
+                    null().label('creator'),
+                    Group.group_name.label('group_name')
+                )
+                .join(Group, Group.group_id == Member.group_id)
+                .where(Member.user_id == current_user.user_id, Member.status == 'Pending')
             )
-            .order_by(Participate.invite_time.desc())
-            .all()
-        )
-
-        event_invites_list = [{
-            'id': invite.participate_id,
-            'type': 'event',
-            'name': invite.event_name,
-            'description': invite.description,
-            'start_time': invite.start_time,
-            'end_time': invite.end_time,
-            'creator': invite.name,
-            'group': invite.group_name
-        } for invite in event_invites]
+            if group_id is not None:
+                groups = groups.where(Member.group_id == group_id)
+            if before:
+                groups = groups.where(notification_keyset(Member.invite_time, Member.member_id, 'group', before, True))
+            branches.append(groups)
+
+        # Newest first across both kinds, one row past the page tells if there is more
+        combined = union_all(*branches)
+        rows = count_rows(db.session.execute(
+            combined.order_by(
+                combined.selected_columns.invite_time.desc(),
+                combined.selected_columns.type.desc(),
+                combined.selected_columns.row_id.desc()
+            ).limit(limit + 1)
+        ).all())
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        invites = []
+        for row in rows:
+            invite = {
+                'id': row.row_id,
+                'type': row.type,
+                'name': row.name,
+                'invite_time': row.invite_time.isoformat()
+            }
+            if row.type == 'event':
+                invite.update({
+                    'start_time': isoformat_utc(row.start_time),
+                    'end_time': isoformat_utc(row.end_time),
+                    'recurrence': row.recurrence,
+                    'creator': row.creator,
+                    'group': row.group_name
+                })
+            invites.append(invite)
 
-        return jsonify(group_invites_list + event_invites_list)
+        pending_invites, _ = load_badge_counts(current_user.user_id)
+        return jsonify({
+            'invites': invites,
+            # Last invite, when older ones follow
+            'next_cursor': format_notification_cursor(rows[-1].invite_time, rows[-1].type, rows[-1].row_id) if more else None,
+            'pending': pending_invites
+        })
 
     else:
         response = request.get_json()
         try:
-            if response['invite_type'] == 'group':
-                invite = Member.query.filter_by(member_id=response['invite_id']).first()
-                if response['status'] == 'Declined':
-                    db.session.delete(invite)
-                else:
-                    invite.status = response['status']
-                    invite.read_status = 'Read'
-                group_id = 0
-            else:
-                invite = Participate.query.filter_by(participate_id=response['invite_id']).first()
-                group_id = invite.event.group_id
-                invite.status = response['status']
-                invite.read_status = 'Read'
-                db.session.execute(
-                    update(Event)
-                    .where(Event.event_id == invite.event_id)
-                    .values(cache_number = Event.cache_number + 1)
-                )
+            answered, group_ids = respond_to_invites([(response['invite_type'], response['invite_id'], response['status'])])
+            if not answered:
+                return jsonify({'error': 'Invite not found'}), 404
             db.session.commit()
         except:
             db.session.rollback()
             return jsonify({'error': "Unable to edit invite status"}), 500
-        return jsonify({'group_id':f'{group_id}'}), 200
+        return jsonify({'group_id':f'{group_ids[0] if group_ids else 0}'}), 200
+
+# Answer many invites at once
+# {'status': 'Accepted' | 'Declined', 'invites': [{'type': 'group' | 'event', 'id': ..., 'status': optional}]}
+@app.route('/respond_invites', methods=['POST'])
+@login_required
+def respond_invites():
+    data = request.get_json()
+    try:
+        responses = [
+            (invite['type'], invite['id'], invite.get('status', data.get('status')))
+            for invite in data['invites']
+        ]
+        answered, group_ids = respond_to_invites(responses)
+        db.session.commit()
+    except (KeyError, TypeError, ValueError):
+        db.session.rollback()
+        return jsonify({'error': 'Invalid invite responses'}), 400
+    except:
+        db.session.rollback()
+        return jsonify({'error': "Unable to edit invite status"}), 500
+    return jsonify({'answered': answered, 'group_ids': group_ids}), 200
+
+# Description of one of the user's invites, loaded when the invite is opened
+@app.route('/invite_description/<string:type>/<int:invite_id>')
+@login_required
+def invite_description(type, invite_id):
+    if type == 'group':
+        invite = db.session.execute(
+            select(Group.description)
+            .join(Member, Member.group_id == Group.group_id)
+            .where(Member.member_id == invite_id, Member.user_id == current_user.user_id)
+        ).first()
+    elif type == 'event':
+        invite = db.session.execute(
+            select(Event.description)
+            .join(Participate, Participate.event_id == Event.event_id)
+            .where(Participate.participate_id == invite_id, Participate.user_id == current_user.user_id)
+        ).first()
+    else:
+        return jsonify({'error': 'Unknown invite type'}), 400
+    if invite is None:
+        return jsonify({'error': 'Invite not found'}), 404
+    return jsonify({'description': invite.description or ''})
 
 # To get the number of unread notifications for the user
 @app.route('/get_unread_notifications_count', methods=['GET'])
 @login_required
 def get_unread_notifications_count():
-    # For groups
-    unread_groups = (
-        db.session.query(func.count(Member.member_id))
-        .join(Member.group)
-        .filter(
-            Member.user_id == current_user.user_id,
-            Member.read_status == 'Unread'
-        )
-        .scalar()
-    )
+    _, unread_notifications = load_badge_counts(current_user.user_id)
+    return jsonify(unread_notifications)
 
-    # For events
-    unread_events = (
-        db.session.query(func.count(Participate.participate_id))
-        .join(Participate.event)
-        .filter(
-            Participate.user_id == current_user.user_id,
-            Participate.read_status == 'Unread'
-        )
-        .scalar()
-    )
+# To get both badge counts (pending invites and unread notifications) of the user at once
+@app.route('/get_badge_counts', methods=['GET'])
+@login_required
+def get_badge_counts():
+    pending_invites, unread_notifications = load_badge_counts(current_user.user_id)
+    return jsonify({
+        'pending_invites': pending_invites,
+        'unread_notifications': unread_notifications
+    })
 
-    return jsonify(unread_groups + unread_events)
+# Notifications and invites are ordered newest first by (invite_time, type, row id);
+# a cursor is that key as text, e.g. 2025-04-01T10:00:00.000000Z_group_17 (row ids are member_id
+# and participate_id, the tie-break within one invite time)
+NOTIFICATION_TYPES = ('event', 'group')
+
+def format_notification_cursor(invite_time, type, row_id):
+    return f"{invite_time.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}_{type}_{row_id}"
+
+# Raises ValueError on a malformed cursor
+def parse_notification_cursor(cursor):
+    invite_time, type, row_id = cursor.rsplit('_', 2)
+    if type not in NOTIFICATION_TYPES:
+        raise ValueError(f'Unknown notification type {type}')
+    return datetime.fromisoformat(invite_time.replace('Z', '+00:00')), type, int(row_id)
+
+# Rows of one notification source (type) ordered before (older) or after (newer)
+# the cursor. invite_time stays a plain range so the (user_id, read_status,
+# invite_time) indexes bound the scan, ties are settled by type then row id
+def notification_keyset(invite_time, row_id, type, cursor, older):
+    cursor_time, cursor_type, cursor_row_id = cursor
+    if older:
+        if type < cursor_type:
+            return invite_time <= cursor_time
+        if type > cursor_type:
+            return invite_time < cursor_time
+        return and_(invite_time <= cursor_time, or_(invite_time < cursor_time, row_id < cursor_row_id))
+    if type > cursor_type:
+        return invite_time >= cursor_time
+    if type < cursor_type:
+        return invite_time > cursor_time
+    return and_(invite_time >= cursor_time, or_(invite_time > cursor_time, row_id > cursor_row_id))
+
+# Page size asked for with ?limit=, within MAX_PAGE_SIZE
+def page_size():
+    limit = request.args.get('limit', type=int) or app.config['PAGE_SIZE']
+    return max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+# Mark notifications of the current user read with one UPDATE per source (and chunk):
+# the listed (type, id) pairs, id being the group or event id as listed by
+# get_notifications, or with everything=True all of them up to and including the
+# cursor `until`. Returns the number marked
+def mark_notifications_read(items=(), everything=False, until=None):
+    user_id = current_user.user_id
+    sources = (
+        ('group', Member, Member.group_id, Member.member_id),
+        ('event', Participate, Participate.event_id, Participate.participate_id)
+    )
+    marked = 0
+    for type, table, id_column, row_id_column in sources:
+        conditions = [table.user_id == user_id, table.read_status == 'Unread']
+        if everything:
+            conditions.append(~notification_keyset(table.invite_time, row_id_column, type, until, older=False))
+            chunks = [None]
+        else:
+            chunks = list(chunked([id for item_type, id in items if item_type == type]))
+        for chunk in chunks:
+            statement = update(table).where(*conditions).values(read_status = 'Read')
+            if chunk is not None:
+                statement = statement.where(id_column.in_(chunk))
+            marked += db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+    bump_badge_counts([user_id], unread=-marked)
+    return marked
 
 # To get the notifications for the user
+# GET returns a page of the unread group and event invites, newest first:
+#   ?before=<cursor> continues after the last page (older items)
+#   ?since=<cursor> only returns items newer than an earlier first item
+# Times are raw ISO 8601, the page renders them relative to its own clock
 @app.route('/get_notifications', methods=['GET', 'POST'])
 @login_required
 # Get the unread events and groups for the current user
 def get_notifications():
     if (request.method == 'GET'):
+        try:
+            before = request.args.get('before')
+            before = parse_notification_cursor(before) if before else None
+            since = request.args.get('since')
+            since = parse_notification_cursor(since) if since else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        limit = page_size()
+
         # For groups
-        events1 = (
-            db.session.query(Group.group_id, Group.group_name, Member.invite_time)
-            .join(Member.group)
-            .filter(
-                Member.read_status == 'Unread',
-                Member.user_id == current_user.user_id
+        groups = (
+            select(
+                literal('group').label('type'),
+                Member.member_id.label('row_id'),
+                Member.group_id.label('id'),
+                Group.group_name.label('name'),
+                Member.invite_time.label('invite_time')
             )
-            .order_by(Member.invite_time.desc())
-            .all()
+            .join(Group, Group.group_id == Member.group_id)
+            .where(Member.user_id == current_user.user_id, Member.read_status == 'Unread')
         )
 
         # For events
-        events2 = (
-            db.session.query(Participate.event_id, Event.event_name, Participate.invite_time)
-            .join(Participate.event)
-            .filter(
-                Participate.read_status == 'Unread',
-                Participate.user_id == current_user.user_id
+        events = (
+            select(
+                literal('event').label('type'),
+                Participate.participate_id.label('row_id'),
+                Participate.event_id.label('id'),
+                Event.event_name.label('name'),
+                Participate.invite_time.label('invite_time')
             )
-            .order_by(Participate.invite_time.desc())
-            .all()
+            .join(Event, Event.event_id == Participate.event_id)
+            .where(Participate.user_id == current_user.user_id, Participate.read_status == 'Unread')
         )
 
-        # Combine the two lists of events and sort them by invite_time in descending order
-        events = sorted(events1 + events2, key=lambda x: x.invite_time, reverse=True)
-
-        # Create a list of dictionaries to store the event details
-        # Take care of event and group names
-        events_list = []
-        for event in events:
-            if hasattr(event, 'group_name'):
-                events_list.append({
-                    'id': event.group_id,
-                    'name': event.group_name,
-                    'passed_time': human_readable_delta(event.invite_time),
-                    'type': 'group'
-                })
-            else:
-                events_list.append({
-                    'id': event.event_id,
-                    'name': event.event_name,
-                    'passed_time': human_readable_delta(event.invite_time),
-                    'type': 'event'
-                })
-
-        return jsonify(events_list)
+        for cursor, older in ((before, True), (since, False)):
+            if cursor:
+                groups = groups.where(notification_keyset(Member.invite_time, Member.member_id, 'group', cursor, older))
+                events = events.where(notification_keyset(Participate.invite_time, Participate.participate_id, 'event', cursor, older))
+
+        # Both sources merged and cut in SQL, one row past the page tells if there is more
+        combined = union_all(groups, events)
+        rows = count_rows(db.session.execute(
+            combined.order_by(
+                combined.selected_columns.invite_time.desc(),
+                combined.selected_columns.type.desc(),
+                combined.selected_columns.row_id.desc()
+            ).limit(limit + 1)
+        ).all())
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        cursors = [format_notification_cursor(row.invite_time, row.type, row.row_id) for row in rows]
+        _, unread_notifications = load_badge_counts(current_user.user_id)
+        return jsonify({
+            'notifications': [{
+                'id': row.id,
+                'name': row.name,
+                'type': row.type,
+                'invite_time': row.invite_time.isoformat()
+            } for row in rows],
+            # First item, to ask for newer ones later (the request's own when nothing is newer)
+            'newest_cursor': cursors[0] if cursors else request.args.get('since'),
+            # Last item, when older ones follow
+            'next_cursor': cursors[-1] if more else None,
+            'unread': unread_notifications
+        })
 
     else:
         response = request.get_json()
 
         # Mark the notification as read
         try:
-            if response['type'] == 'group':
-                notification = Member.query.filter_by(group_id=response['id'], user_id=current_user.user_id).first()
-            else:
-                notification = Participate.query.filter_by(event_id=response['id'], user_id=current_user.user_id).first()
-            notification.read_status = 'Read'
+            mark_notifications_read([(response['type'], int(response['id']))])
             db.session.commit()
             return jsonify(success=True), 200
         except:
             db.session.rollback()
             return jsonify({'error': "Unable to edit read status"}), 500
 
+# Mark many notifications read at once
+# {'notifications': [{'type': 'group' | 'event', 'id': ...}]}, or {'all': true} with
+# 'until': <cursor>, the newest_cursor of get_notifications: only the notifications
+# the user was shown are marked, the ones that arrived after the list was loaded
+# stay unread
+@app.route('/read_notifications', methods=['POST'])
+@login_required
+def read_notifications():
+    data = request.get_json()
+    try:
+        everything = bool(data.get('all'))
+        until = data.get('until')
+        until = parse_notification_cursor(until) if until else None
+        if everything and until is None:
+            raise ValueError('Marking all notifications read needs the newest one shown')
+        items = [(item['type'], int(item['id'])) for item in data.get('notifications', [])]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Invalid notifications'}), 400
+
+    try:
+        marked = mark_notifications_read(items, everything=everything, until=until)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        return jsonify({'error': "Unable to edit read status"}), 500
+    _, unread_notifications = load_badge_counts(current_user.user_id)
+    return jsonify({'marked': marked, 'unread': unread_notifications}), 200
+
 # To get the groups for group-select
 @app.route('/get_groups')
 @login_required
@@ -420,535 +1274,286 @@ def get_calendar():
 # To get the events for the group or individual
 @app.route('/data/<int:group_id>')
 @login_required
-def return_data(group_id):
-    if group_id == 1:
-        # To see whether a Group 1 exits (to validate foreign key)
-        group = Group.query.filter_by(group_id=1).first()
-        
-        if group is None:
-            newGroup = Group(
-                group_name = 'No Group',
-                description = 'No Description'
-            )
-            
-            try:
-                db.session.add(newGroup)
-                db.session.commit()
-            except:
-                db.session.rollback()
-                return jsonify({'error': "Unable to add group 1 to the database"}), 500
-        
-        # Get all the events from the database created by current user
-        events_data = []
-        for event in current_user.created_events:
-            local_start_time = event.start_time.astimezone()
-            local_end_time = event.end_time.astimezone()
-            if event.start_time.tzinfo is None:
-                local_start_time = event.start_time.replace(tzinfo=timezone.utc)
-                local_start_time = local_start_time.astimezone()
-            if event.end_time.tzinfo is None:
-                local_end_time = event.end_time.replace(tzinfo=timezone.utc)
-                local_end_time = local_end_time.astimezone()
-            
-            if event.group_id == 1:
-                events_data.append({
-                'event_id': event.event_id,
-                'title': event.event_name,
-                'description': event.description,
-                'start': local_start_time.isoformat(), 
-                'end': local_end_time.isoformat(),
-                'event_type': 'individual',
-                'is_pending_for_current_user': False,
-                'event_edit_permission': 'Admin',
-                'version': event.version_number,
-                'cache_number': event.cache_number
-            })
-            
-        group_events = (
-            db.session.query(Event)
-            .join(Event.participations)
-            .filter(Participate.user_id == current_user.user_id)
-            .filter(Participate.status != 'Declined')
-            .all()
-        )
-        for event in group_events:
-            users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(Participate.event_id == event.event_id)
-                .all()
-            )
-            
-            accepted_users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(
-                    Participate.event_id == event.event_id,
-                    Participate.status == 'Accepted'
-                )
-                .all()
-            )
-            
-            pending_users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(
-                    Participate.event_id == event.event_id,
-                    Participate.status == 'Pending'
-                )
-                .all()
-            )
-            
-            declined_users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(
-                    Participate.event_id == event.event_id,
-                    Participate.status == 'Declined'
+@group_permission_required(personal=True)
+def return_data(group_id, permission):
+    try:
+        window = get_request_window()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    # Changes after this point are picked up by the next /updates call
+    cursor = current_change_cursor()
+
+    if group_id == 1 and not ensure_personal_group():
+        return jsonify({'error': "Unable to add group 1 to the database"}), 500
+
+    # The events are serialised batch by batch while the response is sent
+    def event_batches():
+        if group_id == 1:
+            # Get all the individual events from the database created by current user
+            for individual_events in feed_batches(filter_window(individual_feed_query(), window)):
+                yield expand_recurring(
+                    individual_events, [serialize_individual_event(event) for event in individual_events], window
                 )
-                .all()
-            )
-            
-            # Get participants for this event
-            participants = [{
-                'name': participant.name,
-                'email': participant.email
-                # Add other participant fields as needed
-            } for participant in users]
-            
-            accepted_participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in accepted_users]
-            
-            pending_participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in pending_users]
-            
-            declined_participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in declined_users]
-            
-            is_pending = any(
-                participant['email'] == current_user.email 
-                for participant in pending_participants
-            )
+                
+            for group_events in feed_batches(filter_window(participated_feed_query(), window)):
+                yield expand_recurring(group_events, serialize_group_events(group_events, 'Viewer', 'group'), window)
+        else:
+            # Get all the events for the group
+            for events in feed_batches(filter_window(group_feed_query(group_id), window)):
+                yield expand_recurring(events, serialize_group_events(events, permission), window)
+
+    response = streaming_json_response(event_batches())
+    response.headers['X-Change-Cursor'] = str(cursor)
+    return response
+
+# To get the updated / new / deleted events for the group or individual since the client's cursor
+# {'reload': true} when the change log cannot bring that cursor up to date, the client
+# then reloads the whole feed (see change_cursor_expired)
+@app.route('/data/<int:group_id>/updates')
+@login_required
+@group_permission_required(personal=True)
+def return_update_data(group_id, permission):
+    try:
+        window = get_request_window()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
 
-            local_start_time = event.start_time.astimezone()
-            local_end_time = event.end_time.astimezone()
-            if event.start_time.tzinfo is None:
-                local_start_time = event.start_time.replace(tzinfo=timezone.utc)
-                local_start_time = local_start_time.astimezone()
-            if event.end_time.tzinfo is None:
-                local_end_time = event.end_time.replace(tzinfo=timezone.utc)
-                local_end_time = local_end_time.astimezone()
-
-            events_data.append({
-                'event_id': event.event_id,
-                'title': event.event_name,
-                'description': event.description,
-                'start': local_start_time.isoformat(), 
-                'end': local_end_time.isoformat(),
-                'event_type': 'group',
-                'participants': participants,
-                'accepted_participants': accepted_participants,
-                'pending_participants':pending_participants,
-                'declined_participants':declined_participants,
-                'is_pending_for_current_user': is_pending,
-                'event_edit_permission': 'Viewer',
-                'version': event.version_number,
-                'cache_number': event.cache_number
-            })
-            
-    else:
-        # Get all the events for the group
-        group = Group.query.filter_by(group_id=group_id).first()
-        if not group:
-            return jsonify({'error': 'Group not found'}), 404
-    
-        mem = Member.query.filter_by(user_id=current_user.user_id, group_id=group_id).first()
-        if not mem:
-            return jsonify({'error': 'Access denied'}), 403
-        permission = mem.permission
+    cursor = request.args.get('cursor', type=int)
+    if cursor is None:
+        return jsonify({'error': 'Missing cursor'}), 400
+    if change_cursor_expired(cursor):
+        return jsonify({'reload': True})
 
-        events = group.events
-        events_data = []
-        for event in events:
-            users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(Participate.event_id == event.event_id)
-                .all()
-            )
-            
-            accepted_users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(
-                    Participate.event_id == event.event_id,
-                    Participate.status == 'Accepted'
-                )
-                .all()
-            )
-            
-            pending_users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(
-                    Participate.event_id == event.event_id,
-                    Participate.status == 'Pending'
-                )
-                .all()
-            )
-            
-            declined_users = (
-                db.session.query(User.name, User.email)
-                .join(User.participations)
-                .filter(
-                    Participate.event_id == event.event_id,
-                    Participate.status == 'Declined'
-                )
-                .all()
-            )
-            
-            # Get participants for this event
-            participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in users]
-            
-            accepted_participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in accepted_users]
-            
-            pending_participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in pending_users]
-            
-            declined_participants = [{
-                'name': participant.name,
-                'email': participant.email
-            } for participant in declined_users]
-            
-            is_pending = any(
-                participant['email'] == current_user.email 
-                for participant in pending_participants
-            )
+    if group_id == 1:
+        # Changes logged for the personal feed of the current user
+        changes = ChangeLog.query.filter(ChangeLog.user_id == current_user.user_id)
+    else:
+        # Changes logged for the group feed
+        changes = ChangeLog.query.filter(ChangeLog.group_id == group_id, ChangeLog.user_id.is_(None))
+
+    # Includes the replay window before the cursor (see change_replay_floor)
+    changes = count_rows(
+        changes.with_entities(ChangeLog.change_id, ChangeLog.event_id)
+        .filter(ChangeLog.change_id > change_replay_floor(cursor))
+        .order_by(ChangeLog.change_id)
+        .all()
+    )
+    if not changes:
+        return jsonify({'updated_events': [], 'deleted_events': [], 'cursor': cursor})
+
+    changed_event_ids = list(dict.fromkeys(change.event_id for change in changes))
+
+    events_data = [] # To store new and updated events
+    for chunk in chunked(changed_event_ids):
+        if group_id == 1:
+            individual_events = count_rows(db.session.execute(
+                filter_window(individual_feed_query().where(Event.event_id.in_(chunk)), window)
+            ).all())
+            events_data.extend(expand_recurring(
+                individual_events, [serialize_individual_event(event) for event in individual_events], window
+            ))
 
-            local_start_time = event.start_time.astimezone()
-            local_end_time = event.end_time.astimezone()
-            if event.start_time.tzinfo is None:
-                local_start_time = event.start_time.replace(tzinfo=timezone.utc)
-                local_start_time = local_start_time.astimezone()
-            if event.end_time.tzinfo is None:
-                local_end_time = event.end_time.replace(tzinfo=timezone.utc)
-                local_end_time = local_end_time.astimezone()
-
-            events_data.append({
-                'event_id': event.event_id,
-                'title': event.event_name,
-                'description': event.description,
-                'start': local_start_time.isoformat(), 
-                'end': local_end_time.isoformat(),
-                'participants': participants,
-                'accepted_participants': accepted_participants,
-                'pending_participants': pending_participants,
-                'declined_participants': declined_participants,
-                'is_pending_for_current_user': is_pending,
-                'event_edit_permission': permission,
-                'version': event.version_number,
-                'cache_number':event.cache_number
-            })
-    return jsonify(events_data)
+            group_events = count_rows(db.session.execute(
+                filter_window(participated_feed_query().where(Event.event_id.in_(chunk)), window)
+            ).all())
+            events_data.extend(expand_recurring(group_events, serialize_group_events(group_events, 'Viewer', 'group'), window))
+        else:
+            events = count_rows(db.session.execute(
+                filter_window(group_feed_query(group_id).where(Event.event_id.in_(chunk)), window)
+            ).all())
+            events_data.extend(expand_recurring(events, serialize_group_events(events, permission), window))
+
+    # Changed events that are gone or no longer visible to this feed / window
+    present_event_ids = {event['event_id'] for event in events_data}
+    deleted_events = [event_id for event_id in changed_event_ids if event_id not in present_event_ids]
+    
+    return jsonify({
+        'updated_events': events_data,
+        'deleted_events': deleted_events,
+        'cursor': max(changes[-1].change_id, cursor)
+    })
 
-# To get the updated / new events for the group or individual
-@app.route('/data/<int:group_id>/updates', methods=['POST'])
+# To get the free / busy times of the members of a group (of the current user for group 1)
+# within ?start&end: their merged busy intervals and the free slots of at least
+# ?duration minutes. With ?proposed_start&proposed_end it also lists the members
+# already busy then (?exclude_event=<id> ignores the event being edited)
+# ?email=... (repeatable) restricts it to some of the members
+@app.route('/freebusy/<int:group_id>')
 @login_required
-def return_update_data(group_id):
-    versionMap = request.get_json()
-    
-    cached_events = []
-    for element in versionMap['events']:
-        cached_events.append(element['event_id'])
-    version_map = {item['event_id']: item['cache_number'] for item in versionMap['events']}
-     
+@group_permission_required(personal=True)
+def get_free_busy(group_id, permission):
+    try:
+        window = get_request_window()
+        if window is None:
+            raise ValueError('Missing date range')
+        proposed_start = request.args.get('proposed_start')
+        proposed_end = request.args.get('proposed_end')
+        proposed = None
+        if proposed_start or proposed_end:
+            proposed = (parse_utc_datetime(proposed_start or ''), parse_utc_datetime(proposed_end or ''))
+            if proposed[0] >= proposed[1]:
+                raise ValueError('End must be after start')
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    duration = request.args.get('duration', 30, type=int)
+    if duration is None or duration <= 0:
+        return jsonify({'error': 'Invalid duration'}), 400
+    exclude_event_id = request.args.get('exclude_event', type=int)
+
     if group_id == 1:
-        # Get all the events from the database created by current user
-        events_data = []
-        
-        # Get event_id of all the events that are deleted but still available in cache
-        deleted_events = []
-        
-        # Events that are currently have current user as participantion or individual
-        current_user_events = []
-    
-        for event in current_user.created_events:
-            if event.group_id == 1:
-                current_user_events.append(event.event_id)
-        
-        for event in current_user.created_events:
-            local_start_time = event.start_time.astimezone()
-            local_end_time = event.end_time.astimezone()
-            if event.start_time.tzinfo is None:
-                local_start_time = event.start_time.replace(tzinfo=timezone.utc)
-                local_start_time = local_start_time.astimezone()
-            if event.end_time.tzinfo is None:
-                local_end_time = event.end_time.replace(tzinfo=timezone.utc)
-                local_end_time = local_end_time.astimezone()
-            
-            if event.group_id == 1 and (event.event_id not in cached_events or version_map[event.event_id] < event.cache_number):
-                events_data.append({
-                'event_id': event.event_id,
-                'title': event.event_name,
-                'description': event.description,
-                'start': local_start_time.isoformat(), 
-                'end': local_end_time.isoformat(),
-                'event_type': 'individual',
-                'is_pending_for_current_user': False,
-                'event_edit_permission': 'Admin',
-                'version': event.version_number,
-                'cache_number':event.cache_number
-            })
-            
-        group_events = (
-            db.session.query(Event)
-            .join(Participate, Event.event_id == Participate.event_id)
-            .filter(Participate.user_id == current_user.user_id)
+        users = {current_user.email: current_user.user_id}
+    else:
+        users = dict(
+            db.session.query(User.email, User.user_id)
+            .join(User.memberships)
+            .filter(Member.group_id == group_id, Member.status == 'Accepted')
             .all()
         )
-        
-        for event in group_events:
-            current_user_events.append(event.event_id)
-            
-        for event in group_events:
-            if (event.event_id not in cached_events or version_map[event.event_id] < event.cache_number):
-                users = (
-                    db.session.query()
-                    .select_from(User)
-                    .join(Participate, User.user_id == Participate.user_id)
-                    .filter(Participate.event_id == event.event_id)
-                    .add_columns(User.name,User.email)
-                    .all()
-                )
-                
-                accepted_users = (
-                    db.session.query()
-                    .select_from(User)
-                    .join(Participate, User.user_id == Participate.user_id)
-                    .filter(Participate.event_id == event.event_id, Participate.status == 'Accepted')
-                    .add_columns(User.name,User.email)
-                    .all()
-                )
-                
-                pending_users = (
-                    db.session.query()
-                    .select_from(User)
-                    .join(Participate, User.user_id == Participate.user_id)
-                    .filter(Participate.event_id == event.event_id, Participate.status == 'Pending')
-                    .add_columns(User.name,User.email)
-                    .all()
-                )
-                
-                declined_users = (
-                    db.session.query()
-                    .select_from(User)
-                    .join(Participate, User.user_id == Participate.user_id)
-                    .filter(Participate.event_id == event.event_id, Participate.status == 'Declined')
-                    .add_columns(User.name,User.email)
-                    .all()
-                )
-                
-                # Get participants for this event
-                participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                    # Add other participant fields as needed
-                } for participant in users]
-                
-                accepted_participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                } for participant in accepted_users]
-                
-                pending_participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                } for participant in pending_users]
-                
-                declined_participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                } for participant in declined_users]
-                
-                is_pending = any(
-                    participant['email'] == current_user.email 
-                    for participant in pending_participants
-                )
+    # Emails that are not (accepted) members are left out and reported back
+    invalid_emails = []
+    emails = [email.strip().lower() for email in request.args.getlist('email')]
+    if emails:
+        invalid_emails = [email for email in emails if email not in users]
+        users = {email: users[email] for email in emails if email in users}
+
+    # The busy intervals of the proposed time are needed even outside the window
+    load_window = window
+    if proposed:
+        load_window = (min(window[0], proposed[0]), max(window[1], proposed[1]))
+    busy_by_user = load_busy_intervals(users.values(), load_window, exclude_event_id)
+
+    window_start, window_end = window
+    busy = [
+        (max(start, window_start), min(end, window_end))
+        for start, end in merge_intervals(
+            interval for intervals in busy_by_user.values() for interval in intervals
+        )
+        if start < window_end and end > window_start
+    ]
+    free = free_slots(busy, window_start, window_end, timedelta(minutes=duration))
+
+    conflicts = []
+    if proposed:
+        emails_by_id = {user_id: email for email, user_id in users.items()}
+        for user_id, intervals in find_conflicts(busy_by_user, *proposed).items():
+            conflicts.append({
+                'email': emails_by_id[user_id],
+                'busy': [{'start': isoformat_utc(start), 'end': isoformat_utc(end)} for start, end in intervals]
+            })
+        conflicts.sort(key=lambda conflict: conflict['email'])
 
-                local_start_time = event.start_time.astimezone()
-                local_end_time = event.end_time.astimezone()
-                if event.start_time.tzinfo is None:
-                    local_start_time = event.start_time.replace(tzinfo=timezone.utc)
-                    local_start_time = local_start_time.astimezone()
-                if event.end_time.tzinfo is None:
-                    local_end_time = event.end_time.replace(tzinfo=timezone.utc)
-                    local_end_time = local_end_time.astimezone()
-
-                events_data.append({
-                    'event_id': event.event_id,
-                    'title': event.event_name,
-                    'description': event.description,
-                    'start': local_start_time.isoformat(), 
-                    'end': local_end_time.isoformat(),
-                    'event_type': 'group',
-                    'participants': participants,
-                    'accepted_participants': accepted_participants,
-                    'pending_participants':pending_participants,
-                    'declined_participants':declined_participants,
-                    'is_pending_for_current_user': is_pending,
-                    'event_edit_permission': 'Viewer',
-                    'version': event.version_number,
-                    'cache_number':event.cache_number
-                })
-      
-        for cached_event_id in cached_events:
-            if cached_event_id not in current_user_events:
-                deleted_events.append(cached_event_id)
-                      
+    return jsonify({
+        'busy': [{'start': isoformat_utc(start), 'end': isoformat_utc(end)} for start, end in busy],
+        'free': [{'start': isoformat_utc(start), 'end': isoformat_utc(end)} for start, end in free],
+        'conflicts': conflicts,
+        'emails': invalid_emails
+    })
+
+# To import the events of an iCalendar (.ics) file into the group (the user's own
+# calendar for group 1), sent as the 'file' of a form or as the request body
+# The file is parsed as a stream and its events are inserted IMPORT_BATCH_SIZE at a
+# time, each batch in its own transaction, so a large import neither holds the
+# database lock for long nor keeps the whole file in memory. The response streams
+# one JSON line of progress per batch and a final summary with the skipped events
+@app.route('/import_events/<int:group_id>', methods=['POST'])
+@login_required
+@group_permission_required('Editor', personal=True)
+def import_events(group_id, permission):
+    if group_id == 1 and not ensure_personal_group():
+        return jsonify({'error': "Unable to add group 1 to the database"}), 500
+
+    upload = request.files.get('file')
+    source = upload.stream if upload is not None else request.stream
+    stream = io.TextIOWrapper(source, encoding='utf-8-sig', errors='replace')
+    batch_size = app.config['IMPORT_BATCH_SIZE']
+
+    def progress():
+        imported = 0
+        skipped = []
+        unknown_emails = set()
+        batch = []
+
+        def flush():
+            unknown_emails.update(insert_imported_events(group_id, batch))
+            db.session.commit()
+            return len(batch)
+
+        # Exception rather than a bare except: the generator must still be closable
+        # when the client goes away (GeneratorExit)
+        try:
+            for line_number, properties in parse_events(stream):
+                try:
+                    batch.append(event_from_properties(properties))
+                except ValueError as error:
+                    skipped.append({'line': line_number, 'error': str(error)})
+                    continue
+                if len(batch) >= batch_size:
+                    imported += flush()
+                    batch = []
+                    yield json.dumps({'imported': imported, 'skipped': len(skipped)}) + '\n'
+            if batch:
+                imported += flush()
+        except Exception:
+            db.session.rollback()
+            yield json.dumps({
+                'error': 'Unable to import the remaining events',
+                'imported': imported,
+                'skipped': len(skipped)
+            }) + '\n'
+            return
+
+        yield json.dumps({
+            'done': True,
+            'imported': imported,
+            'skipped': len(skipped),
+            'skipped_events': skipped[:100],
+            'unknown_attendees': sorted(unknown_emails)[:100]
+        }) + '\n'
+
+    return streaming_response(progress(), 'application/x-ndjson')
+
+# To export the events of the group (the user's dashboard for group 1) as an
+# iCalendar (.ics) file, streamed one batch of events at a time
+# ?start&end restricts it to the events overlapping that range
+@app.route('/export_events/<int:group_id>')
+@login_required
+@group_permission_required(personal=True)
+def export_events(group_id, permission):
+    try:
+        window = get_request_window()
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    if group_id == 1:
+        calendar_name = f'{current_user.name} - Dashboard'
+        queries = [(individual_feed_query(), False), (participated_feed_query(), True)]
     else:
-        # Get all the events for the group
-        group = Group.query.filter_by(group_id=group_id).first()
-        if not group:
-            return jsonify({'error': 'Group not found'}), 404
-        
-        mem = Member.query.filter_by(user_id=current_user.user_id, group_id=group_id).first()
-        if not mem:
-            return jsonify({'error': 'Access denied'}), 403
-        permission = mem.permission
-        
-        events = group.events
-    
-        events_data = [] # To store new and updated events
-        deleted_events = [] # To store events that are deleted but still present in the cache
-        
-        for cached_event_id in cached_events:
-            present = 0
-            for event in events:
-                if cached_event_id == event.event_id:
-                    present = 1
-                    break
-            if present == 0:
-                deleted_events.append(cached_event_id)
-                
-        for event in events:
-            if (event.event_id not in cached_events or version_map[event.event_id] < event.cache_number):
-                users = (
-                    db.session.query(User.name, User.email)
-                    .join(User.participations)
-                    .filter(Participate.event_id == event.event_id)
-                    .all()
-                )
-                
-                accepted_users = (
-                    db.session.query(User.name, User.email)
-                    .join(User.participations)
-                    .filter(
-                        Participate.event_id == event.event_id,
-                        Participate.status == 'Accepted'
-                    )
-                    .all()
-                )
-                
-                pending_users = (
-                    db.session.query(User.name, User.email)
-                    .join(User.participations)
-                    .filter(
-                        Participate.event_id == event.event_id,
-                        Participate.status == 'Pending'
-                    )
-                    .all()
-                )
-                
-                declined_users = (
-                    db.session.query(User.name, User.email)
-                    .join(User.participations)
-                    .filter(
-                        Participate.event_id == event.event_id,
-                        Participate.status == 'Declined'
-                    )
-                    .all()
-                )
-                
-                # Get participants for this event
-                participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                    # Add other participant fields as needed
-                } for participant in users]
-                
-                accepted_participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                } for participant in accepted_users]
-                
-                pending_participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                } for participant in pending_users]
-                
-                declined_participants = [{
-                    'name': participant.name,
-                    'email': participant.email
-                } for participant in declined_users]
-                
-                is_pending = any(
-                    participant['email'] == current_user.email 
-                    for participant in pending_participants
+        calendar_name = db.session.get(Group, group_id).group_name
+        queries = [(group_feed_query(group_id), True)]
+    host = request.host.split(':')[0]
+    stamp = format_ics_datetime(datetime.now(timezone.utc))
+
+    def chunks():
+        yield calendar_header(calendar_name)
+        for query, with_participants in queries:
+            for rows in feed_batches(filter_window(query, window)):
+                participants = load_participants([row.event_id for row in rows]) if with_participants else {}
+                yield ''.join(
+                    event_component(row, participants.get(row.event_id), host, stamp) for row in rows
                 )
+        yield calendar_footer()
 
-                local_start_time = event.start_time.astimezone()
-                local_end_time = event.end_time.astimezone()
-                if event.start_time.tzinfo is None:
-                    local_start_time = event.start_time.replace(tzinfo=timezone.utc)
-                    local_start_time = local_start_time.astimezone()
-                if event.end_time.tzinfo is None:
-                    local_end_time = event.end_time.replace(tzinfo=timezone.utc)
-                    local_end_time = local_end_time.astimezone()
-
-                events_data.append({
-                    'event_id': event.event_id,
-                    'title': event.event_name,
-                    'description': event.description,
-                    'start': local_start_time.isoformat(), 
-                    'end': local_end_time.isoformat(),
-                    'participants': participants,
-                    'accepted_participants': accepted_participants,
-                    'pending_participants': pending_participants,
-                    'declined_participants': declined_participants,
-                    'is_pending_for_current_user': is_pending,
-                    'event_edit_permission': permission,
-                    'version': event.version_number,
-                    'cache_number':event.cache_number
-                })
-    
-    return jsonify({
-        'updated_events': events_data,
-        'deleted_events': deleted_events
-    })
+    response = streaming_response(chunks(), 'text/calendar')
+    response.headers['Content-Disposition'] = f'attachment; filename="calendar-{group_id}.ics"'
+    return response
 
 # To get the members of the group
 @app.route('/members/<int:group_id>')
 @login_required
-def get_members(group_id):
-    if group_id != 1:
-        mem = Member.query.filter_by(user_id=current_user.user_id, group_id=group_id).first()
-        if not mem:
-            return jsonify({'error': 'Access denied'}), 403
-    
+@group_permission_required(personal=True)
+def get_members(group_id, permission):
     members = (
         db.session.query(User.name, User.email)
         .join(User.memberships)
@@ -968,15 +1573,11 @@ def get_members(group_id):
 # To get, delete or update the group info
 @app.route('/group_info/<int:group_id>', methods=['GET','DELETE','PUT'])
 @login_required
-def get_info(group_id):
+@group_permission_required()
+def get_info(group_id, permission):
     group = Group.query.filter_by(group_id=group_id).first()
     if not group:
         return jsonify({'error': 'Group not found'}), 404
-    if group_id != 1:
-        mem = Member.query.filter_by(user_id=current_user.user_id, group_id=group_id).first()
-        if not mem:
-            return jsonify({'error': 'Access denied'}), 403
-        permission = mem.permission
 
     if request.method == 'GET':
         members = (
@@ -1004,6 +1605,19 @@ def get_info(group_id):
         if permission != 'Admin':
             return jsonify({'error': 'Access denied'}), 403
         try:
+            group_event_ids = db.session.scalars(
+                select(Event.event_id).where(Event.group_id == group_id)
+            ).all()
+            log_event_changes(group_event_ids, 'Deleted')
+            all_member_ids = db.session.scalars(
+                select(Member.user_id).where(Member.group_id == group_id)
+            ).all()
+            notify(all_member_ids, 'groups')
+            notify(all_member_ids, 'invites')
+            invalidate_badge_counts(all_member_ids + db.session.scalars(
+                select(Participate.user_id).where(Participate.event_id.in_(group_event_ids))
+            ).all())
+
             Participate.query.filter(
                 Participate.event.has(group_id=group_id)
             ).delete(synchronize_session=False)
@@ -1013,7 +1627,9 @@ def get_info(group_id):
             Member.query.filter_by(group_id=group_id).delete(synchronize_session=False)
 
             db.session.delete(group)
+            invalidate_permission(group_id)
             db.session.commit()
+            event_payload_cache.discard(group_event_ids)
         except:
             db.session.rollback()
             return jsonify({'error': "Unable to delete group"}), 500
@@ -1034,73 +1650,19 @@ def get_info(group_id):
             flag_modified(group, "description")
             
             # Handle member changes
-            current_members = {m.user_id: m for m in Member.query.filter_by(group_id=group_id).all()}
-            users_cache = {}
-            invalid_emails = []
-            
-            # Process new members
-            for new_mem in group_info['new_members']:
-                email = new_mem['email'].strip().lower()
-                if email not in users_cache:
-                    users_cache[email] = User.query.filter_by(email=email).first()
-                user = users_cache[email]
-                if user:
-                    newMember = Member(
-                        user_id=user.user_id,
-                        group_id=group.group_id,
-                        permission=new_mem['role']
-                    )
-                    db.session.add(newMember)
-                else:
-                    invalid_emails.append(email)
-            
-            # Process updated members
-            for updated_mem in group_info['updated_members']:
-                email = updated_mem['email'].strip().lower()
-                if email not in users_cache:
-                    users_cache[email] = User.query.filter_by(email=email).first()
-                user = users_cache[email]
-                if user and user.user_id in current_members:
-                    current_members[user.user_id].permission = updated_mem['role']
-                    # increment cache_number for all events in this group in which user participates, 
-                    db.session.execute(
-                        update(Event)
-                        .where(
-                            Event.group_id == group_id,
-                            exists().where(
-                                Participate.event_id == Event.event_id,
-                                Participate.user_id == user.user_id
-                            )
-                        )
-                        .values(cache_number=Event.cache_number + 1)
-                    )
-            
-            # Process deleted members
-            for deleted_mem in group_info['deleted_members']:
-                email = deleted_mem['email'].strip().lower()
-                if email not in users_cache:
-                    users_cache[email] = User.query.filter_by(email=email).first()
-                user = users_cache[email]
-                if user and user.user_id in current_members:
-                    # increment cache_number for all events in this group in which user participates, 
-                    db.session.execute(
-                        update(Event)
-                        .where(
-                            Event.group_id == group_id,
-                            exists().where(
-                                Participate.event_id == Event.event_id,
-                                Participate.user_id == user.user_id
-                            )
-                        )
-                        .values(cache_number=Event.cache_number + 1)
-                    )
-                    Participate.query.filter(
-                        Participate.event.has(group_id=group_id),
-                        Participate.user_id == user.user_id
-                    ).delete(synchronize_session=False)
-
-                    db.session.delete(current_members[user.user_id])
+            current_member_ids = db.session.scalars(
+                select(Member.user_id).where(Member.group_id == group_id)
+            ).all()
+            invalid_emails = apply_member_changes(
+                group_id,
+                group_info['new_members'],
+                group_info['updated_members'],
+                group_info['deleted_members']
+            )
             
+            # Group name / permissions / membership may have changed for every member
+            notify(current_member_ids, 'groups')
+            notify(current_member_ids, 'calendar', group_id=group_id)
             db.session.commit()
             return jsonify({'emails': invalid_emails, 'version': group.version_number}), 200
         
@@ -1115,11 +1677,8 @@ def get_info(group_id):
 # To get the group permission info
 @app.route('/get_group_permission/<int:group_id>', methods=['GET'])
 @login_required
-def get_group_permission(group_id):
-    mem = Member.query.filter_by(user_id=current_user.user_id, group_id=group_id).first()
-    if not mem:
-        return jsonify({'error': 'Access denied'}), 403
-    permission = mem.permission
+@group_permission_required()
+def get_group_permission(group_id, permission):
     return jsonify({'permission':f'${permission}'}), 200
 
 # To add an event
@@ -1127,66 +1686,76 @@ def get_group_permission(group_id):
 @login_required
 def add_event():
     event = request.get_json()
+
+    # The calendar sends the group id as a string
+    try:
+        group_id = int(event['group_id'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Invalid group'}), 400
     
-    if int(event['group_id']) != 1:
+    if group_id != 1:
         # Check if the user has the permission to add the event
-        mem = Member.query.filter_by(user_id=current_user.user_id, group_id=int(event['group_id'])).first()
-        if not mem:
+        permission = cached_permission(current_user.user_id, group_id)
+        if not permission:
             return jsonify({'error': 'Access denied'}), 403
-        permission = mem.permission
         if permission == 'Viewer':
             return jsonify({'error': 'Permission denied'}), 403
+    
+    try:
+        start_time, end_time, recurrence_rule, _, recurrence_end = event_schedule(event)
+    except ValueError:
+        return jsonify({'error': 'Invalid date or recurrence rule'}), 400
      
     newEvent = Event(
         event_name = event['title'],
         description = event['description'],
-        start_time = datetime.fromisoformat(event['start']),
-        end_time = datetime.fromisoformat(event['end']),
+        start_time = start_time,
+        end_time = end_time,
+        recurrence_rule = recurrence_rule,
+        recurrence_end = recurrence_end,
         cache_number = 0,
         creator = current_user.user_id,
-        group_id = event['group_id']
+        group_id = group_id
     )
     
-    participantsEmail = []
-    for element in event['participants']:
-        participantsEmail.append(element['name'])
+    participantsEmail = list(dict.fromkeys(
+        element['name'].strip().lower() for element in event['participants']
+    ))
     
-    # To see whether a Group 1 exits (to validate foreign key)
-    group = Group.query.filter_by(group_id=1).first()
-    
-    if group is None:
-        newGroup = Group(
-            group_name = 'No Group',
-            description = 'No Description'
-        )
-        
-        try:
-            db.session.add(newGroup)
-            db.session.commit()
-        except:
-            db.session.rollback()
-            return jsonify({'error': "Unable to add event to the database"}), 500
+    if not ensure_personal_group():
+        return jsonify({'error': "Unable to add event to the database"}), 500
+
+    # Resolve all the participants at once
+    participant_user_ids = resolve_user_ids(participantsEmail)
+    unknown_emails = [email for email in participantsEmail if email not in participant_user_ids]
+    if unknown_emails:
+        return jsonify({'error': f"Unknown participants: {', '.join(unknown_emails)}"}), 400
    
+    # The event and its participants are added in a single transaction
     try:
         db.session.add(newEvent)
-        db.session.commit()
+        db.session.flush()
             
-        for participantEmail in participantsEmail:
-            participant = Participate(
-                user_id = User.query.filter_by(email=participantEmail.strip().lower()).first().user_id,
-                event_id = newEvent.event_id
-            )
-            if participantEmail == current_user.email:
-                participant.read_status = 'Read'
-                participant.status = 'Accepted'
-            db.session.add(participant)
+        participant_ids = list(participant_user_ids.values())
+        if participant_ids:
+            db.session.execute(insert(Participate), [{
+                'user_id': user_id,
+                'event_id': newEvent.event_id,
+                'status': 'Accepted' if user_id == current_user.user_id else 'Pending',
+                'read_status': 'Read' if user_id == current_user.user_id else 'Unread'
+            } for user_id in participant_ids])
             
-        try:
-            db.session.commit()
-        except:
-            db.session.rollback()
-            return jsonify({'error': "Unable to add participants"}), 500
+        log_event_changes([newEvent.event_id], 'Created')
+        if group_id == 1:
+            notify([current_user.user_id], 'calendar', group_id=1)
+        else:
+            notify(group_member_ids(group_id) + participant_ids, 'calendar', group_id=group_id)
+            invited_ids = [user_id for user_id in participant_ids if user_id != current_user.user_id]
+            bump_badge_counts(invited_ids, pending=1, unread=1)
+            notify(invited_ids, 'invites')
+        db.session.commit()
     except:
+        db.session.rollback()
         return jsonify({'error': "Unable to add event to the database"}), 500
     
     return jsonify({'message':'Event added successfully'}), 200
@@ -1200,14 +1769,51 @@ def remove_event(event_id):
 
     if event.group_id != 1:
         # Check if the user has the permission to add the event
-        mem = Member.query.filter_by(user_id=current_user.user_id, group_id=event.group_id).first()
-        if not mem:
+        permission = cached_permission(current_user.user_id, event.group_id)
+        if not permission:
             return jsonify({'error': 'Access denied'}), 403
-        permission = mem.permission
         if permission == 'Viewer':
             return jsonify({'error': 'Permission denied'}), 403
 
+    # ?occurrence=<start> on a recurring event only skips that occurrence
+    occurrence = request.args.get('occurrence')
+    if occurrence and event.recurrence_rule is not None:
+        try:
+            occurrence_start = parse_utc_datetime(occurrence)
+        except ValueError:
+            return jsonify({'error': 'Invalid occurrence'}), 400
+
+        try:
+            event.recurrence_exceptions = format_exceptions(
+                parse_exceptions(event.recurrence_exceptions) | {occurrence_start}
+            )
+            db.session.execute(
+                update(Event)
+                .where(Event.event_id == event_id)
+                .values(cache_number = Event.cache_number + 1)
+            )
+            log_event_changes([event_id], 'Updated')
+            if event.group_id == 1:
+                notify([current_user.user_id], 'calendar', group_id=1)
+            else:
+                notify(group_member_ids(event.group_id) + event_participant_ids(event_id), 'calendar', group_id=event.group_id)
+            db.session.commit()
+            return jsonify({'message': 'Occurrence deleted successfully'}), 200
+
+        except:
+            db.session.rollback()
+            return jsonify({'error': "Unable to delete event"}), 500
+
     try:
+        log_event_changes([event_id], 'Deleted')
+        if event.group_id == 1:
+            notify([current_user.user_id], 'calendar', group_id=1)
+        else:
+            participant_ids = event_participant_ids(event_id)
+            notify(group_member_ids(event.group_id) + participant_ids, 'calendar', group_id=event.group_id)
+            notify(participant_ids, 'invites')
+            invalidate_badge_counts(participant_ids)
+
         Participate.query.filter(
             Participate.event_id == event_id
         ).delete(synchronize_session=False)
@@ -1215,6 +1821,7 @@ def remove_event(event_id):
         db.session.delete(event)
         
         db.session.commit()
+        event_payload_cache.discard([event_id])
         return jsonify({'message': 'Event deleted successfully'}), 200
         
     except:
@@ -1234,17 +1841,24 @@ def update_event(event_id):
     if event.version_number != new_event['version']:
         return jsonify({'error': "Conflicting Update"}), 409
     
+    try:
+        schedule = event_schedule(new_event, event)
+    except ValueError:
+        return jsonify({'error': 'Invalid date or recurrence rule'}), 400
+    
     if event.group_id == 1:
         try:
             event.event_name = new_event['title']
             event.description = new_event['description']
-            event.start_time = datetime.fromisoformat(new_event['start'])
-            event.end_time = datetime.fromisoformat(new_event['end'])
+            (event.start_time, event.end_time, event.recurrence_rule,
+             event.recurrence_exceptions, event.recurrence_end) = schedule
             db.session.execute(
                 update(Event)
                 .where(Event.event_id == event_id)
                 .values(cache_number = Event.cache_number + 1)
             )
+            log_event_changes([event_id], 'Updated')
+            notify([current_user.user_id], 'calendar', group_id=1)
             db.session.commit() 
             return jsonify({'message': 'Event updated successfully'}), 200
         
@@ -1257,18 +1871,17 @@ def update_event(event_id):
             return jsonify({'error' : 'Unable to update event'}), 500
     
     # Check if the user has the permission to add the event
-    mem = Member.query.filter_by(user_id=current_user.user_id, group_id=event.group_id).first()
-    if not mem:
+    permission = cached_permission(current_user.user_id, event.group_id)
+    if not permission:
         return jsonify({'error': 'Access denied'}), 403
-    permission = mem.permission
     if permission == 'Viewer':
         return jsonify({'error': 'Permission denied'}), 403
     
     try:
         event.event_name = new_event['title']
         event.description = new_event['description']
-        event.start_time = datetime.fromisoformat(new_event['start'])
-        event.end_time = datetime.fromisoformat(new_event['end'])
+        (event.start_time, event.end_time, event.recurrence_rule,
+         event.recurrence_exceptions, event.recurrence_end) = schedule
         db.session.execute(
             update(Event)
             .where(Event.event_id == event_id)
@@ -1276,35 +1889,71 @@ def update_event(event_id):
         )
         flag_modified(event, "cache_number")
 
-        for email in new_event['added_participants']:
-            user = User.query.filter_by(email=email.strip().lower()).first()
-            if user:
-                participant = Participate(
-                    user_id = user.user_id,
-                    event_id = event_id
-                )
-                if user.user_id == current_user.user_id:
-                    participant.status = 'Accepted'
-                    participant.read_status = 'Read'
-                db.session.add(participant)
-        
-        for email in new_event['changed_participants']:
-            user = User.query.filter_by(email=email.strip().lower()).first()
-            if user:
-                participant = Participate.query.filter_by(user_id=user.user_id, event_id=event_id).first()
-                if participant:
-                    if user.user_id == current_user.user_id:
-                        participant.status = 'Accepted'
-                    else:
-                        participant.status = 'Pending'
+        # Resolve every added, changed and deleted participant at once
+        user_ids = resolve_user_ids(
+            new_event['added_participants'] + new_event['changed_participants'] + new_event['deleted_participants']
+        )
+        def known_ids(emails):
+            emails = [email.strip().lower() for email in emails]
+            return list(dict.fromkeys(user_ids[email] for email in emails if email in user_ids))
+        added_ids = known_ids(new_event['added_participants'])
+        changed_ids = known_ids(new_event['changed_participants'])
+        deleted_ids = known_ids(new_event['deleted_participants'])
+
+        # Current invite state of the changed and deleted participants
+        old_states = {}
+        for chunk in chunked(changed_ids + deleted_ids):
+            for participant in db.session.query(Participate.user_id, Participate.status, Participate.read_status).filter(
+                Participate.event_id == event_id,
+                Participate.user_id.in_(chunk)
+            ):
+                old_states[participant.user_id] = participant
+        changed_ids = [user_id for user_id in changed_ids if user_id in old_states and user_id not in deleted_ids]
+        deleted_ids = [user_id for user_id in deleted_ids if user_id in old_states]
+
+        # Users whose invite for this event appeared, changed or disappeared
+        invited_user_ids = added_ids + changed_ids + deleted_ids
+        badge_deltas = {}
+
+        if added_ids:
+            db.session.execute(insert(Participate), [{
+                'user_id': user_id,
+                'event_id': event_id,
+                'status': 'Accepted' if user_id == current_user.user_id else 'Pending',
+                'read_status': 'Read' if user_id == current_user.user_id else 'Unread'
+            } for user_id in added_ids])
+            for user_id in added_ids:
+                if user_id != current_user.user_id:
+                    badge_deltas[user_id] = (1, 1)
+
+        # Changed participants are asked again, the editor accepts implicitly
+        for chunk in chunked(changed_ids):
+            db.session.execute(
+                update(Participate)
+                .where(Participate.event_id == event_id, Participate.user_id.in_(chunk))
+                .values(status = case((Participate.user_id == current_user.user_id, 'Accepted'), else_='Pending')),
+                execution_options={'synchronize_session': False}
+            )
+        for user_id in changed_ids:
+            new_status = 'Accepted' if user_id == current_user.user_id else 'Pending'
+            badge_deltas[user_id] = invite_badge_delta(old_states[user_id].status, None, new_status, None)
         
-        for email in new_event['deleted_participants']:
-            user = User.query.filter_by(email=email.strip().lower()).first()
-            if user:
-                participant = Participate.query.filter_by(user_id=user.user_id, event_id=event_id).first()
-                if participant:
-                    db.session.delete(participant)
+        # Log while the removed participants are still attached to the event
+        log_event_changes([event_id], 'Updated')
+        notify(group_member_ids(event.group_id) + event_participant_ids(event_id), 'calendar', group_id=event.group_id)
+
+        for chunk in chunked(deleted_ids):
+            db.session.execute(
+                delete(Participate)
+                .where(Participate.event_id == event_id, Participate.user_id.in_(chunk)),
+                execution_options={'synchronize_session': False}
+            )
+        for user_id in deleted_ids:
+            old_state = old_states[user_id]
+            badge_deltas[user_id] = invite_badge_delta(old_state.status, old_state.read_status, None, None)
 
+        bump_badge_deltas({user_id: delta for user_id, delta in badge_deltas.items() if delta != (0, 0)})
+        notify(invited_user_ids, 'invites')
         db.session.commit() 
         return jsonify({'message': 'Event updated successfully'}), 200
     
@@ -1335,13 +1984,67 @@ def exit_group(group_id):
                 if admin_count == 1:
                     return jsonify({'error' : 'Assign an admin before leaving'}), 400
 
+            exited_events = participated_event_ids(group_id, [mem.user_id])
+            log_event_changes(exited_events, 'Updated')
+            # The participant lists of these events change
+            db.session.execute(
+                update(Event)
+                .where(
+                    Event.group_id == group_id,
+                    exists().where(
+                        Participate.event_id == Event.event_id,
+                        Participate.user_id == mem.user_id
+                    )
+                )
+                .values(cache_number = Event.cache_number + 1)
+            )
+
             Participate.query.filter(
                 Participate.event.has(group_id=group_id),
                 Participate.user_id == mem.user_id
             ).delete(synchronize_session=False)
             db.session.delete(mem)
+            invalidate_permission(group_id, current_user.user_id)
+            invalidate_badge_counts([current_user.user_id])
+            notify([current_user.user_id], 'groups')
+            notify(group_member_ids(group_id), 'calendar', group_id=group_id)
             db.session.commit()
         except:
             return jsonify({'error' : 'Unable to exit group'}), 500
     
-    return jsonify(success=True), 200
\ No newline at end of file
+    return jsonify(success=True), 200
+
+# Request and SQL metrics of this worker in the Prometheus text format, with the
+# sizes and hit counts of the in-process caches
+# Asks for METRICS_TOKEN as a bearer token; without a token it is only served in debug
+# mode, so a default deployment does not publish its routes and traffic
+@app.route('/metrics')
+def get_metrics():
+    token = app.config['METRICS_TOKEN']
+    if not app.config['METRICS_ENABLED'] or not (token or app.config['DEBUG']):
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Access denied'}), 403
+
+    gauges = {}
+    for prefix, stats in (
+        ('payload_cache', event_payload_cache.stats()),
+        ('interval_index', interval_indexes.stats())
+    ):
+        for name, value in stats.items():
+            gauges[f'{prefix}_{name}'] = (f'{prefix.replace("_", " ").capitalize()} {name}', value)
+    return Response(metrics_registry.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# Server-Sent Events stream pushing calendar, invite and group changes to the current user
+# asgi.py serves it on the event loop, this view keeps a thread per open connection
+@app.route('/stream')
+@login_required
+def stream():
+    return Response(
+        event_stream(get_broker(), current_user.user_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,55 @@
+from bisect import bisect_left, bisect_right
+
+# Free/busy computations over (start, end) intervals of datetimes, end exclusive
+# Everything here is pure Python over already loaded intervals: the routes load the
+# busy intervals of all the participants with a couple of set-based queries
+
+# Sort and merge intervals into disjoint busy intervals, touching intervals are joined
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+# Gaps of at least min_duration (a timedelta) between disjoint sorted busy
+# intervals, inside [window_start, window_end)
+def free_slots(busy, window_start, window_end, min_duration):
+    slots = []
+    cursor = window_start
+    for start, end in busy:
+        if start >= window_end:
+            break
+        if start - cursor >= min_duration:
+            slots.append((cursor, start))
+        cursor = max(cursor, end)
+    if window_end - cursor >= min_duration:
+        slots.append((cursor, window_end))
+    return slots
+
+# Sorted, disjoint busy intervals of one user with O(log n) overlap lookups
+class BusyIndex:
+    def __init__(self, intervals):
+        self.intervals = merge_intervals(intervals)
+        self.starts = [start for start, _ in self.intervals]
+        self.ends = [end for _, end in self.intervals]
+
+    # Busy intervals overlapping [start, end): the intervals are disjoint and sorted,
+    # so both their starts and their ends are sorted
+    def overlapping(self, start, end):
+        first = bisect_right(self.ends, start)
+        last = bisect_left(self.starts, end)
+        return self.intervals[first:last]
+
+# Busy intervals of every user overlapping [start, end), as {user_id: [(start, end)]}
+# busy_by_user maps user ids to their intervals (any order, may overlap)
+def find_conflicts(busy_by_user, start, end):
+    conflicts = {}
+    for user_id, intervals in busy_by_user.items():
+        overlapping = BusyIndex(intervals).overlapping(start, end)
+        if overlapping:
+            conflicts[user_id] = overlapping
+    return conflicts
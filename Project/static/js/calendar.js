@@ -5,34 +5,132 @@ const calendarResources = {
 };
 
 // Cache Manager
+// Events are cached per group and per visible date window (see windowKey),
+// together with the server change-log cursor they are up to date with
+// At most maxEntries windows are kept: an index of last use times evicts the least
+// recently used ones, and a full localStorage evicts more until the write fits
 const calendarCache = {
+  maxEntries: 30,
+  indexKey: 'calendar_cache_index',
+  keyPrefix: 'calendar_events_',
+
+  // Key of the window fetched by FullCalendar
+  windowKey: function (fetchInfo) {
+    return `${fetchInfo.startStr}_${fetchInfo.endStr}`;
+  },
+
+  // Prefix shared by all the cached windows of a group
+  groupPrefix: function (groupId) {
+    return `${this.keyPrefix}${groupId}_`;
+  },
+
+  // {cache key: last use} of the stored windows; windows missing from it (e.g.
+  // written before the index existed) count as the oldest
+  loadIndex: function () {
+    let index = {};
+    try {
+      index = JSON.parse(localStorage.getItem(this.indexKey)) || {};
+    } catch (e) {
+      index = {};
+    }
+    const stored = {};
+    Object.keys(localStorage).forEach(key => {
+      if (key.startsWith(this.keyPrefix)) {
+        stored[key] = index[key] || 0;
+      }
+    });
+    return stored;
+  },
+
+  saveIndex: function (index) {
+    try {
+      localStorage.setItem(this.indexKey, JSON.stringify(index));
+    } catch (e) {
+      // Full storage: the index is rebuilt from the stored keys on the next load
+    }
+  },
+
+  // Record a use of a window
+  touch: function (cacheKey) {
+    const index = this.loadIndex();
+    index[cacheKey] = new Date().getTime();
+    this.saveIndex(index);
+  },
+
+  // Drop the least recently used window of the index, false when there is none
+  evictOldest: function (index, keep) {
+    let oldest = null;
+    Object.keys(index).forEach(key => {
+      if (key !== keep && (oldest === null || index[key] < index[oldest])) {
+        oldest = key;
+      }
+    });
+    if (oldest === null) return false;
+    localStorage.removeItem(oldest);
+    delete index[oldest];
+    return true;
+  },
+
   // Get cached data
-  get: function (groupId) {
-    const cacheKey = `calendar_events_${groupId}`;
+  get: function (groupId, windowKey) {
+    const cacheKey = `${this.groupPrefix(groupId)}${windowKey}`;
     const cached = localStorage.getItem(cacheKey);
     if (!cached) return null;
 
-    const { data, timestamp, ttl } = JSON.parse(cached);
+    let entry;
+    try {
+      entry = JSON.parse(cached);
+    } catch (e) {
+      localStorage.removeItem(cacheKey);
+      return null;
+    }
+    const { data, cursor, timestamp, ttl } = entry;
 
-    // Check if cache is expired (default 1 hour TTL)
+    // Check if cache is expired (default 1 hour TTL) or predates the change-log cursor
     const now = new Date().getTime();
-    if (now > timestamp + (ttl || 3600000)) {
+    if (now > timestamp + (ttl || 3600000) || cursor === undefined) {
       localStorage.removeItem(cacheKey);
       return null;
     }
 
-    return { data, timestamp, ttl };
+    this.touch(cacheKey);
+    return { data, cursor, timestamp, ttl };
   },
 
   // Store data in cache
-  set: function (groupId, data, ttl = 3600000) {
-    const cacheKey = `calendar_events_${groupId}`;
-    const cacheValue = {
+  // Never throws: when the window cannot be stored even after evicting every other
+  // one, it is simply not cached (the caller still renders the data it fetched)
+  set: function (groupId, windowKey, data, cursor, ttl = 3600000) {
+    const cacheKey = `${this.groupPrefix(groupId)}${windowKey}`;
+    const cacheValue = JSON.stringify({
       data,
+      cursor,
       timestamp: new Date().getTime(),
       ttl
-    };
-    localStorage.setItem(cacheKey, JSON.stringify(cacheValue));
+    });
+
+    const index = this.loadIndex();
+    delete index[cacheKey];
+    while (Object.keys(index).length >= this.maxEntries && this.evictOldest(index, cacheKey));
+
+    let stored = false;
+    while (!stored) {
+      try {
+        localStorage.setItem(cacheKey, cacheValue);
+        stored = true;
+      } catch (e) {
+        // QuotaExceededError: make room, give up when nothing is left to evict
+        if (!this.evictOldest(index, cacheKey)) {
+          localStorage.removeItem(cacheKey);
+          console.warn('Calendar cache is full, window not cached:', e);
+          break;
+        }
+      }
+    }
+
+    if (stored) index[cacheKey] = new Date().getTime();
+    this.saveIndex(index);
+    return stored;
   },
 
   // Clear entire cache 
@@ -42,43 +140,52 @@ const calendarCache = {
     });
   },
 
-  // Clear specific cache entries
+  // Clear specific cache entries (all the windows of the group)
   clear: function (groupId) {
-    Object.keys(localStorage).forEach(key => {
-      if (key.startsWith(`calendar_events_${groupId}`)) {
+    const index = this.loadIndex();
+    Object.keys(index).forEach(key => {
+      if (key.startsWith(this.groupPrefix(groupId))) {
         localStorage.removeItem(key);
+        delete index[key];
       }
     });
+    this.saveIndex(index);
   },
 
-  // Clear specific event from the cache entries
+  // Clear specific event from the cache entries of every window of the group
   clearEvent: function (groupId, eventId) {
-    const cacheKey = `calendar_events_${groupId}`;
-    const cached = localStorage.getItem(cacheKey);
+    let removed = false;
 
-    if (!cached) return; // No cache exists for this group
+    Object.keys(localStorage).forEach(cacheKey => {
+      if (!cacheKey.startsWith(this.groupPrefix(groupId))) return;
 
-    try {
-      const { data, timestamp, ttl } = JSON.parse(cached);
+      try {
+        const { data, cursor, timestamp, ttl } = JSON.parse(localStorage.getItem(cacheKey));
 
-      // Filter out the event to be removed
-      const updatedEvents = data.filter(event => event.event_id !== eventId);
+        // Filter out the event to be removed
+        const updatedEvents = data.filter(event => event.event_id !== eventId);
 
-      // Only update cache if something was actually removed
-      if (updatedEvents.length !== data.length) {
-        const newCacheValue = {
-          data: updatedEvents,
-          timestamp, // Keep original timestamp
-          ttl       // Keep original TTL
-        };
-        localStorage.setItem(cacheKey, JSON.stringify(newCacheValue));
-        return true; // Indicate success
+        // Only update cache if something was actually removed
+        if (updatedEvents.length !== data.length) {
+          const newCacheValue = {
+            data: updatedEvents,
+            cursor,    // Keep original cursor
+            timestamp, // Keep original timestamp
+            ttl       // Keep original TTL
+          };
+          try {
+            localStorage.setItem(cacheKey, JSON.stringify(newCacheValue));
+          } catch (e) {
+            localStorage.removeItem(cacheKey); // Could not be rewritten, drop the stale copy
+          }
+          removed = true;
+        }
+      } catch (e) {
+        console.error('Error processing cache:', e);
       }
-      return false; // No changes made
-    } catch (e) {
-      console.error('Error processing cache:', e);
-      return false;
-    }
+    });
+
+    return removed; // Indicate whether something was removed
   }
 };
 
@@ -94,6 +201,61 @@ document.getElementById('signout-sidebar')?.addEventListener('click', function (
   window.location.href = this.href;  // proceed with signout after clearing the cache
 });
 
+// Push stream of calendar / invite / group changes (Server-Sent Events)
+const pushStream = {
+  source: null,
+  connected: false,
+
+  // Open the stream and dispatch each message type to its handler
+  open: function (handlers) {
+    if (!window.EventSource || this.source) return;
+
+    this.source = new EventSource('/stream');
+    this.source.onopen = () => { this.connected = true; };
+    this.source.onerror = () => { this.connected = false; };  // EventSource reconnects on its own
+
+    Object.keys(handlers).forEach(type => {
+      this.source.addEventListener(type, function (e) {
+        handlers[type](JSON.parse(e.data));
+      });
+    });
+  }
+};
+
+// To refresh the group-select options
+function refresh_group_select() {
+  $.ajax({
+    url: '/get_groups',
+    type: 'GET',
+    success: function (data) {
+      const select = $('#group-select');
+      const selected = select.val();
+      select.empty().append('<option id="group-select-option-1" value="1">Dashboard</option>');
+
+      $.each(data, function (index, group) {
+        select.append(
+          $('<option></option>')
+            .attr('id', 'group-select-option-' + group.group_id)
+            .val(group.group_id)
+            .text(group.name)
+        );
+      });
+
+      // Fall back to the dashboard if the selected group is gone
+      if (select.find(`option[value="${selected}"]`).length) {
+        select.val(selected);
+      } else {
+        calendarCache.clear(selected);
+        select.val('1');
+        document.getElementById('group-select').dispatchEvent(new Event('change'));
+      }
+    },
+    error: function () {
+      $('#group-select').html('<option value="" disabled>Error loading groups</option>');
+    }
+  });
+}
+
 // For Check Invite
 let checkInvt = document.querySelector('#check-invites-link');
 
@@ -225,72 +387,82 @@ function load_calendar() {
     events: function (fetchInfo, successCallback, failureCallback) {
       const group_id = document.getElementById('group-select').value;
 
+      // Only the events overlapping the visible window are requested
+      const windowKey = calendarCache.windowKey(fetchInfo);
+      const windowParams = new URLSearchParams({
+        start: fetchInfo.startStr,
+        end: fetchInfo.endStr
+      });
+
+      // Load the whole window and cache it with the cursor it is up to date with
+      const loadWindow = () => {
+        fetch(`/data/${group_id}?${windowParams}`)
+          .then(async (response) => {
+            const data = await response.json();
+            if (!response.ok) {
+              throw new Error(data.error);
+            }
+            calendarCache.set(group_id, windowKey, data, Number(response.headers.get('X-Change-Cursor')));
+
+            // Counts are pushed over the stream while it is connected
+            if (!pushStream.connected) {
+              fetch_badge_counts(); // Refresh the notification and invite counts
+            }
+
+            successCallback(data);
+          })
+          .catch(error => {
+            showFlashMessage('error', error.message);
+            failureCallback(error);
+          });
+      };
+
       // Try to get from cache first
-      const cachedObj = calendarCache.get(group_id);
+      const cachedObj = calendarCache.get(group_id, windowKey);
       if (cachedObj) {
         const cachedData = cachedObj.data;
 
-        // 1. Prepare version map from cache
-        const versionMap = cachedData.map(event => ({
-          event_id: event.event_id,
-          cache_number: event.cache_number
-        }));
-
-        // 2. Request only updated events
-        fetch(`/data/${group_id}/updates`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({
-            events: versionMap
-          })
-        })
+        // 1. Request only the events changed since the cached cursor
+        const updateParams = new URLSearchParams(windowParams);
+        updateParams.set('cursor', cachedObj.cursor);
+        fetch(`/data/${group_id}/updates?${updateParams}`)
           .then(async (response) => {
             const updates = await response.json();
             if (!response.ok) {
               throw new Error(updates.error);
             }
+            // The change log no longer covers the cached cursor
+            if (updates.reload) {
+              loadWindow();
+              return;
+            }
 
             const newAndUpdatedEvents = updates.updated_events;
             const deletedEventIds = updates.deleted_events;
 
-            // 3. Merge updates with cache
-
-            // Delete the cached events that are not in the database anymore
-            deletedEventIds.forEach(deleted_event_id => {
-              calendarCache.clearEvent(group_id, deleted_event_id);
-            });
+            // 2. Merge updates with cache
 
             // Create a copy of cached data to modify
             let mergedData = [...cachedData];
 
-            // Remove deleted events from the merged data
-            mergedData = mergedData.filter(event =>
-              !deletedEventIds.includes(event.event_id)
-            );
+            // Drop every cached entry of the deleted events (or events moved out of this
+            // window) and of the updated ones: an update carries the whole event, a
+            // recurring event all of its occurrences in the window, and an event that
+            // stopped recurring its single row
+            const changedIds = new Set(deletedEventIds);
+            newAndUpdatedEvents.forEach(update => changedIds.add(update.event_id));
+            mergedData = mergedData.filter(event => !changedIds.has(event.event_id));
 
-            // Process updates
-            newAndUpdatedEvents.forEach(update => {
-              const existingIndex = mergedData.findIndex(e => e.event_id === update.event_id);
-
-              if (existingIndex >= 0) {
-                // Update existing event (preserve unchanged fields)
-                mergedData[existingIndex] = {
-                  ...mergedData[existingIndex],
-                  ...update
-                };
-              } else {
-                // Add new event
-                mergedData.push(update);
-              }
-            });
+            // Add the updated events as sent
+            mergedData.push(...newAndUpdatedEvents);
 
-            // 4. Update cache and callback
-            calendarCache.set(group_id, mergedData, cachedObj.ttl);
+            // 3. Update cache and callback
+            calendarCache.set(group_id, windowKey, mergedData, updates.cursor, cachedObj.ttl);
 
-            fetch_unread_notifications_count();   // Refresh the notification count
-            fetch_pending_invites_count(); // Refresh the invite count
+            // Counts are pushed over the stream while it is connected
+            if (!pushStream.connected) {
+              fetch_badge_counts(); // Refresh the notification and invite counts
+            }
 
             successCallback(mergedData);
           })
@@ -300,23 +472,7 @@ function load_calendar() {
         return;
       }
 
-      fetch(`/data/${group_id}`)
-        .then(async (response) => {
-          const data = await response.json();
-          if (!response.ok) {
-            throw new Error(data.error);
-          }
-          calendarCache.set(group_id, data);
-
-          fetch_unread_notifications_count();   // Refresh the notification count
-          fetch_pending_invites_count(); // Refresh the invite count
-
-          successCallback(data);
-        })
-        .catch(error => {
-          showFlashMessage('error', error.message);
-          failureCallback(error);
-        });
+      loadWindow();
     },
     eventClick: function (info) {
 
@@ -839,6 +995,8 @@ function load_calendar() {
               title: eventTitle,
               start: eventStart,
               end: eventEnd,
+              // Moving an occurrence of a recurring event moves the whole series
+              occurrence_start: event.extendedProps.occurrence_start || null,
               description: description,
               added_participants: added_participants,
               changed_participants: changed_participants,
@@ -877,8 +1035,17 @@ function load_calendar() {
       function removeEvent(event) {
         $('#modal-view-event').modal('hide');
         var event_id = event.extendedProps.event_id;
+
+        // For a recurring event, either only this occurrence or the whole series
+        const occurrence_start = event.extendedProps.occurrence_start;
+        const onlyOccurrence = occurrence_start &&
+          confirm('This is a recurring event. Delete only this occurrence? (Cancel deletes the whole series)');
+        const url = onlyOccurrence
+          ? `/remove_event/${event_id}?${new URLSearchParams({ occurrence: occurrence_start })}`
+          : `/remove_event/${event_id}`;
+
         $.ajax({
-          url: `/remove_event/${event_id}`,
+          url: url,
           type: 'DELETE',
           contentType: 'application/json',
           success: function (response) {
@@ -889,7 +1056,16 @@ function load_calendar() {
               calendarCache.clearEvent(1, event_id);
             }
             calendarCache.clearEvent(group_id, event_id);
-            event.remove();
+            if (onlyOccurrence) {
+              // The other occurrences are fetched again
+              calendar.removeAllEvents();
+              cleanupResources("all");
+              calendar.refetchEvents();
+            } else {
+              calendar.getEvents()
+                .filter(item => item.extendedProps.event_id === event_id)
+                .forEach(item => item.remove());
+            }
             showFlashMessage('success', response.message);
           },
           error: function (response) {
@@ -1119,6 +1295,8 @@ function load_calendar() {
         const description = $('#eventDescription').val().trim();
         const userGroup = $('#group-select').val();
         const participants = getSelectedParticipants();
+        const repeat = $('#eventRepeat').val();
+        const repeatCount = $('#eventRepeatCount').val().trim();
 
         $('.is-invalid').removeClass('is-invalid');
         $('.invalid-feedback').hide();
@@ -1143,6 +1321,11 @@ function load_calendar() {
           isValid = false;
         }
 
+        if (repeat && repeatCount && !(parseInt(repeatCount) >= 1)) {
+          showError('eventRepeatCount', 'Occurrences must be at least 1');
+          isValid = false;
+        }
+
         if (userGroup != 1 && participants.length === 0) {
           showError('eventParticipantsList', 'Please select at least one participant');
           isValid = false;
@@ -1162,7 +1345,8 @@ function load_calendar() {
               end: eventEnd,
               description: description,
               group_id: userGroup,
-              participants: participants
+              participants: participants,
+              recurrence: repeat ? `FREQ=${repeat}` + (repeatCount ? `;COUNT=${parseInt(repeatCount)}` : '') : null
             }),
             success: function (response) {
               // Clear cache when group changes
@@ -1204,6 +1388,31 @@ function load_calendar() {
     calendar.refetchEvents();
   });
 
+  // Apply the changes pushed by the server
+  pushStream.open({
+    // Events of a group changed: the dashboard shows group events as well
+    calendar: function (message) {
+      const group_id = document.getElementById('group-select').value;
+      if (group_id == message.group_id || group_id == 1) {
+        calendar.refetchEvents();
+      }
+    },
+    invites: function () {
+      fetch_badge_counts(); // Refresh the notification and invite counts
+      if (notificationPopover !== null && !notificationPopover.classList.contains('d-none')) {
+        get_new_notifications();
+      }
+    },
+    groups: function () {
+      refresh_group_select();
+    }
+  });
+
+  // Cursor of the next page of the invites modal
+  const invitesInbox = {
+    nextCursor: null
+  };
+
   checkInvt.addEventListener('click', check_invites);
   // Create check invite modal functionality
   function check_invites() {
@@ -1218,6 +1427,18 @@ function load_calendar() {
                       <button type="button" class="btn-close" data-bs-dismiss="modal" aria-label="Close"></button>
                   </div>
                   <div class="modal-body p-0">
+                      <div class="d-flex flex-wrap gap-2 p-2 border-bottom" id="invitesFilters">
+                          <select class="form-select form-select-sm w-auto" id="invitesType">
+                              <option value="">All invites</option>
+                              <option value="group">Groups</option>
+                              <option value="event">Events</option>
+                          </select>
+                          <select class="form-select form-select-sm w-auto" id="invitesGroup">
+                              <option value="">All groups</option>
+                          </select>
+                          <input type="date" class="form-control form-control-sm w-auto" id="invitesFrom" title="Events from">
+                          <input type="date" class="form-control form-control-sm w-auto" id="invitesTo" title="Events until">
+                      </div>
                       <div id="invitesContainer" class="list-group list-group-flush">
                           <div class="list-group-item text-center py-3">
                               <div class="spinner-border" role="status">
@@ -1228,6 +1449,8 @@ function load_calendar() {
                       </div>
                   </div>
                   <div class="modal-footer">
+                      <button type="button" class="btn btn-outline-success me-auto" id="accept-all-invites">Accept all</button>
+                      <button type="button" class="btn btn-outline-danger" id="decline-all-invites">Decline all</button>
                       <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Close</button>
                   </div>
               </div>
@@ -1250,6 +1473,46 @@ function load_calendar() {
           </div>
       </div>`;
       document.body.insertAdjacentHTML('beforeend', modalHTML);
+
+      // Answer every invite shown with one request
+      $('#accept-all-invites').on('click', () => respondToAllInvites('Accepted'));
+      $('#decline-all-invites').on('click', () => respondToAllInvites('Declined'));
+
+      // Filters reload the list from the first page
+      $('#invitesFilters').on('change', 'select, input', () => loadInvites());
+
+      // Older invites on demand
+      $('#invitesContainer').on('click', '#invites-more', function () {
+        $(this).remove();
+        loadInvites(invitesInbox.nextCursor);
+      });
+
+      // Descriptions are loaded when opened
+      $('#invitesContainer').on('click', '.description-short', function () {
+        const title = $(this).data('title');
+        $.ajax({
+          url: `/invite_description/${$(this).data('type')}/${$(this).data('id')}`,
+          type: 'GET',
+          success: function (response) {
+            $('#descriptionPopupTitle').text(title);
+            $('#descriptionPopupContent').html((response.description || 'No description').replace(/\n/g, '<br>'));
+
+            const descModal = new bootstrap.Modal(document.getElementById('descriptionPopup'));
+            descModal.show();
+          },
+          error: function () {
+            showFlashMessage('error', 'Error loading the description');
+          }
+        });
+      });
+
+      // Accept / decline buttons
+      $('#invitesContainer').on('click', '.accept-btn', function () {
+        respondToInvite($(this).data('id'), $(this).data('type'), 'Accepted');
+      });
+      $('#invitesContainer').on('click', '.decline-btn', function () {
+        respondToInvite($(this).data('id'), $(this).data('type'), 'Declined');
+      });
     }
 
     // Initialize modal
@@ -1259,26 +1522,23 @@ function load_calendar() {
     // Show modal
     modal.show();
 
-    // Fetch invites from server
-    $.ajax({
-      url: '/check_invites',
-      type: 'GET',
-      success: function (response) {
-        const container = $('#invitesContainer');
-        container.empty();
-
-        if (response.length === 0) {
-          container.html('<div class="text-center py-3"><p>No pending invitations</p></div>');
-          return;
-        }
+    // Group filter: the groups of the group-select
+    const groupFilter = $('#invitesGroup');
+    const selectedGroup = groupFilter.val();
+    groupFilter.find('option:not(:first)').remove();
+    $('#group-select option').each(function () {
+      if (this.value !== '1') {
+        groupFilter.append($('<option></option>').val(this.value).text(this.text));
+      }
+    });
+    groupFilter.val(selectedGroup || '');
 
-        // Separate group and event invites
-        const groupInvites = response.filter(invite => invite.type === 'group');
-        const eventInvites = response.filter(invite => invite.type === 'event');
+    loadInvites();
 
-        // Group invite template
-        const groupInviteHTML = (invite) => `
-          <div class="list-group-item d-flex justify-content-between align-items-center py-2" id="invite-${invite.id}">
+    // Group invite template
+    function groupInviteHTML(invite) {
+      return `
+          <div class="list-group-item d-flex justify-content-between align-items-center py-2" id="invite-group-${invite.id}">
               <div class="d-flex flex-column flex-grow-1 pe-3" style="min-width: 0;">
                   <div class="d-flex align-items-center">
                       <span class="badge bg-primary me-2">GROUP</span>
@@ -1287,10 +1547,10 @@ function load_calendar() {
                   <div class="d-flex mt-1">
                       <small class="text-muted text-truncate description-short" 
                           style="cursor: pointer;"
-                          data-full-desc="${invite.description}" 
+                          data-type="group" data-id="${invite.id}"
                           data-title="${invite.name} Description">
                           <i class="bi bi-info-circle me-1"></i>
-                          ${invite.description.length > 50 ? invite.description.substring(0, 50) + '...' : invite.description}
+                          Show description
                       </small>
                   </div>
               </div>
@@ -1303,10 +1563,12 @@ function load_calendar() {
                   </button>
               </div>
           </div>`;
+    }
 
-        // Event invite template
-        const eventInviteHTML = (invite) => `
-          <div class="list-group-item d-flex justify-content-between align-items-center py-2" id="invite-${invite.id}">
+    // Event invite template
+    function eventInviteHTML(invite) {
+      return `
+          <div class="list-group-item d-flex justify-content-between align-items-center py-2" id="invite-event-${invite.id}">
               <div class="d-flex flex-column flex-grow-1 pe-3" style="min-width: 0;">
                   <div class="d-flex align-items-center">
                       <span class="badge bg-warning text-dark me-2">EVENT</span>
@@ -1319,16 +1581,17 @@ function load_calendar() {
                   <div class="d-flex mt-1">
                       <small class="text-muted text-truncate description-short" 
                           style="cursor: pointer;"
-                          data-full-desc="${invite.description}" 
+                          data-type="event" data-id="${invite.id}"
                           data-title="${invite.name} Description">
                           <i class="bi bi-info-circle me-1"></i>
-                          ${invite.description.length > 50 ? invite.description.substring(0, 50) + '...' : invite.description}
+                          Show description
                       </small>
                   </div>
                   <div class="d-flex flex-wrap mt-1 gap-2">
                       <small class="text-muted">
                           <i class="bi bi-clock me-1"></i>
-                          ${invite.start_time} - ${invite.end_time}
+                          ${new Date(invite.start_time).toLocaleString()} - ${new Date(invite.end_time).toLocaleString()}
+                          ${invite.recurrence ? '<i class="bx bx-repeat ms-1" title="Repeats"></i>' : ''}
                       </small>
                       <small class="text-muted">
                           <i class="bi bi-person me-1"></i>
@@ -1345,54 +1608,54 @@ function load_calendar() {
                   </button>
               </div>
           </div>`;
+    }
 
-        if (groupInvites.length > 0) {
-          groupInvites.forEach(invite => {
-            if (invite.description.length == 0)
-              invite.description = "No description";
-            container.append(groupInviteHTML(invite));
-          });
-        }
-
-        if (eventInvites.length > 0) {
-          eventInvites.forEach(invite => {
-            if (invite.description.length == 0)
-              invite.description = "No description";
-            container.append(eventInviteHTML(invite));
-          });
-        }
-
-        // Setup description click handlers
-        $('.description-short').click(function () {
-          const fullDesc = $(this).data('full-desc');
-          const title = $(this).data('title');
-
-          $('#descriptionPopupTitle').text(title);
-          $('#descriptionPopupContent').html(fullDesc.replace(/\n/g, '<br>'));
+    // Fetch a page of invites from server, the first one (replacing the list) or the
+    // one after the cursor
+    function loadInvites(before) {
+      const filters = {};
+      const type = $('#invitesType').val();
+      const group_id = $('#invitesGroup').val();
+      const from = $('#invitesFrom').val();
+      const to = $('#invitesTo').val();
+      if (type) filters.type = type;
+      if (group_id) filters.group_id = group_id;
+      if (from && to) {
+        // Whole days in the user's time zone
+        filters.start = new Date(`${from}T00:00:00`).toISOString();
+        const end = new Date(`${to}T00:00:00`);
+        end.setDate(end.getDate() + 1);
+        filters.end = end.toISOString();
+      }
+      if (before) filters.before = before;
 
-          const descModal = new bootstrap.Modal(document.getElementById('descriptionPopup'));
-          descModal.show();
-        });
+      $.ajax({
+        url: '/check_invites',
+        type: 'GET',
+        data: filters,
+        success: function (response) {
+          const container = $('#invitesContainer');
+          if (!before) container.empty();
+          invitesInbox.nextCursor = response.next_cursor;
 
-        // Setup accept/decline button handlers
-        $('.accept-btn').click(function () {
-          const id = $(this).data('id');
-          const type = $(this).data('type');
-          respondToInvite(id, type, 'Accepted');
-        });
+          response.invites.forEach(invite => {
+            container.append(invite.type === 'group' ? groupInviteHTML(invite) : eventInviteHTML(invite));
+          });
 
-        $('.decline-btn').click(function () {
-          const id = $(this).data('id');
-          const type = $(this).data('type');
-          respondToInvite(id, type, 'Declined');
-        });
-      },
-      error: function () {
-        $('#invitesContainer').html(
-          '<div class="alert alert-danger">Error loading invitations. Please try again later.</div>'
-        );
-      }
-    });
+          if (response.next_cursor) {
+            container.append('<button type="button" class="list-group-item list-group-item-action text-center" id="invites-more">Load more invitations</button>');
+          }
+          else if (container.find('.list-group-item[id^="invite-"]').length === 0) {
+            container.html('<div class="text-center py-3"><p>No pending invitations</p></div>');
+          }
+        },
+        error: function () {
+          $('#invitesContainer').html(
+            '<div class="alert alert-danger">Error loading invitations. Please try again later.</div>'
+          );
+        }
+      });
+    }
 
     function respondToInvite(id, type, status) {
       $.ajax({
@@ -1424,8 +1687,7 @@ function load_calendar() {
                   );
                 });
 
-                fetch_unread_notifications_count();   // Refresh the notification count
-                fetch_pending_invites_count(); // Refresh the invite count
+                fetch_badge_counts(); // Refresh the notification and invite counts
               },
               error: function () {
                 $('#group-select').html('<option value="" disabled>Error loading groups</option>');
@@ -1441,15 +1703,21 @@ function load_calendar() {
           }
 
           // Remove the invite from view
-          $(`#invite-${id}`).fadeOut(300, function () {
+          $(`#invite-${type}-${id}`).fadeOut(300, function () {
             $(this).remove();
 
             // Check if no invites left
             const $invites = $('#invitesContainer .list-group-item[id^="invite-"]');
             if ($invites.length === 0) {
-              $('#invitesContainer').append(
-                '<div class="text-center py-3"><p>No pending invitations</p></div>'
-              );
+              if (invitesInbox.nextCursor) {
+                $('#invites-more').remove();
+                loadInvites(invitesInbox.nextCursor);
+              }
+              else {
+                $('#invitesContainer').append(
+                  '<div class="text-center py-3"><p>No pending invitations</p></div>'
+                );
+              }
             }
           });
 
@@ -1481,8 +1749,44 @@ function load_calendar() {
           const errorResponse = JSON.parse(response.responseText);
           showFlashMessage('error', errorResponse.error);
           modal.hide();
-          fetch_unread_notifications_count();   // Refresh the notification count
-          fetch_pending_invites_count(); // Refresh the invite count
+          fetch_badge_counts(); // Refresh the notification and invite counts
+        }
+      });
+    }
+
+    function respondToAllInvites(status) {
+      const invites = $('#invitesContainer .accept-btn').map(function () {
+        return { type: $(this).data('type'), id: $(this).data('id') };
+      }).get();
+      if (invites.length === 0) return;
+
+      $.ajax({
+        url: '/respond_invites',
+        type: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({
+          status: status,
+          invites: invites
+        }),
+        success: function () {
+          if (invites.some(invite => invite.type === 'group')) {
+            refresh_group_select();
+          }
+          if (invites.some(invite => invite.type === 'event')) {
+            calendar.removeAllEvents();
+            cleanupResources("all");
+            calendar.refetchEvents();
+          }
+          fetch_badge_counts(); // Refresh the notification and invite counts
+
+          loadInvites(); // The invites left, if the list had more pages
+          showFlashMessage('success', status === 'Accepted' ? 'Invitations accepted successfully' : 'Invitations declined');
+        },
+        error: function (response) {
+          const errorResponse = JSON.parse(response.responseText);
+          showFlashMessage('error', errorResponse.error);
+          modal.hide();
+          fetch_badge_counts(); // Refresh the notification and invite counts
         }
       });
     }
@@ -1493,6 +1797,70 @@ function load_calendar() {
     $(`#${fieldId}`).next('.invalid-feedback').text(message).show();
   }
 
+  // Export the events of the selected group (the dashboard for group 1) as an .ics file
+  document.querySelector('#export-events').addEventListener('click', () => {
+    const group_id = document.getElementById('group-select').value;
+    window.location.href = `/export_events/${group_id}`;
+  });
+
+  // Import the events of an .ics file into the selected group
+  // The server answers with one JSON line of progress per batch of events
+  document.querySelector('#import-events').addEventListener('click', () => {
+    document.getElementById('import-events-file').click();
+  });
+  document.querySelector('#import-events-file').addEventListener('change', async (e) => {
+    const file = e.target.files[0];
+    e.target.value = '';
+    if (!file) return;
+
+    const group_id = document.getElementById('group-select').value;
+    const formData = new FormData();
+    formData.append('file', file);
+
+    try {
+      const response = await fetch(`/import_events/${group_id}`, { method: 'POST', body: formData });
+      if (!response.ok) {
+        const errorResponse = await response.json();
+        throw new Error(errorResponse.error);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      let last = null;
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter(line => line).forEach(line => {
+          last = JSON.parse(line);
+          if (!last.done && !last.error) {
+            showFlashMessage('success', `Importing... ${last.imported} events imported`);
+          }
+        });
+      }
+
+      calendarCache.clear(group_id);
+      if (group_id != 1) {
+        // Clear cache of the dashboard as it might have changed due to group event
+        calendarCache.clear(1);
+      }
+      calendar.removeAllEvents();
+      cleanupResources("all");
+      calendar.refetchEvents();
+
+      if (!last || last.error) {
+        throw new Error(last ? `${last.error} (${last.imported} events imported)` : 'Unable to import events');
+      }
+      const skipped = last.skipped ? `, ${last.skipped} skipped` : '';
+      showFlashMessage('success', `${last.imported} events imported${skipped}`);
+    } catch (error) {
+      showFlashMessage('error', error.message);
+    }
+  });
+
   // View and modify group settings
   document.querySelector('#group-settings').addEventListener('click', edit_group_settings);
   function edit_group_settings() {
@@ -1989,8 +2357,7 @@ const notificationBadge = document.getElementById('notificationBadge');
 
 // Fetch number of unread notifications on page load
 document.addEventListener('DOMContentLoaded', function () {
-  fetch_unread_notifications_count();
-  fetch_pending_invites_count(); // Fetch pending invites count
+  fetch_badge_counts(); // Refresh the notification and invite counts
 });
 
 // Toggle notification popover
@@ -2035,173 +2402,232 @@ document.addEventListener('click', (e) => {
 });
 
 
-// Fetch pending invites count
-function fetch_pending_invites_count() {
+// Fetch both badge counts (pending invites and unread notifications) in one request
+function fetch_badge_counts() {
   $.ajax({
-    url: '/get_pending_invites_count',
+    url: '/get_badge_counts',
     type: 'GET',
     success: function (response) {
-      const pendingCount = response;
-      const pendingInvitesBadge = document.getElementById('inviteBadge');
-      const invites_icon = document.getElementById('invites-icon');
-      if (pendingCount > 0) {
-        pendingInvitesBadge.textContent = pendingCount;
-        if (pendingInvitesBadge.classList.contains('d-none')) {
-          pendingInvitesBadge.classList.remove('d-none');
-          invites_icon.classList.add('active');
-        }
-      }
-      else {
-        pendingInvitesBadge.textContent = 0;
-        if (!pendingInvitesBadge.classList.contains('d-none')) {
-          pendingInvitesBadge.classList.add('d-none');
-          invites_icon.classList.remove('active');
-        }
-      }
+      show_pending_invites_count(response.pending_invites);
+      show_unread_notifications_count(response.unread_notifications);
     },
     error: function () {
-      showFlashMessage('error', 'Error fetching pending invites count');
+      showFlashMessage('error', 'Error fetching notifications count');
     }
   });
 }
 
-// Fetch unread notifications count
-function fetch_unread_notifications_count() {
+// Show the pending invites count
+function show_pending_invites_count(pendingCount) {
+  const pendingInvitesBadge = document.getElementById('inviteBadge');
+  const invites_icon = document.getElementById('invites-icon');
+  if (pendingCount > 0) {
+    pendingInvitesBadge.textContent = pendingCount;
+    if (pendingInvitesBadge.classList.contains('d-none')) {
+      pendingInvitesBadge.classList.remove('d-none');
+      invites_icon.classList.add('active');
+    }
+  }
+  else {
+    pendingInvitesBadge.textContent = 0;
+    if (!pendingInvitesBadge.classList.contains('d-none')) {
+      pendingInvitesBadge.classList.add('d-none');
+      invites_icon.classList.remove('active');
+    }
+  }
+}
+
+// Show the unread notifications count
+function show_unread_notifications_count(unreadCount) {
   // Check if the notification badge exists before trying to access it
   if (notificationBadge === null) return;
 
+  notificationBadge.textContent = unreadCount;
+  if (unreadCount > 0) {
+    // Show the badge if there are unread notifications
+    if (notificationBadge.classList.contains('d-none')) {
+      notificationBadge.classList.remove('d-none');
+    }
+  } else {
+    // Hide the badge if there are no unread notifications
+    if (!notificationBadge.classList.contains('d-none')) {
+      notificationBadge.classList.add('d-none');
+    }
+  }
+}
+
+// Notification list state: the cursors of its newest item and of the next (older) page
+const notificationList = {
+  newestCursor: null,
+  nextCursor: null
+};
+
+// Relative time of an ISO 8601 timestamp, e.g. "3 hours ago"
+function human_readable_delta(timestamp) {
+  const seconds = (Date.now() - new Date(timestamp).getTime()) / 1000;
+  if (seconds < 0) return 'in the future';
+
+  const intervals = [
+    ['year', 31536000],
+    ['month', 2592000],
+    ['week', 604800],
+    ['day', 86400],
+    ['hour', 3600],
+    ['minute', 60],
+    ['second', 1]
+  ];
+  for (const [name, count] of intervals) {
+    const value = Math.floor(seconds / count);
+    if (value >= 1) {
+      return (value === 1) ? `${value} ${name} ago` : `${value} ${name}s ago`;
+    }
+  }
+  return 'Just Now';
+}
+
+function notification_html(notification) {
+  return `
+      <div class="notification-item unread" data-id="${notification.id}" data-type="${notification.type}">
+          <div class="p-3 notification-content">
+              <p class="mb-0">You have been invited to ${(notification.type === 'group') ? 'group ' : 'event '} ${notification.name}</p>
+          </div>
+          <div class="notification-footer p-2" data-time="${notification.invite_time}">${human_readable_delta(notification.invite_time)}</div>
+      </div>`;
+}
+
+// Keep the rounded corner on the last item and the "load more" row after it
+function finish_notification_list() {
+  const notificationsContainer = $('#notificationList');
+  notificationsContainer.find('.notification-more').remove();
+  notificationsContainer.find('.notification-item').removeClass('last-notification');
+
+  if (notificationList.nextCursor) {
+    notificationsContainer.append(`
+      <div class="notification-item notification-more last-notification text-center p-2">Load older notifications</div>`);
+  }
+  else if (notificationsContainer.find('.notification-item').length === 0) {
+    notificationsContainer.html('<div class="text-center py-3"><p>No unread notifications</p></div>');
+  }
+  else {
+    notificationsContainer.find('.notification-item').last().addClass('last-notification');
+  }
+}
+
+// Function to get notifications
+// Loads the first page when the popover opens, older pages on demand
+function get_notifications(before) {
   $.ajax({
-    url: '/get_unread_notifications_count',
+    url: '/get_notifications',
     type: 'GET',
+    data: before ? { before: before } : {},
     success: function (response) {
-      const unreadCount = response;
-      notificationBadge.textContent = unreadCount;
-      if (unreadCount > 0) {
-        // Show the badge if there are unread notifications
-        if (notificationBadge.classList.contains('d-none')) {
-          notificationBadge.classList.remove('d-none');
-        }
-      } else {
-        // Hide the badge if there are no unread notifications
-        if (!notificationBadge.classList.contains('d-none')) {
-          notificationBadge.classList.add('d-none');
-        }
+      // Process and display notifications
+      const notificationsContainer = $('#notificationList');
+      if (!before) {
+        notificationsContainer.empty();
+        notificationList.newestCursor = response.newest_cursor;
       }
+      notificationList.nextCursor = response.next_cursor;
+      show_unread_notifications_count(response.unread);
+
+      notificationsContainer.append(response.notifications.map(notification_html).join(''));
+      finish_notification_list();
     },
     error: function () {
-      showFlashMessage('error', 'Error fetching notifications count');
-    }
+      showFlashMessage('error', 'Error loading notifications. Please try again later.');
+    },
   });
 }
 
-// Function to get notifications
-function get_notifications() {
+// Add the notifications newer than the first one shown, e.g. after an invite arrives
+function get_new_notifications() {
+  if (!notificationList.newestCursor) {
+    get_notifications();
+    return;
+  }
   $.ajax({
     url: '/get_notifications',
     type: 'GET',
+    data: { since: notificationList.newestCursor },
     success: function (response) {
-      // Process and display notifications
-      const notificationsContainer = $('#notificationList');
-      notificationsContainer.empty();
-
-      // Update the number of unread notifications
-      const unreadCount = response.length;
-      if (unreadCount > 0) {
-        notificationBadge.textContent = unreadCount;
-        notificationBadge.classList.remove('d-none');
-      } else {
-        notificationBadge.classList.add('d-none');
-      }
-
-      // No notifications available
-      if (response.length === 0) {
-        notificationsContainer.html('<div class="text-center py-3"><p>No unread notifications</p></div>');
+      if (response.next_cursor) {
+        get_notifications(); // Too many to add, start over
         return;
       }
+      notificationList.newestCursor = response.newest_cursor;
+      show_unread_notifications_count(response.unread);
 
-      response.forEach((notification, index, array) => {
-        // Check if this notification is the last one in the list
-        if (index === array.length - 1) {
-          const notificationHTML = `
-              <div class="notification-item ${(notification.read_status === "Read") ? '' : 'unread'} last-notification" data-id="${notification.id}" data-type="${notification.type}">
-                  <div class="p-3 notification-content">
-                      <p class="mb-0">You have been invited to ${(notification.type === 'group') ? 'group ' : 'event '} ${notification.name}</p>
-                  </div>
-                  <div class="notification-footer p-2">${notification.passed_time}</div>
-              </div>`;
-          notificationsContainer.append(notificationHTML);
-        }
-        else {
-          const notificationHTML = `
-              <div class="notification-item ${(notification.read_status === "Read") ? '' : 'unread'}" data-id="${notification.id}" data-type="${notification.type}">
-                  <div class="p-3 notification-content">
-                      <p class="mb-0">You have been invited to ${(notification.type === 'group') ? 'group ' : 'event '} ${notification.name}</p>
-                  </div>
-                  <div class="notification-footer p-2">${notification.passed_time}</div>
-              </div>`;
-          notificationsContainer.append(notificationHTML);
+      const notificationsContainer = $('#notificationList');
+      if (response.notifications.length > 0) {
+        if (notificationsContainer.find('.notification-item').length === 0) {
+          notificationsContainer.empty();
         }
-      });
-
-      /* Setup click handlers for notifications */
-      // Mark notifications as read when clicked
-      const unread_notifications = document.querySelectorAll('.notification-item.unread');
-      unread_notifications.forEach(notification => {
-        notification.addEventListener('click', () => {
-          // Check if notification is already read
-          if (!notification.classList.contains('unread')) return;
+        notificationsContainer.prepend(response.notifications.map(notification_html).join(''));
+        finish_notification_list();
+      }
+    }
+  });
+}
 
-          const notification_id = notification.getAttribute('data-id');
-          const notification_type = notification.getAttribute('data-type');
+// Click handlers live on the list, so items added later have them too
+$('#notificationList').on('click', '.notification-more', function () {
+  $(this).remove();
+  get_notifications(notificationList.nextCursor);
+});
 
-          // Send a request to mark the notification as read
-          $.ajax({
-            url: '/get_notifications',
-            type: 'POST',
-            contentType: 'application/json',
-            data: JSON.stringify({
-              id: notification_id,
-              type: notification_type
-            }),
-            success: function () {
-              notification.classList.remove('unread');
-              updateNotificationCount(); // Update the notification count
-            },
-            error: function () {
-              showFlashMessage('error', 'Error marking notification as read');
-            }
-          });
-        });
-      });
+// Mark notifications as read when clicked
+$('#notificationList').on('click', '.notification-item.unread:not(.notification-more)', function () {
+  const notification = this;
+  const notification_id = notification.getAttribute('data-id');
+  const notification_type = notification.getAttribute('data-type');
 
-      // Disable text selection on double click with mousedown
-      unread_notifications.forEach(notification => {
-        notification.addEventListener('mousedown', function (e) {
-          e.preventDefault();
-        }, false);
-      });
+  // Send a request to mark the notification as read
+  $.ajax({
+    url: '/get_notifications',
+    type: 'POST',
+    contentType: 'application/json',
+    data: JSON.stringify({
+      id: notification_id,
+      type: notification_type
+    }),
+    success: function () {
+      notification.classList.remove('unread');
+      const unreadCount = Math.max(0, (parseInt(notificationBadge.textContent) || 0) - 1);
+      show_unread_notifications_count(unreadCount); // Update the notification count
     },
     error: function () {
-      showFlashMessage('error', 'Error loading notifications. Please try again later.');
-    },
+      showFlashMessage('error', 'Error marking notification as read');
+    }
   });
+});
 
-  // Update notification badge count
-  function updateNotificationCount() {
-    const unreadCount = document.querySelectorAll('.notification-item.unread').length;
-    const notificationBadge = document.getElementById('notificationBadge');
+// Disable text selection on double click with mousedown
+$('#notificationList').on('mousedown', '.notification-item', function (e) {
+  e.preventDefault();
+});
 
-    // Check if the badge is hidden, then unhide it
-    if (notificationBadge.classList.contains('d-none')) {
-      notificationBadge.classList.remove('d-none');
-    }
-    // Update the badge count
-    notificationBadge.textContent = unreadCount;
-    if (unreadCount === 0) {
-      notificationBadge.classList.add('d-none');
+// Mark everything up to the newest notification shown as read, in one request
+$('#markAllRead').on('click', function (e) {
+  e.stopPropagation();
+  // Nothing shown, nothing to mark
+  if (!notificationList.newestCursor) return;
+  $.ajax({
+    url: '/read_notifications',
+    type: 'POST',
+    contentType: 'application/json',
+    data: JSON.stringify({
+      all: true,
+      until: notificationList.newestCursor
+    }),
+    success: function (response) {
+      $('#notificationList .notification-item.unread').removeClass('unread');
+      show_unread_notifications_count(response.unread);
+    },
+    error: function () {
+      showFlashMessage('error', 'Error marking notifications as read');
     }
-  }
-}
+  });
+});
 
 // ------------------------------------ NOTIFICATION HANDLER --------------------------------------------
 
@@ -0,0 +1,60 @@
+from flask import Response, current_app, json, request, stream_with_context
+import zlib
+
+# Brotli is optional, without it clients get gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encode batches (lists) of items as one JSON array, one batch at a time
+def json_array_chunks(batches):
+    yield '['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        body = ','.join(json.dumps(item) for item in batch)
+        yield body if first else ',' + body
+        first = False
+    yield ']'
+
+# Best compression the client accepts: 'br', 'gzip' or None
+def negotiate_encoding():
+    if not current_app.config['FEED_COMPRESSION']:
+        return None
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+# Compress text chunks, flushing after each one so the client can start parsing
+# before the whole body is encoded
+def encode_chunks(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=4)
+        for chunk in chunks:
+            yield compressor.process(chunk.encode()) + compressor.flush()
+        yield compressor.finish()
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    else:
+        for chunk in chunks:
+            yield chunk.encode()
+
+# Response streaming text chunks, compressed when the client accepts it
+# The chunks are produced inside the request context, so they can keep using the
+# database session and current_user
+def streaming_response(chunks, mimetype):
+    encoding = negotiate_encoding()
+    response = Response(stream_with_context(encode_chunks(chunks, encoding)), mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# Response streaming the items of `batches` (an iterable of lists) as a JSON array
+# Only one batch is held in memory at a time
+def streaming_json_response(batches):
+    return streaming_response(json_array_chunks(batches), 'application/json')
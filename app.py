@@ -1,4 +1,4 @@
 from Project import app
 
 if __name__ == '__main__':
-    app.run(debug=True,host="0.0.0.0")
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'],host="0.0.0.0")
\ No newline at end of file
@@ -0,0 +1,132 @@
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask_login import current_user
+from Project import app
+from Project.push import get_broker, async_event_stream
+import asyncio
+import io
+import os
+
+# Production entry point: `python asgi.py` or `uvicorn asgi:application --workers 4`
+# Views run on a pool of WSGI_THREADS threads per worker, shared by all the requests of
+# the worker. a2wsgi writes a response through a small bounded buffer, so a client
+# slower than the view would keep its thread until the last chunk is buffered. The
+# calendar feeds (GET /data/...) are the large responses: their view runs to the end
+# on the pool, and the event loop writes the finished body to the client.
+# /stream connections stay open for as long as the page does and would starve the pool:
+# they are served on the event loop instead, up to STREAM_MAX_CONNECTIONS per worker
+app.config['DEBUG'] = False
+wsgi_application = WSGIMiddleware(app, workers=int(os.environ.get('WSGI_THREADS', 32)))
+
+open_streams = 0
+
+# User id of the session behind an ASGI request, None when nobody is signed in
+def session_user_id(scope):
+    with app.request_context(build_environ(scope, io.BytesIO())):
+        if current_user.is_authenticated:
+            return current_user.user_id
+    return None
+
+# Run the Flask app for a request without a body to the end, returns the status,
+# headers and body chunks (already compressed when the client accepts it)
+def buffered_response(scope):
+    started = []
+    body = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+        return body.append
+
+    result = app(build_environ(scope, io.BytesIO()), start_response)
+    try:
+        for chunk in result:
+            body.append(chunk)
+    finally:
+        # Runs the response's close callbacks (metrics) on this thread too
+        if hasattr(result, 'close'):
+            result.close()
+    return started[0], started[1], body
+
+# A calendar feed: built on the view threads, sent from the event loop so a slow
+# client only costs the memory of its body
+async def feed(scope, send):
+    loop = asyncio.get_running_loop()
+    status, headers, body = await loop.run_in_executor(wsgi_application.executor, buffered_response, scope)
+    await send({
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+    })
+    for chunk in body:
+        if chunk:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+async def send_text(send, status, content_type, body=b'', more_body=False):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no')
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+# The /stream view on the event loop: writes the push messages of the user until the
+# client disconnects
+async def stream(receive, send, user_id):
+    with app.app_context():
+        broker = get_broker()
+
+    async def write():
+        await send_text(send, 200, b'text/event-stream; charset=utf-8', more_body=True)
+        async for chunk in async_event_stream(broker, user_id):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(write()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def application(scope, receive, send):
+    global open_streams
+    if scope['type'] == 'http' and scope['path'] == '/stream':
+        # Signing in reads the session and the user, a short job for a thread
+        user_id = await asyncio.to_thread(session_user_id, scope)
+        if user_id is not None:
+            if open_streams >= app.config['STREAM_MAX_CONNECTIONS']:
+                # The calendar then works without push, refreshing /updates on each fetch
+                await send_text(send, 503, b'text/plain; charset=utf-8', b'Too many open streams')
+                return
+            open_streams += 1
+            try:
+                await stream(receive, send, user_id)
+            finally:
+                open_streams -= 1
+            return
+        # Nobody signed in: the Flask view answers as for any other login_required route
+
+    elif scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'].startswith('/data/'):
+        await feed(scope, send)
+        return
+
+    await wsgi_application(scope, receive, send)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(
+        'asgi:application',
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 8000)),
+        workers=int(os.environ.get('WEB_CONCURRENCY', 4)),
+        proxy_headers=True
+    )
@@ -0,0 +1,288 @@
+from synthetic import add_scale_arguments, scale_from_arguments, generate, load_app
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Benchmarks of the hot routes through the Flask test client against a synthetic
+# database (see synthetic.py): latency percentiles, SQL statements per request,
+# response size and memory, optionally compared with a saved baseline
+# Runs offline, the only requirements are the application's own
+
+# Calendar range the feeds are asked for, like FullCalendar's month view
+WINDOW = {'start': '2026-06-01T00:00:00Z', 'end': '2026-07-13T00:00:00Z'}
+
+# SQL statements run by each thread, counted by an engine listener
+_query_counts = threading.local()
+
+def _count_query(*args):
+    _query_counts.value = getattr(_query_counts, 'value', 0) + 1
+
+# Test client signed in as a user, without going through the sign-in form
+def signed_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+# A scenario makes one request with a client. prepare, when set, runs untimed
+# before each request and its result is passed along (e.g. the current version of
+# an event for an update)
+Scenario = namedtuple('Scenario', 'name request writes prepare')
+
+# Setup state (event ids, members, cursors) comes from the generated database
+def build_scenarios(app, db):
+    from Project.models import Event, Member, ChangeLog
+    from sqlalchemy import select
+
+    with app.app_context():
+        group_id = db.session.scalar(
+            select(Member.group_id).where(Member.user_id == 1, Member.permission == 'Admin').order_by(Member.group_id)
+        )
+        members = db.session.scalars(
+            select(Member.user_id).where(Member.group_id == group_id, Member.status == 'Accepted').limit(4)
+        ).all()
+        event_id = db.session.scalar(
+            select(Event.event_id).where(Event.group_id == group_id, Event.recurrence_rule.is_(None)).order_by(Event.event_id)
+        )
+        # The group feed holds the change log rows of the group without a user_id, the
+        # cursor leaves its 200 newest changes to /updates
+        updates_cursor = db.session.scalar(
+            select(ChangeLog.change_id)
+            .where(ChangeLog.group_id == group_id, ChangeLog.user_id.is_(None))
+            .order_by(ChangeLog.change_id.desc())
+            .offset(200)
+            .limit(1)
+        ) or 0
+    participants = [{'name': f'user{user_id}@example.com'} for user_id in members]
+
+    def data_group(client, prepared):
+        return client.get(f'/data/{group_id}', query_string=WINDOW)
+
+    def data_group_all(client, prepared):
+        return client.get(f'/data/{group_id}')
+
+    def data_dashboard(client, prepared):
+        return client.get('/data/1', query_string=WINDOW)
+
+    def updates(client, prepared):
+        # The last 200 changes of the group
+        return client.get(f'/data/{group_id}/updates', query_string=dict(WINDOW, cursor=updates_cursor))
+
+    def check_invites(client, prepared):
+        return client.get('/check_invites')
+
+    def notifications(client, prepared):
+        return client.get('/get_notifications')
+
+    def add_event(client, prepared):
+        return client.post('/add_event', json={
+            'title': 'Benchmark event',
+            'description': 'Added by the benchmark',
+            'start': '2026-06-10T10:00',
+            'end': '2026-06-10T11:00',
+            'group_id': group_id,
+            'participants': participants
+        })
+
+    def event_version():
+        with app.app_context():
+            version = db.session.scalar(select(Event.version_number).where(Event.event_id == event_id))
+            db.session.remove()
+        return version
+
+    moves = iter(range(10 ** 9))
+    def update_event(client, version):
+        hour = 8 + next(moves) % 8
+        return client.put(f'/update_event/{event_id}', json={
+            'version': version,
+            'title': 'Benchmark update',
+            'description': 'Updated by the benchmark',
+            'start': f'2026-06-11T{hour:02d}:00',
+            'end': f'2026-06-11T{hour + 1:02d}:00',
+            'added_participants': [],
+            'changed_participants': [participants[-1]['name']],
+            'deleted_participants': []
+        })
+
+    return [
+        Scenario('data_group', data_group, False, None),
+        Scenario('data_group_all', data_group_all, False, None),
+        Scenario('data_dashboard', data_dashboard, False, None),
+        Scenario('updates', updates, False, None),
+        Scenario('check_invites', check_invites, False, None),
+        Scenario('notifications', notifications, False, None),
+        # Writes always run on one thread
+        Scenario('add_event', add_event, True, None),
+        Scenario('update_event', update_event, True, event_version)
+    ]
+
+# Nearest-rank percentile of sorted values
+def percentile(values, share):
+    index = max(0, min(len(values) - 1, int(round(share * len(values) + 0.5)) - 1))
+    return values[index]
+
+# One timed request: (seconds, statements, response bytes, status)
+def timed_request(scenario, client):
+    prepared = scenario.prepare() if scenario.prepare else None
+    _query_counts.value = 0
+    started = time.perf_counter()
+    response = scenario.request(client, prepared)
+    body = response.get_data()
+    response.close()
+    return time.perf_counter() - started, _query_counts.value, len(body), response.status_code
+
+def run_scenario(app, scenario, iterations, warmup, concurrency):
+    threads = 1 if scenario.writes else concurrency
+    clients = [signed_in_client(app, 1) for _ in range(threads)]
+    for _ in range(warmup):
+        timed_request(scenario, clients[0])
+
+    started = time.perf_counter()
+    if threads == 1:
+        samples = [timed_request(scenario, clients[0]) for _ in range(iterations)]
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            samples = list(pool.map(lambda i: timed_request(scenario, clients[i % threads]), range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    # One more request under tracemalloc, apart from the timed ones it would slow down
+    tracemalloc.start()
+    timed_request(scenario, clients[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = sorted(sample[0] for sample in samples)
+    errors = sum(1 for sample in samples if sample[3] >= 400)
+    return {
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'requests_per_s': len(samples) / elapsed,
+        'queries': max(sample[1] for sample in samples),
+        'bytes': samples[-1][2],
+        'peak_kb': peak / 1024,
+        'errors': errors,
+        'threads': threads
+    }
+
+COLUMNS = (
+    ('p50_ms', 'p50 ms', '{:.2f}'),
+    ('p99_ms', 'p99 ms', '{:.2f}'),
+    ('requests_per_s', 'req/s', '{:.0f}'),
+    ('queries', 'queries', '{}'),
+    ('bytes', 'bytes', '{}'),
+    ('peak_kb', 'peak KiB', '{:.0f}'),
+    ('errors', 'errors', '{}')
+)
+
+# Metrics compared with the baseline, a higher value being a regression
+COMPARED = ('p50_ms', 'p99_ms', 'queries', 'peak_kb')
+
+def print_report(results, baseline):
+    header = f"{'scenario':<16}" + ''.join(f'{title:>12}' for _, title, _ in COLUMNS)
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        print(f'{name:<16}' + ''.join(f'{pattern.format(result[key]):>12}' for key, _, pattern in COLUMNS))
+        if baseline and name in baseline:
+            deltas = []
+            for key in COMPARED:
+                before = baseline[name][key]
+                if before:
+                    deltas.append(f'{key} {(result[key] - before) / before * 100:+.0f}%')
+            print(f"{'  vs baseline':<16}" + ', '.join(deltas))
+
+# Scenarios whose compared metrics grew by more than threshold percent
+def regressions(results, baseline, threshold):
+    found = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in COMPARED:
+            before = baseline[name][key]
+            if before and (result[key] - before) / before * 100 > threshold:
+                found.append(f'{name} {key}: {before:.2f} -> {result[key]:.2f}')
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot routes against a synthetic database')
+    parser.add_argument('--db', help='Database to use, generated there when missing (default: a temporary file)')
+    add_scale_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario (default: 50)')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests first, e.g. to fill the caches (default: 3)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Threads sending the read requests (default: 1)')
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Run only these scenarios')
+    parser.add_argument('--output', help='Write the results as JSON, e.g. to use as a baseline')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--max-regression', type=float, default=25.0,
+                        help='Percent growth of p50 / p99 / queries / memory over the baseline reported as a regression (default: 25)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='calendar-bench-'), 'bench.db')
+    scale = scale_from_arguments(args)
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        summary = generate(path, seed=args.seed, **scale)
+        print(f"Generated {', '.join(f'{count} {name}' for name, count in summary.items())} "
+              f'in {time.perf_counter() - started:.1f}s ({path})')
+    load_app(path)
+
+    from Project import app, db
+    from sqlalchemy import event
+    app.config['TESTING'] = True
+    with app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', _count_query)
+
+    results = {}
+    for scenario in build_scenarios(app, db):
+        if args.only and scenario.name not in args.only:
+            continue
+        results[scenario.name] = run_scenario(app, scenario, args.iterations, args.warmup, args.concurrency)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            saved = json.load(file)
+        baseline = saved['results']
+        # Numbers are only comparable for the same data and load
+        for key, value in (('scale', scale), ('concurrency', args.concurrency)):
+            if saved['environment'].get(key) != value:
+                print(f"Warning: the baseline ran with {key} {saved['environment'].get(key)}, this run with {value}")
+    print_report(results, baseline)
+    print(f'Max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'environment': {
+                    'python': platform.python_version(),
+                    'sqlite': sqlite3.sqlite_version,
+                    'platform': platform.platform(),
+                    'scale': scale,
+                    'iterations': args.iterations,
+                    'concurrency': args.concurrency
+                },
+                'results': results
+            }, file, indent=2)
+
+    if baseline:
+        found = regressions(results, baseline, args.max_regression)
+        if found:
+            print('Regressions over the baseline:')
+            for regression in found:
+                print('  ' + regression)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
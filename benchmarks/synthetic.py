@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+import argparse
+import os
+import random
+import runpy
+import sys
+import time
+
+# Synthetic calendar data for the benchmarks: users, groups with members, group
+# events with participants, individual events and a change log, written straight into
+# a scratch SQLite database with multi-row INSERTs (no HTTP, no ORM objects)
+# The schema comes from create_database.py, so it is exactly the application's
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scale presets: users, groups, members per group, events per group, participants
+# per event, individual events per user
+SCALES = {
+    'tiny': dict(users=50, groups=5, members=10, events=100, participants=4, personal=10),
+    'small': dict(users=200, groups=20, members=20, events=300, participants=5, personal=20),
+    'medium': dict(users=2000, groups=100, members=40, events=1000, participants=8, personal=50),
+    'large': dict(users=10000, groups=300, members=60, events=3000, participants=10, personal=100)
+}
+
+# Share of the events that repeat weekly
+RECURRING_SHARE = 0.05
+
+# Events are spread over this year
+YEAR = 2026
+
+# Password of every generated user
+PASSWORD = 'benchmark'
+
+# Rows per INSERT batch
+INSERT_BATCH = 5000
+
+# Import the application against the database at path
+# DATABASE_URL must be set before Project is imported, it is read once
+def load_app(path):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(path)
+    os.environ.setdefault('FLASK_DEBUG', '0')
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    import Project
+    return Project
+
+def _insert(connection, table, rows):
+    for offset in range(0, len(rows), INSERT_BATCH):
+        connection.execute(table.insert(), rows[offset:offset + INSERT_BATCH])
+
+def _random_time(rng):
+    day = datetime(YEAR, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randrange(365))
+    start = day.replace(hour=rng.randrange(8, 19), minute=rng.choice((0, 15, 30, 45)))
+    return start, start + timedelta(minutes=rng.choice((30, 45, 60, 90, 120)))
+
+# Event row with a random time, one in RECURRING_SHARE repeating weekly
+def _event_row(rng, name, creator, group_id):
+    from Project.recurrence import series_end
+    start, end = _random_time(rng)
+    rule = None
+    if rng.random() < RECURRING_SHARE:
+        rule = 'FREQ=WEEKLY' if rng.random() < 0.5 else f'FREQ=WEEKLY;COUNT={rng.randrange(5, 30)}'
+    return {
+        'event_name': name,
+        'description': f'Synthetic event {name}',
+        'start_time': start,
+        'end_time': end,
+        'recurrence_rule': rule,
+        'recurrence_exceptions': None,
+        'recurrence_end': series_end(start, end, rule) if rule else None,
+        'version_number': 1,
+        'cache_number': 0,
+        'creator': creator,
+        'group_id': group_id
+    }
+
+# Fill a new database at path. User 1 is a member of every group (as Admin of the
+# ones it creates), so it sees the largest dashboard, invites and notifications;
+# the benchmarks sign in as it. Returns a summary of the row counts
+def generate(path, users, groups, members, events, participants, personal, seed=1):
+    if os.path.exists(path):
+        raise FileExistsError(f'{path} exists, remove it or pick another path')
+    load_app(path)
+    from Project import app, db
+    from Project.models import User, Group, Member, Event, Participate, ChangeLog
+    from werkzeug.security import generate_password_hash
+    from sqlalchemy import text
+
+    rng = random.Random(seed)
+    members = min(members, users)
+    participants = min(participants, members)
+
+    # Tables and indexes exactly as create_database.py makes them
+    runpy.run_path(os.path.join(REPO_ROOT, 'create_database.py'))
+
+    with app.app_context(), db.engine.begin() as connection:
+        # Hashing is slow on purpose, every user gets the same hash
+        password = generate_password_hash(PASSWORD)
+        _insert(connection, User.__table__, [
+            {'user_id': user_id, 'name': f'User {user_id}', 'email': f'user{user_id}@example.com', 'password': password}
+            for user_id in range(1, users + 1)
+        ])
+
+        # Group 1 holds the individual events
+        _insert(connection, Group.__table__, [{'group_id': 1, 'group_name': 'No Group', 'description': 'No Description', 'version_number': 1}] + [
+            {'group_id': group_id, 'group_name': f'Group {group_id}', 'description': 'Synthetic group', 'version_number': 1}
+            for group_id in range(2, groups + 2)
+        ])
+
+        member_rows = []
+        group_members = {}
+        for group_id in range(2, groups + 2):
+            owner = rng.randrange(1, users + 1)
+            others = [user_id for user_id in rng.sample(range(1, users + 1), members) if user_id not in (owner, 1)]
+            chosen = [owner] + ([1] if owner != 1 else []) + others[:max(0, members - 2)]
+            group_members[group_id] = chosen
+            for user_id in chosen:
+                member_rows.append({
+                    'user_id': user_id,
+                    'group_id': group_id,
+                    'permission': 'Admin' if user_id in (owner, 1) else rng.choice(('Editor', 'Viewer')),
+                    # A few invites are still open
+                    'status': 'Pending' if user_id not in (owner, 1) and rng.random() < 0.05 else 'Accepted',
+                    'read_status': 'Read' if rng.random() < 0.7 else 'Unread'
+                })
+        _insert(connection, Member.__table__, member_rows)
+
+        event_rows = []
+        for group_id, chosen in group_members.items():
+            for number in range(events):
+                event_rows.append(_event_row(rng, f'G{group_id}-{number}', chosen[0], group_id))
+        for user_id in range(1, users + 1):
+            for number in range(personal):
+                event_rows.append(_event_row(rng, f'U{user_id}-{number}', user_id, 1))
+        for event_id, row in enumerate(event_rows, 1):
+            row['event_id'] = event_id
+        _insert(connection, Event.__table__, event_rows)
+
+        participate_rows = []
+        change_rows = []
+        for row in event_rows:
+            change_rows.append({'event_id': row['event_id'], 'group_id': row['group_id'], 'user_id': None, 'action': 'Created'})
+            if row['group_id'] == 1:
+                if row['creator'] == 1:
+                    change_rows.append({'event_id': row['event_id'], 'group_id': 1, 'user_id': 1, 'action': 'Created'})
+                continue
+            for user_id in rng.sample(group_members[row['group_id']], participants):
+                status = rng.choices(('Accepted', 'Pending', 'Declined'), (6, 3, 1))[0]
+                participate_rows.append({
+                    'user_id': user_id,
+                    'event_id': row['event_id'],
+                    'status': status,
+                    'read_status': 'Read' if rng.random() < 0.7 else 'Unread'
+                })
+                if user_id == 1:
+                    change_rows.append({'event_id': row['event_id'], 'group_id': row['group_id'], 'user_id': 1, 'action': 'Created'})
+        _insert(connection, Participate.__table__, participate_rows)
+        _insert(connection, ChangeLog.__table__, change_rows)
+
+    # Planner statistics for the loaded data
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text('ANALYZE'))
+
+    return {
+        'users': users,
+        'groups': groups,
+        'memberships': len(member_rows),
+        'events': len(event_rows),
+        'participations': len(participate_rows),
+        'changes': len(change_rows)
+    }
+
+def add_scale_arguments(parser):
+    parser.add_argument('--scale', choices=SCALES, default='small', help='Preset sizes (default: small)')
+    for name in ('users', 'groups', 'members', 'events', 'participants', 'personal'):
+        parser.add_argument(f'--{name}', type=int, help=f'Override the preset number of {name}')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+
+def scale_from_arguments(args):
+    scale = dict(SCALES[args.scale])
+    for name in scale:
+        if getattr(args, name) is not None:
+            scale[name] = getattr(args, name)
+    return scale
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic calendar database for the benchmarks')
+    parser.add_argument('path', help='SQLite database file to create')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = generate(args.path, seed=args.seed, **scale_from_arguments(args))
+    print(', '.join(f'{count} {name}' for name, count in summary.items()), f'in {time.perf_counter() - started:.1f}s')
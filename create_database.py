@@ -1,5 +1,43 @@
 from Project import app,db
 from Project.models import *
+from sqlalchemy import func, inspect, text
+import sys
 
 with app.app_context():
-    db.create_all()
\ No newline at end of file
+    # Create the missing tables (all of them for a new database)
+    db.create_all()
+
+    # Upgrade path for databases created by older versions: create_all() does not
+    # touch existing tables, so add the columns and indexes they are missing
+
+    # New columns are all nullable, so ADD COLUMN fills them with NULL
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+    # The unique membership index cannot be built over duplicate memberships
+    duplicates = (
+        db.session.query(Member.user_id, Member.group_id, func.count(Member.member_id))
+        .group_by(Member.user_id, Member.group_id)
+        .having(func.count(Member.member_id) > 1)
+        .all()
+    )
+    if duplicates:
+        print("Duplicate memberships (user_id, group_id, count), remove them and run again:")
+        for duplicate in duplicates:
+            print(f"  {tuple(duplicate)}")
+        sys.exit(1)
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    # Refresh the statistics the query planner uses to pick between the indexes
+    if db.engine.dialect.name in ('sqlite', 'postgresql'):
+        with db.engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+# The app reads its database at import, point it at a throwaway SQLite file first
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+import pytest
+from Project import app, db
+from Project.push import get_broker
+import Project.routes
+
+@pytest.fixture
+def test_app():
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    # Any relationship the routes would load with its own query fails the test
+    app.config['STRICT_LOADING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+# A test client signed in as a new user
+@pytest.fixture
+def sign_in(test_app):
+    def sign_in(email, name='User'):
+        client = test_app.test_client()
+        client.post('/signup', data=dict(name=name, email=email, password='password1', confirm_password='password1'))
+        client.post('/signin', data=dict(email=email, password='password1'))
+        return client
+    return sign_in
+
+# Subscribe to the push messages of a user, returns a function draining them
+@pytest.fixture
+def push_messages(test_app):
+    subscriptions = []
+    def subscribe(user_id):
+        with test_app.app_context():
+            broker = get_broker()
+        connection = broker.subscribe(user_id)
+        subscriptions.append((broker, user_id, connection))
+        def drain():
+            messages = []
+            while not connection.empty():
+                messages.append(connection.get_nowait())
+            return messages
+        return drain
+    yield subscribe
+    for broker, user_id, connection in subscriptions:
+        broker.unsubscribe(user_id, connection)
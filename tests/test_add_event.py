@@ -0,0 +1,51 @@
+from Project import db
+from Project.models import User, Event
+
+def user_id(app, email):
+    with app.app_context():
+        return db.session.scalar(db.select(User.user_id).where(User.email == email))
+
+def event_json(group_id, participants=()):
+    return {
+        'title': 'Review',
+        'description': '',
+        'start': '2026-10-01T10:00:00+00:00',
+        'end': '2026-10-01T11:00:00+00:00',
+        'group_id': group_id,
+        'participants': [{'name': email} for email in participants]
+    }
+
+# The calendar posts the group id as a string
+def test_personal_event_with_string_group_id(test_app, sign_in, push_messages):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    messages = push_messages(user_id(test_app, 'alice@example.com'))
+
+    response = alice.post('/add_event', json=event_json('1'))
+
+    assert response.status_code == 200
+    assert messages() == [{'type': 'calendar', 'group_id': 1}]
+    with test_app.app_context():
+        assert db.session.scalar(db.select(Event.group_id)) == 1
+
+def test_group_event_with_string_group_id(test_app, sign_in, push_messages):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    alice.post('/create_group', json={'name': 'Team', 'description': '', 'members': ['bob@example.com'], 'permissions': ['Editor']})
+    invite = bob.get('/check_invites').json['invites'][0]
+    bob.post('/check_invites', json={'invite_type': invite['type'], 'invite_id': invite['id'], 'status': 'Accepted'})
+    group_id = next(group['group_id'] for group in alice.get('/get_groups').json if group['name'] == 'Team')
+    messages = push_messages(user_id(test_app, 'bob@example.com'))
+
+    response = alice.post('/add_event', json=event_json(str(group_id), ['alice@example.com', 'bob@example.com']))
+
+    assert response.status_code == 200
+    received = messages()
+    assert {'type': 'calendar', 'group_id': group_id} in received
+    assert {'type': 'invites'} in received
+
+def test_invalid_group_id(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+
+    assert alice.post('/add_event', json=event_json('personal')).status_code == 400
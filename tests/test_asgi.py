@@ -0,0 +1,64 @@
+import asyncio
+import importlib
+import json
+import pytest
+
+# Runs asgi.py as the production server does, then restores the debug flag it turns off
+@pytest.fixture
+def asgi_app(test_app):
+    debug = test_app.config['DEBUG']
+    import asgi
+    yield importlib.reload(asgi)
+    test_app.config['DEBUG'] = debug
+
+def test_profile_header_ignored_under_asgi(test_app, asgi_app):
+    response = test_app.test_client().get('/signin', headers={'X-Debug-Profile': '1'})
+
+    assert test_app.config['DEBUG'] is False
+    assert 'Server-Timing' not in response.headers
+    assert 'X-Request-Profile' not in response.headers
+
+def test_profile_header_in_debug_mode(test_app, asgi_app):
+    test_app.config['DEBUG'] = True
+
+    response = test_app.test_client().get('/signin', headers={'X-Debug-Profile': '1'})
+
+    assert 'Server-Timing' in response.headers
+
+# Drive the ASGI application with one request, returns (status, headers, body)
+def asgi_get(application, path, cookie):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 5000), 'server': ('localhost', 80)
+    }
+    asyncio.run(application(scope, receive, send))
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    assert messages[-1]['more_body'] is False
+    return start['status'], dict(start['headers']), body
+
+# The feeds are built on the view threads and sent by the event loop as a whole
+def test_feed_served_from_the_event_loop(test_app, asgi_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    alice.post('/add_event', json={
+        'title': 'Review', 'description': '', 'group_id': '1', 'participants': [],
+        'start': '2026-10-01T10:00:00+00:00', 'end': '2026-10-01T11:00:00+00:00'
+    })
+    cookie = 'session=' + alice.get_cookie('session').value
+
+    status, headers, body = asgi_get(asgi_app.application, '/data/1', cookie)
+
+    assert status == 200
+    assert headers[b'x-change-cursor'] == alice.get('/data/1').headers['X-Change-Cursor'].encode()
+    assert json.loads(body) == alice.get('/data/1').json
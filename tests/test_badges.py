@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from Project import db
+from Project.models import User, Event, BadgeCounter
+from Project.routes import count_badges
+
+def user_id(app, email):
+    with app.app_context():
+        return db.session.scalar(db.select(User.user_id).where(User.email == email))
+
+# (pending, unread, counted) of the cached counter row, None without a row
+def counter(app, user_id):
+    with app.app_context():
+        row = db.session.get(BadgeCounter, user_id)
+        return row and (row.pending_invites, row.unread_notifications, row.counted)
+
+def badges(client):
+    counts = client.get('/get_badge_counts').json
+    return counts['pending_invites'], counts['unread_notifications']
+
+# The cached row holds the counts the invites add up to, without a recount
+def assert_counted(app, user_id, pending, unread):
+    assert counter(app, user_id) == (pending, unread, True)
+    with app.app_context():
+        assert count_badges(user_id) == (pending, unread)
+
+def test_counters_follow_invites_and_notifications(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    bob_id = user_id(test_app, 'bob@example.com')
+    assert badges(bob) == (0, 0)
+    assert_counted(test_app, bob_id, 0, 0)
+
+    alice.post('/create_group', json={'name': 'Team', 'description': '', 'members': ['bob@example.com'], 'permissions': ['Editor']})
+    assert_counted(test_app, bob_id, 1, 1)
+    assert badges(bob) == (1, 1)
+
+    invite = bob.get('/check_invites').json['invites'][0]
+    bob.post('/check_invites', json={'invite_type': 'group', 'invite_id': invite['id'], 'status': 'Accepted'})
+    assert_counted(test_app, bob_id, 0, 0)
+
+    group_id = next(group['group_id'] for group in alice.get('/get_groups').json if group['name'] == 'Team')
+    start = datetime(2026, 10, 5, 10, tzinfo=timezone.utc)
+    response = alice.post('/add_event', json={
+        'title': 'Planning', 'description': '', 'group_id': str(group_id), 'participants': [{'name': 'bob@example.com'}],
+        'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat()
+    })
+    assert response.status_code == 200
+    assert_counted(test_app, bob_id, 1, 1)
+
+    with test_app.app_context():
+        event_id = db.session.scalar(db.select(Event.event_id).where(Event.event_name == 'Planning'))
+    response = bob.post('/read_notifications', json={'notifications': [{'type': 'event', 'id': event_id}]})
+    assert response.json == {'marked': 1, 'unread': 0}
+    assert_counted(test_app, bob_id, 1, 0)
+    assert badges(bob) == (1, 0)
+
+    # Deleting the event only marks Bob's counts unknown, the next read recounts them
+    assert alice.delete(f'/remove_event/{event_id}').status_code == 200
+    assert counter(test_app, bob_id) == (1, 0, None)
+    assert badges(bob) == (0, 0)
+    assert_counted(test_app, bob_id, 0, 0)
+
+# A missing or uncounted row is recounted from Member / Participate, whatever it held
+def test_recount_fallback(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.post('/create_group', json={'name': 'Team', 'description': '', 'members': ['bob@example.com'], 'permissions': ['Editor']})
+    bob_id = user_id(test_app, 'bob@example.com')
+
+    with test_app.app_context():
+        db.session.execute(db.delete(BadgeCounter).where(BadgeCounter.user_id == bob_id))
+        db.session.commit()
+    assert badges(bob) == (1, 1)
+    assert_counted(test_app, bob_id, 1, 1)
+
+    with test_app.app_context():
+        db.session.execute(
+            db.update(BadgeCounter).where(BadgeCounter.user_id == bob_id).values(pending_invites=7, unread_notifications=7, counted=None)
+        )
+        db.session.commit()
+    assert bob.get('/get_pending_invites_count').json == 1
+    assert_counted(test_app, bob_id, 1, 1)
@@ -0,0 +1,152 @@
+import io
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from Project.ics import (
+    unfold_lines, fold_line, parse_events, event_from_properties, event_component,
+    escape_text, unescape_text, parse_ics_datetime, parse_duration, MAX_LINE_OCTETS
+)
+
+def stream(*lines):
+    return io.StringIO('\r\n'.join(lines) + '\r\n')
+
+def test_fold_and_unfold_round_trip():
+    line = 'DESCRIPTION:' + 'Réunion à Zürich, ' * 20
+    folded = fold_line(line)
+
+    assert all(len(part.encode()) <= MAX_LINE_OCTETS for part in folded.split('\r\n'))
+    assert list(unfold_lines(io.StringIO(folded))) == [(1, line)]
+
+# Logical lines are numbered by the physical line they start on
+def test_unfold_numbers_physical_lines():
+    lines = list(unfold_lines(stream('BEGIN:VEVENT', 'SUMMARY:Long', ' er title', '\tstill', '', 'END:VEVENT')))
+
+    assert lines == [(1, 'BEGIN:VEVENT'), (2, 'SUMMARY:Longer titlestill'), (6, 'END:VEVENT')]
+
+def test_escaped_text_round_trip():
+    text = 'Room 4; bring pens, paper\nand a laptop \\ charger'
+
+    assert escape_text(text) == 'Room 4\\; bring pens\\, paper\\nand a laptop \\\\ charger'
+    assert unescape_text(escape_text(text)) == text
+
+def test_datetimes_and_durations():
+    utc = timezone.utc
+    assert parse_ics_datetime('20261001T100000Z', {}) == (datetime(2026, 10, 1, 10, tzinfo=utc), False)
+    assert parse_ics_datetime('20261001T120000', {'TZID': 'Europe/Paris'}) == (datetime(2026, 10, 1, 10, tzinfo=utc), False)
+    assert parse_ics_datetime('20261001', {'VALUE': 'DATE'}) == (datetime(2026, 10, 1, tzinfo=utc), True)
+    assert parse_ics_datetime('20261001T100000', {}) == (datetime(2026, 10, 1, 10, tzinfo=utc), False)
+    assert parse_duration('PT1H30M') == timedelta(hours=1, minutes=30)
+    assert parse_duration('P1W2D') == timedelta(days=9)
+    assert parse_duration('-PT15M') == -timedelta(minutes=15)
+    for value in ('P', 'PT', '1H'):
+        try:
+            parse_duration(value)
+        except ValueError:
+            continue
+        raise AssertionError(value)
+
+def test_event_fields():
+    (line_number, properties), = parse_events(stream(
+        'BEGIN:VCALENDAR',
+        'BEGIN:VEVENT',
+        'SUMMARY:Stand\\, up',
+        'DTSTART;TZID=Europe/Paris:20261001T090000',
+        'DURATION:PT15M',
+        'RRULE:FREQ=WEEKLY;BYDAY=MO,TH',
+        'EXDATE;TZID=Europe/Paris:20261005T090000,20261008T090000',
+        'ATTENDEE;CN="Bob":mailto:Bob@Example.com',
+        'BEGIN:VALARM',
+        'TRIGGER:-PT5M',
+        'END:VALARM',
+        'END:VEVENT',
+        'END:VCALENDAR'
+    ))
+    event = event_from_properties(properties)
+
+    assert line_number == 2
+    assert 'TRIGGER' not in properties
+    assert event['title'] == 'Stand, up'
+    assert event['start'] == datetime(2026, 10, 1, 7, tzinfo=timezone.utc)
+    assert event['end'] == event['start'] + timedelta(minutes=15)
+    assert event['rule'] == 'FREQ=WEEKLY;BYDAY=MO,TH'
+    assert event['exceptions'] == {datetime(2026, 10, 5, 7, tzinfo=timezone.utc), datetime(2026, 10, 8, 7, tzinfo=timezone.utc)}
+    assert event['attendees'] == ['bob@example.com']
+
+def test_all_day_event_without_end():
+    (_, properties), = parse_events(stream('BEGIN:VEVENT', 'DTSTART;VALUE=DATE:20261001', 'END:VEVENT'))
+    event = event_from_properties(properties)
+
+    assert event['end'] - event['start'] == timedelta(days=1)
+
+def test_malformed_events_are_reported():
+    events = list(parse_events(stream(
+        'BEGIN:VEVENT',
+        'SUMMARY:No start',
+        'END:VEVENT',
+        'this is not a content line',
+        'BEGIN:VEVENT',
+        'DTSTART:20261002T100000Z',
+        'DTEND:20261002T090000Z',
+        'END:VEVENT',
+        'BEGIN:VEVENT',
+        'DTSTART:20261003T100000Z',
+        'RRULE:FREQ=HOURLY',
+        'END:VEVENT'
+    )))
+
+    assert [line_number for line_number, _ in events] == [1, 5, 9]
+    for _, properties in events:
+        try:
+            event_from_properties(properties)
+        except ValueError:
+            continue
+        raise AssertionError(properties)
+
+Row = namedtuple('Row', 'event_id event_name description start_time end_time version_number recurrence_rule recurrence_exceptions')
+
+# An exported event (folded, escaped, with its exceptions) imports back the same
+def test_export_import_round_trip():
+    start = datetime(2026, 10, 1, 10, tzinfo=timezone.utc)
+    row = Row(
+        7, 'Planning; Q4, part 1', 'Agenda:\n' + 'item, ' * 30, start, start + timedelta(hours=1), 3,
+        'FREQ=DAILY;COUNT=5', (start + timedelta(days=2)).isoformat()
+    )
+    participants = {
+        'accepted_participants': [{'name': 'Ann "A"', 'email': 'ann@example.com'}],
+        'pending_participants': [],
+        'declined_participants': [{'name': 'Bob', 'email': 'bob@example.com'}]
+    }
+    text = 'BEGIN:VCALENDAR\r\n' + event_component(row, participants, 'example.com', '20261001T000000Z') + 'END:VCALENDAR\r\n'
+
+    (line_number, properties), = parse_events(io.StringIO(text))
+    event = event_from_properties(properties)
+
+    assert line_number == 2
+    assert (event['title'], event['description']) == (row.event_name, row.description)
+    assert (event['start'], event['end'], event['rule']) == (row.start_time, row.end_time, row.recurrence_rule)
+    assert event['exceptions'] == {start + timedelta(days=2)}
+    assert event['attendees'] == ['ann@example.com', 'bob@example.com']
+
+# /import_events reports skipped events by the physical line of their BEGIN:VEVENT
+def test_import_reports_physical_lines(sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    body = '\r\n'.join([
+        'BEGIN:VCALENDAR',
+        'BEGIN:VEVENT',
+        'DTSTART:20261001T100000Z',
+        'DESCRIPTION:a long description',
+        ' folded over',
+        ' three lines',
+        'END:VEVENT',
+        'BEGIN:VEVENT',
+        'SUMMARY:Broken',
+        'END:VEVENT',
+        'END:VCALENDAR'
+    ]) + '\r\n'
+
+    response = alice.post('/import_events/1', data=body, content_type='text/calendar')
+    summary = json.loads(response.get_data(as_text=True).splitlines()[-1])
+
+    assert summary['imported'] == 1
+    assert [skipped['line'] for skipped in summary['skipped_events']] == [8]
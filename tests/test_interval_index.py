@@ -0,0 +1,143 @@
+import random
+from datetime import datetime, timedelta, timezone
+from Project import db
+from Project.models import Event
+from Project.interval_index import IntervalTree, IntervalIndexRegistry, _rebuild_threshold
+
+# Overlap by brute force, same form as IntervalTree.overlap
+def brute_overlap(items, start, end):
+    return sorted((item_start, item_end, key) for key, (item_start, item_end) in items.items() if item_start < end and item_end > start)
+
+def test_overlap_and_stab_match_brute_force():
+    rng = random.Random(7)
+    items = {}
+    for key in range(300):
+        start = rng.randrange(1000)
+        items[key] = (start, start + rng.randrange(1, 50))
+    tree = IntervalTree((start, end, key) for key, (start, end) in items.items())
+
+    for _ in range(200):
+        start = rng.randrange(1050)
+        end = start + rng.randrange(1, 80)
+        assert tree.overlap(start, end) == brute_overlap(items, start, end)
+    for point in range(0, 1050, 7):
+        assert tree.stab(point) == sorted(
+            (item_start, item_end, key) for key, (item_start, item_end) in items.items() if item_start <= point < item_end
+        )
+
+# Intervals touching at an end do not overlap (ends are exclusive)
+def test_touching_intervals_do_not_overlap():
+    tree = IntervalTree([(0, 10, 'a'), (10, 20, 'b')])
+
+    assert tree.overlap(10, 15) == [(10, 20, 'b')]
+    assert tree.stab(10) == [(10, 20, 'b')]
+    assert tree.overlap(5, 10) == [(0, 10, 'a')]
+
+# Changes are buffered until there are more than the rebuild threshold, and queries
+# see them either way
+def test_buffered_changes_and_rebuild():
+    rng = random.Random(11)
+    items = {key: (key * 10, key * 10 + 15) for key in range(100)}
+    tree = IntervalTree((start, end, key) for key, (start, end) in items.items())
+    threshold = _rebuild_threshold(len(items))
+
+    tree.remove(3)
+    del items[3]
+    tree.add(500, 505, 'new')
+    items['new'] = (500, 505)
+    tree.add(0, 1, 7)
+    items[7] = (0, 1)
+    assert 0 < len(tree._added) + len(tree._removed) <= threshold
+    assert tree.overlap(0, 2000) == brute_overlap(items, 0, 2000)
+
+    for step in range(threshold + 5):
+        key = rng.randrange(100)
+        if key in items and rng.random() < 0.5:
+            tree.remove(key)
+            del items[key]
+        else:
+            start = rng.randrange(1000)
+            tree.add(start, start + 5, key)
+            items[key] = (start, start + 5)
+        assert tree.overlap(100, 400) == brute_overlap(items, 100, 400)
+
+    assert len(tree._added) + len(tree._removed) <= _rebuild_threshold(len(items))
+    assert len(tree) == len(items)
+    # Removing a key that is not there changes nothing
+    tree.remove('missing')
+    assert len(tree) == len(items)
+
+def create_group(client, name, members=()):
+    client.post('/create_group', json={'name': name, 'description': '', 'members': list(members), 'permissions': ['Editor'] * len(members)})
+    return next(group['group_id'] for group in client.get('/get_groups').json if group['name'] == name)
+
+def add_event(client, group_id, title, day, hour=10):
+    start = datetime(2026, 10, day, hour, tzinfo=timezone.utc)
+    response = client.post('/add_event', json={
+        'title': title, 'description': '', 'group_id': str(group_id), 'participants': [],
+        'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat()
+    })
+    assert response.status_code == 200
+
+def event_id(app, title):
+    with app.app_context():
+        return db.session.scalar(db.select(Event.event_id).where(Event.event_name == title))
+
+OCTOBER = (datetime(2026, 10, 1, tzinfo=timezone.utc), datetime(2026, 11, 1, tzinfo=timezone.utc))
+
+# A group index follows additions, moves and deletions through the ChangeLog
+def test_registry_refreshes_from_the_change_log(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    group_id = create_group(alice, 'Team')
+    add_event(alice, group_id, 'Planning', 5)
+    registry = IntervalIndexRegistry()
+
+    with test_app.app_context():
+        index = registry.group(group_id)
+        assert [entry[2] for entry in index.overlap(*OCTOBER)] == [event_id(test_app, 'Planning')]
+
+    add_event(alice, group_id, 'Retro', 6)
+    planning = event_id(test_app, 'Planning')
+    feed = alice.get(f'/data/{group_id}').json
+    version = next(item['version'] for item in feed if item['event_id'] == planning)
+    alice.put(f'/update_event/{planning}', json={
+        'title': 'Planning', 'description': '', 'version': version,
+        'start': '2026-10-20T10:00:00+00:00', 'end': '2026-10-20T11:00:00+00:00',
+        'added_participants': [], 'changed_participants': [], 'deleted_participants': []
+    })
+
+    with test_app.app_context():
+        index = registry.group(group_id)
+        found = index.overlap(*OCTOBER)
+        assert [(entry[0].day, entry[2]) for entry in found] == [(6, event_id(test_app, 'Retro')), (20, planning)]
+        assert index.stab(datetime(2026, 10, 20, 10, 30, tzinfo=timezone.utc))[0][2] == planning
+
+    alice.delete(f'/remove_event/{planning}')
+
+    with test_app.app_context():
+        assert [entry[2] for entry in registry.group(group_id).overlap(*OCTOBER)] == [event_id(test_app, 'Retro')]
+        assert registry.stats()['builds'] == 1
+        assert registry.stats()['refreshes'] == 2
+        assert registry.stats()['intervals'] == 1
+
+# The least recently used indexes go once the registry holds too many intervals
+def test_registry_evicts_least_recently_used(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    group_ids = [create_group(alice, name) for name in ('One', 'Two', 'Three')]
+    for day, group_id in enumerate(group_ids, start=1):
+        add_event(alice, group_id, f'Event {day}a', day)
+        add_event(alice, group_id, f'Event {day}b', day, hour=14)
+    registry = IntervalIndexRegistry(max_intervals=4)
+
+    with test_app.app_context():
+        registry.group(group_ids[0])
+        registry.group(group_ids[1])
+        registry.group(group_ids[0])
+        registry.group(group_ids[2])
+
+        assert registry.stats() == {'indexes': 2, 'intervals': 4, 'builds': 3, 'refreshes': 0, 'evictions': 1}
+        # The second group was the least recently used one, it is built again
+        assert len(registry.group(group_ids[1]).overlap(*OCTOBER)) == 2
+        assert registry.stats()['builds'] == 4
@@ -0,0 +1,151 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import pytest
+from Project import db
+from Project.models import User, Event, Member, Participate, ChangeLog, BadgeCounter
+
+def create_group(client, name, members=()):
+    client.post('/create_group', json={'name': name, 'description': '', 'members': list(members), 'permissions': ['Editor'] * len(members)})
+    return next(group['group_id'] for group in client.get('/get_groups').json if group['name'] == name)
+
+def add_event(client, group_id, title, start, participants=()):
+    response = client.post('/add_event', json={
+        'title': title, 'description': '', 'group_id': str(group_id), 'participants': [{'name': email} for email in participants],
+        'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat()
+    })
+    assert response.status_code == 200
+
+# Bob is invited to three groups and, within a group he accepted, to three events
+@pytest.fixture
+def invited(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    team = create_group(alice, 'Team', ['bob@example.com'])
+    invite = bob.get('/check_invites').json['invites'][0]
+    bob.post('/check_invites', json={'invite_type': 'group', 'invite_id': invite['id'], 'status': 'Accepted'})
+    for name in ('Design', 'Sales', 'Support'):
+        create_group(alice, name, ['bob@example.com'])
+    for day in (5, 6, 7):
+        add_event(alice, team, f'Event {day}', datetime(2026, 10, day, 10, tzinfo=timezone.utc), ['bob@example.com'])
+    return alice, bob, team
+
+def user_id(app, email):
+    with app.app_context():
+        return db.session.scalar(db.select(User.user_id).where(User.email == email))
+
+def all_pages(client, limit):
+    invites, cursor = [], None
+    while True:
+        page = client.get('/check_invites', query_string={'limit': limit, **({'before': cursor} if cursor else {})}).json
+        invites.extend(page['invites'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return invites
+
+def test_invite_filters(test_app, invited):
+    alice, bob, team = invited
+    other = create_group(alice, 'Other')
+    add_event(alice, other, 'Elsewhere', datetime(2026, 10, 6, 12, tzinfo=timezone.utc), ['bob@example.com'])
+
+    def names(**filters):
+        return sorted(invite['name'] for invite in bob.get('/check_invites', query_string=filters).json['invites'])
+
+    assert names(type='group') == ['Design', 'Sales', 'Support']
+    assert names(type='event') == ['Elsewhere', 'Event 5', 'Event 6', 'Event 7']
+    assert names(type='event', group_id=team) == ['Event 5', 'Event 6', 'Event 7']
+    # A window only lists the event invites overlapping it
+    assert names(start='2026-10-06T00:00:00Z', end='2026-10-07T00:00:00Z') == ['Elsewhere', 'Event 6']
+    assert [invite['name'] for invite in all_pages(bob, 3)] == [
+        invite['name'] for invite in bob.get('/check_invites').json['invites']
+    ]
+
+# Pages are cut by (invite time, type, row id), ties included
+def test_invite_pages_with_tied_times(test_app, invited):
+    _, bob, _ = invited
+    with test_app.app_context():
+        for table in (Member, Participate):
+            db.session.execute(db.update(table).values(invite_time=datetime(2026, 10, 1, 12, tzinfo=timezone.utc)))
+        db.session.commit()
+
+    listed = bob.get('/check_invites').json
+    assert listed['pending'] == 6
+    assert [invite['name'] for invite in all_pages(bob, 2)] == [invite['name'] for invite in listed['invites']] == [
+        'Support', 'Sales', 'Design', 'Event 7', 'Event 6', 'Event 5'
+    ]
+
+@pytest.mark.parametrize('filters', [
+    {'type': 'meeting'},
+    {'before': 'yesterday'},
+    {'start': '2026-10-06T00:00:00Z'},
+    {'start': '2026-10-07T00:00:00Z', 'end': '2026-10-06T00:00:00Z'}
+])
+def test_invalid_invite_filters(invited, filters):
+    _, bob, _ = invited
+    assert bob.get('/check_invites', query_string=filters).status_code == 400
+
+def invite_ids(client):
+    return {invite['name']: invite['id'] for invite in client.get('/check_invites').json['invites']}
+
+# Group and event invites answered at once; unknown invites and other users' are left alone
+def test_respond_to_mixed_invites(test_app, sign_in, invited):
+    alice, bob, team = invited
+    carol = sign_in('carol@example.com', 'Carol')
+    alice.post('/create_group', json={'name': 'Board', 'description': '', 'members': ['carol@example.com'], 'permissions': ['Viewer']})
+    carol_invite = invite_ids(carol)['Board']
+    ids = invite_ids(bob)
+    with test_app.app_context():
+        cursor = db.session.scalar(db.select(db.func.max(ChangeLog.change_id)))
+
+    response = bob.post('/respond_invites', json={'status': 'Accepted', 'invites': [
+        {'type': 'group', 'id': ids['Design']},
+        {'type': 'group', 'id': ids['Sales'], 'status': 'Declined'},
+        {'type': 'event', 'id': ids['Event 5']},
+        {'type': 'event', 'id': ids['Event 6'], 'status': 'Declined'},
+        {'type': 'event', 'id': 99999},
+        {'type': 'group', 'id': carol_invite}
+    ]})
+    assert response.status_code == 200
+    assert response.json == {'answered': 4, 'group_ids': [team]}
+
+    assert sorted(invite_ids(bob)) == ['Event 7', 'Support']
+    assert sorted(group['name'] for group in bob.get('/get_groups').json) == ['Design', 'Team']
+    assert invite_ids(carol) == {'Board': carol_invite}
+    badges = bob.get('/get_badge_counts').json
+    assert (badges['pending_invites'], badges['unread_notifications']) == (2, 2)
+    with test_app.app_context():
+        assert db.session.get(BadgeCounter, user_id(test_app, 'bob@example.com')).counted
+        changes = db.session.execute(
+            db.select(ChangeLog.event_id, ChangeLog.user_id, ChangeLog.action).where(ChangeLog.change_id > cursor)
+        ).all()
+        event_ids = dict(db.session.execute(db.select(Event.event_name, Event.event_id)).all())
+    bob_id = user_id(test_app, 'bob@example.com')
+    # One group feed and one participant entry for each answered event
+    assert Counter(changes) == Counter(
+        (event_ids[name], owner, 'Updated') for name in ('Event 5', 'Event 6') for owner in (None, bob_id)
+    )
+    # A declined event leaves Bob's calendar
+    assert sorted(event['title'] for event in bob.get('/data/1').json) == ['Event 5', 'Event 7']
+
+def test_respond_to_unknown_invites(test_app, invited):
+    _, bob, _ = invited
+
+    response = bob.post('/respond_invites', json={'status': 'Accepted', 'invites': [{'type': 'event', 'id': 99999}]})
+    assert response.json == {'answered': 0, 'group_ids': []}
+    assert bob.get('/get_badge_counts').json['pending_invites'] == 6
+
+@pytest.mark.parametrize('body', [
+    {'status': 'Maybe', 'invites': [{'type': 'group', 'id': 1}]},
+    {'status': 'Accepted', 'invites': [{'type': 'meeting', 'id': 1}]},
+    {'status': 'Accepted', 'invites': [{'type': 'group'}]},
+    {'status': 'Accepted', 'invites': [{'type': 'group', 'id': 'one'}]},
+    {'status': 'Accepted'}
+])
+def test_invalid_invite_responses(invited, body):
+    _, bob, _ = invited
+    ids = invite_ids(bob)
+    # A valid response in the same request is not applied either
+    body = dict(body, invites=body.get('invites', []) + [{'type': 'group', 'id': ids['Design']}]) if 'invites' in body else body
+
+    assert bob.post('/respond_invites', json=body).status_code == 400
+    assert invite_ids(bob) == ids
@@ -0,0 +1,46 @@
+import pytest
+
+@pytest.fixture
+def metrics_config(test_app):
+    saved = {name: test_app.config[name] for name in ('DEBUG', 'METRICS_TOKEN')}
+    yield test_app.config
+    test_app.config.update(saved)
+
+def test_metrics_hidden_without_token(test_app, metrics_config):
+    metrics_config.update(DEBUG=False, METRICS_TOKEN=None)
+
+    assert test_app.test_client().get('/metrics').status_code == 404
+
+def test_metrics_behind_token(test_app, metrics_config):
+    metrics_config.update(DEBUG=False, METRICS_TOKEN='secret')
+    client = test_app.test_client()
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+# Value of a series in /metrics, 0 before it is first recorded
+def metric_value(app, series):
+    for line in app.test_client().get('/metrics').get_data(as_text=True).splitlines():
+        if line.startswith(series + ' '):
+            return float(line.split()[-1])
+    return 0
+
+def test_rows_returned_by_the_feeds(test_app, metrics_config, sign_in):
+    metrics_config.update(DEBUG=True, METRICS_TOKEN=None)
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    for day in (1, 2, 3):
+        alice.post('/add_event', json={
+            'title': f'Event {day}', 'description': '', 'group_id': '1', 'participants': [],
+            'start': f'2026-10-0{day}T10:00:00+00:00', 'end': f'2026-10-0{day}T11:00:00+00:00'
+        })
+
+    series = 'db_rows_returned_total{route="/data/<int:group_id>",method="GET"}'
+    before = metric_value(test_app, series)
+
+    # The feed streams, its rows are counted once the body is sent
+    response = alice.get('/data/1')
+    assert len(response.json) == 3
+    response.close()
+
+    assert metric_value(test_app, series) - before == 3
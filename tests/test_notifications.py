@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from Project import db
+from Project.models import Member, Participate
+from Project.routes import format_notification_cursor, parse_notification_cursor
+
+NOON = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+def create_group(client, name, members=()):
+    client.post('/create_group', json={'name': name, 'description': '', 'members': list(members), 'permissions': ['Editor'] * len(members)})
+    return next(group['group_id'] for group in client.get('/get_groups').json if group['name'] == name)
+
+def add_event(client, group_id, title, start, participants=()):
+    response = client.post('/add_event', json={
+        'title': title, 'description': '', 'group_id': str(group_id), 'participants': [{'name': email} for email in participants],
+        'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat()
+    })
+    assert response.status_code == 200
+
+# Give every invite of the table the same time, so that pages are cut by the tie-breaks
+def set_invite_times(app, table, invite_time):
+    with app.app_context():
+        db.session.execute(db.update(table).values(invite_time=invite_time))
+        db.session.commit()
+
+# Bob has unread invites to three groups and, within a group he accepted, to three events
+@pytest.fixture
+def invited(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    team = create_group(alice, 'Team', ['bob@example.com'])
+    invite = bob.get('/check_invites').json['invites'][0]
+    bob.post('/check_invites', json={'invite_type': 'group', 'invite_id': invite['id'], 'status': 'Accepted'})
+    for name in ('Design', 'Sales', 'Support'):
+        create_group(alice, name, ['bob@example.com'])
+    for day in (5, 6, 7):
+        add_event(alice, team, f'Event {day}', datetime(2026, 10, day, 10, tzinfo=timezone.utc), ['bob@example.com'])
+    return alice, bob, team
+
+def all_pages(client, url, key, limit):
+    items, cursor = [], None
+    while True:
+        page = client.get(url, query_string={'limit': limit, **({'before': cursor} if cursor else {})}).json
+        items.extend(page[key])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return items
+
+def test_cursor_round_trip_and_malformed_cursors():
+    invite_time = datetime(2026, 10, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+    cursor = format_notification_cursor(invite_time, 'group', 17)
+
+    assert cursor == '2026-10-01T12:30:15.250000Z_group_17'
+    assert parse_notification_cursor(cursor) == (invite_time, 'group', 17)
+    for malformed in ('', 'soon', '2026-10-01T12:30:15Z_user_17', '2026-10-01T12:30:15Z_group_x', 'yesterday_event_1'):
+        with pytest.raises(ValueError):
+            parse_notification_cursor(malformed)
+
+@pytest.mark.parametrize('tied', [False, True])
+def test_notification_pages(test_app, invited, tied):
+    _, bob, _ = invited
+    if tied:
+        set_invite_times(test_app, Member, NOON)
+        set_invite_times(test_app, Participate, NOON)
+    first = bob.get('/get_notifications').json
+    assert first['next_cursor'] is None
+    assert first['unread'] == 6
+
+    # Pages of two items cover the list exactly once, in the same order
+    paged = all_pages(bob, '/get_notifications', 'notifications', 2)
+    assert paged == first['notifications']
+    assert sorted(item['type'] for item in paged) == ['event'] * 3 + ['group'] * 3
+    if tied:
+        # Ties on the invite time: groups before events, newest row first
+        assert [item['name'] for item in paged] == ['Support', 'Sales', 'Design', 'Event 7', 'Event 6', 'Event 5']
+
+def test_since_only_returns_newer_notifications(test_app, invited):
+    alice, bob, team = invited
+    newest = bob.get('/get_notifications').json['newest_cursor']
+
+    assert bob.get('/get_notifications', query_string={'since': newest}).json['notifications'] == []
+    add_event(alice, team, 'Retro', datetime(2026, 10, 8, 10, tzinfo=timezone.utc), ['bob@example.com'])
+    newer = bob.get('/get_notifications', query_string={'since': newest}).json
+    assert [item['name'] for item in newer['notifications']] == ['Retro']
+    assert newer['newest_cursor'] != newest
+
+@pytest.mark.parametrize('cursor', [{'before': 'soon'}, {'since': '2026-10-01T12:00:00Z_user_1'}])
+def test_invalid_notification_cursors(invited, cursor):
+    _, bob, _ = invited
+    assert bob.get('/get_notifications', query_string=cursor).status_code == 400
+
+def test_read_listed_notifications(invited):
+    _, bob, team = invited
+    listed = bob.get('/get_notifications').json['notifications']
+    event = next(item for item in listed if item['type'] == 'event')
+    group = next(item for item in listed if item['type'] == 'group')
+
+    response = bob.post('/read_notifications', json={'notifications': [
+        {'type': 'event', 'id': event['id']}, {'type': 'group', 'id': group['id']}, {'type': 'group', 'id': team}
+    ]})
+    assert response.json == {'marked': 2, 'unread': 4}
+
+# Marking all read stops at the newest notification shown
+def test_read_all_up_to_the_newest_shown(invited):
+    alice, bob, team = invited
+    newest = bob.get('/get_notifications').json['newest_cursor']
+    add_event(alice, team, 'Retro', datetime(2026, 10, 8, 10, tzinfo=timezone.utc), ['bob@example.com'])
+
+    response = bob.post('/read_notifications', json={'all': True, 'until': newest})
+    assert response.json == {'marked': 6, 'unread': 1}
+    assert [item['name'] for item in bob.get('/get_notifications').json['notifications']] == ['Retro']
+
+@pytest.mark.parametrize('body', [
+    {'all': True},
+    {'all': True, 'until': None},
+    {'all': True, 'until': 'soon'},
+    {'notifications': [{'type': 'event'}]},
+    {'notifications': [{'type': 'event', 'id': 'one'}]},
+    {'notifications': 'all'}
+])
+def test_invalid_read_requests(invited, body):
+    _, bob, _ = invited
+    assert bob.post('/read_notifications', json=body).status_code == 400
+    assert bob.get('/get_badge_counts').json['unread_notifications'] == 6
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from Project import db
+from Project.models import User, Member
+from Project.permissions import permission_cache
+
+START = datetime(2026, 10, 5, 10, tzinfo=timezone.utc)
+
+def user_id(app, email):
+    with app.app_context():
+        return db.session.scalar(db.select(User.user_id).where(User.email == email))
+
+def add_event(client, group_id):
+    return client.post('/add_event', json={
+        'title': 'Planning', 'description': '', 'group_id': str(group_id), 'participants': [],
+        'start': START.isoformat(), 'end': (START + timedelta(hours=1)).isoformat()
+    }).status_code
+
+def update_members(client, group_id, **changes):
+    version = client.get(f'/group_info/{group_id}').json['version']
+    response = client.put(f'/group_info/{group_id}', json=dict(
+        {'new_members': [], 'updated_members': [], 'deleted_members': []},
+        version=version, name='Team', description='', **changes
+    ))
+    assert response.status_code == 200
+
+# Bob is an Editor of Alice's group, with his permission cached
+@pytest.fixture
+def team(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    alice.post('/create_group', json={'name': 'Team', 'description': '', 'members': ['bob@example.com'], 'permissions': ['Editor']})
+    invite = bob.get('/check_invites').json['invites'][0]
+    bob.post('/check_invites', json={'invite_type': 'group', 'invite_id': invite['id'], 'status': 'Accepted'})
+    group_id = next(group['group_id'] for group in alice.get('/get_groups').json if group['name'] == 'Team')
+    assert add_event(bob, group_id) == 200
+    return alice, bob, group_id
+
+# The routes trust the cached permission: without an invalidation a change made behind
+# their back is not seen until the entry expires
+def test_permissions_are_served_from_the_cache(test_app, team):
+    _, bob, group_id = team
+    with test_app.app_context():
+        db.session.execute(db.update(Member).where(Member.user_id == user_id(test_app, 'bob@example.com')).values(permission='Viewer'))
+        db.session.commit()
+
+    assert add_event(bob, group_id) == 200
+    permission_cache.invalidate(group_id)
+    assert add_event(bob, group_id) == 403
+
+def test_role_change_invalidates_the_cache(test_app, team):
+    alice, bob, group_id = team
+
+    update_members(alice, group_id, updated_members=[{'email': 'bob@example.com', 'role': 'Viewer'}])
+    assert add_event(bob, group_id) == 403
+    assert bob.get(f'/data/{group_id}').status_code == 200
+
+    update_members(alice, group_id, updated_members=[{'email': 'bob@example.com', 'role': 'Admin'}])
+    assert bob.get(f'/group_info/{group_id}').json['authorization'] is True
+
+def test_removal_invalidates_the_cache(test_app, team):
+    alice, bob, group_id = team
+    assert bob.get(f'/data/{group_id}').status_code == 200
+
+    update_members(alice, group_id, deleted_members=[{'email': 'bob@example.com'}])
+    assert bob.get(f'/data/{group_id}').status_code == 403
+    assert add_event(bob, group_id) == 403
+
+def test_exit_group_invalidates_the_cache(test_app, team):
+    _, bob, group_id = team
+    assert bob.get(f'/data/{group_id}').status_code == 200
+
+    assert bob.delete(f'/exit_group/{group_id}').status_code == 200
+    assert bob.get(f'/data/{group_id}').status_code == 403
+    assert add_event(bob, group_id) == 403
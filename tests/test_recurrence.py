@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone
+from Project import app, db
+from Project.models import Event
+from Project.recurrence import parse_rule, limit_rule, format_rule, parse_exceptions, format_exceptions, occurrences, series_end
+from Project.routes import isoformat_utc
+
+START = datetime(2026, 10, 1, 10, tzinfo=timezone.utc)
+END = START + timedelta(hours=1)
+WINDOW = {'start': '2026-10-01T00:00:00Z', 'end': '2026-11-01T00:00:00Z'}
+
+def add_recurring(client, title, rule, start=START):
+    response = client.post('/add_event', json={
+        'title': title, 'description': '', 'group_id': '1', 'participants': [],
+        'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat(), 'recurrence': rule
+    })
+    assert response.status_code == 200
+
+def event_id(app, title):
+    with app.app_context():
+        return db.session.scalar(db.select(Event.event_id).where(Event.event_name == title))
+
+def test_count_above_the_cap_is_rejected(sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+
+    response = alice.post('/add_event', json={
+        'title': 'Standup',
+        'description': '',
+        'start': START.isoformat(),
+        'end': END.isoformat(),
+        'recurrence': 'FREQ=DAILY;COUNT=1000000000',
+        'group_id': '1',
+        'participants': []
+    })
+
+    assert response.status_code == 400
+
+def test_until_is_brought_within_the_limit():
+    rule = limit_rule(parse_rule('FREQ=DAILY;UNTIL=99991231'), START)
+
+    assert rule['until'] == START + timedelta(days=app.config['RECURRENCE_UNTIL_MAX_DAYS'])
+    assert series_end(START, END, format_rule(rule)) == rule['until'] + timedelta(hours=1)
+
+# Rules stored before the limits existed are expanded with a bounded number of steps
+def test_unbounded_stored_rules_stay_bounded():
+    assert series_end(START, END, 'FREQ=DAILY;COUNT=1000000000') is None
+
+    found = occurrences(START, END, 'FREQ=DAILY;UNTIL=99991231', None, START, datetime(9999, 1, 1, tzinfo=timezone.utc))
+    assert len(found) == app.config['RECURRENCE_MAX_OCCURRENCES']
+
+def test_weekly_byday_expansion_and_window_clipping():
+    # Thursday October 1st, every Monday and Thursday
+    found = occurrences(START, END, 'FREQ=WEEKLY;BYDAY=MO,TH;COUNT=6', None,
+                        datetime(2026, 10, 5, 10, 30, tzinfo=timezone.utc), datetime(2026, 10, 15, 10, tzinfo=timezone.utc))
+
+    # The occurrence in progress at the window start is kept, the one starting at the window end is not
+    assert [start.day for start, _ in found] == [5, 8, 12]
+    assert all(end - start == timedelta(hours=1) for start, end in found)
+
+    # COUNT counts from the first occurrence, before the window
+    found = occurrences(START, END, 'FREQ=WEEKLY;BYDAY=MO,TH;COUNT=6', None, START, datetime(2027, 1, 1, tzinfo=timezone.utc))
+    assert [start.day for start, _ in found] == [1, 5, 8, 12, 15, 19]
+
+def test_exceptions_skip_occurrences():
+    skipped = START + timedelta(days=2)
+
+    found = occurrences(START, END, 'FREQ=DAILY;COUNT=4', format_exceptions([skipped]), START, START + timedelta(days=10))
+    assert [start.day for start, _ in found] == [1, 2, 4]
+
+    # A series stored with sub-second times still matches its exceptions
+    start = START.replace(microsecond=250000)
+    found = occurrences(start, start + timedelta(hours=1), 'FREQ=DAILY;COUNT=4', format_exceptions([skipped]), START, START + timedelta(days=10))
+    assert [start.day for start, _ in found] == [1, 2, 4]
+
+def test_expand_recurring_replaces_series_by_their_occurrences(sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    add_recurring(alice, 'Standup', 'FREQ=DAILY;COUNT=3')
+    add_recurring(alice, 'Review', '', start=START + timedelta(days=1))
+
+    feed = alice.get('/data/1', query_string=WINDOW).json
+    standups = [item for item in feed if item['title'] == 'Standup']
+
+    assert [item['occurrence_start'] for item in standups] == [
+        isoformat_utc(START + timedelta(days=day)) for day in range(3)
+    ]
+    assert all(item['start'] == item['occurrence_start'] for item in standups)
+    assert standups[1]['end'] == isoformat_utc(END + timedelta(days=1))
+    assert [item.get('occurrence_start') for item in feed if item['title'] == 'Review'] == [None]
+
+# Moving one occurrence moves the series, its skipped occurrences included
+def test_moving_an_occurrence_shifts_the_series(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    add_recurring(alice, 'Standup', 'FREQ=DAILY;COUNT=3')
+    series_id = event_id(test_app, 'Standup')
+    second = isoformat_utc(START + timedelta(days=1))
+    third = START + timedelta(days=2)
+    assert alice.delete(f'/remove_event/{series_id}', query_string={'occurrence': isoformat_utc(third)}).status_code == 200
+
+    with test_app.app_context():
+        version = db.session.get(Event, series_id).version_number
+    moved = START + timedelta(days=1, hours=2)
+    response = alice.put(f'/update_event/{series_id}', json={
+        'title': 'Standup', 'description': '', 'version': version,
+        'start': moved.isoformat(), 'end': (moved + timedelta(hours=1)).isoformat(), 'occurrence_start': second
+    })
+    assert response.status_code == 200
+
+    with test_app.app_context():
+        event = db.session.get(Event, series_id)
+        assert event.start_time.replace(tzinfo=timezone.utc) == START + timedelta(hours=2)
+        assert parse_exceptions(event.recurrence_exceptions) == {third + timedelta(hours=2)}
+    feed = alice.get('/data/1', query_string=WINDOW).json
+    assert [item['start'] for item in feed if item['title'] == 'Standup'] == [
+        isoformat_utc(START + timedelta(hours=2)), isoformat_utc(START + timedelta(days=1, hours=2))
+    ]
+
+# ?occurrence= skips one occurrence, whatever the sub-second part of the stored start
+def test_removing_an_occurrence_adds_an_exception(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    add_recurring(alice, 'Standup', 'FREQ=DAILY;COUNT=3', start=START.replace(microsecond=500000))
+    series_id = event_id(test_app, 'Standup')
+    second = next(item for item in alice.get('/data/1', query_string=WINDOW).json if item['title'] == 'Standup' and item['start'] > isoformat_utc(START))
+
+    response = alice.delete(f'/remove_event/{series_id}', query_string={'occurrence': second['occurrence_start']})
+    assert response.status_code == 200
+
+    with test_app.app_context():
+        assert parse_exceptions(db.session.get(Event, series_id).recurrence_exceptions) == {START + timedelta(days=1)}
+    feed = alice.get('/data/1', query_string=WINDOW).json
+    assert [item['start'] for item in feed if item['title'] == 'Standup'] == [
+        isoformat_utc(START), isoformat_utc(START + timedelta(days=2))
+    ]
+    assert alice.delete(f'/remove_event/{series_id}', query_string={'occurrence': 'soon'}).status_code == 400
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import joinedload
+from Project import db
+from Project.models import Member
+
+# The test suite runs with STRICT_LOADING (see conftest): a route walking a
+# relationship without loading it in its query fails the feed, invite and group tests
+def test_lazy_relationship_loads_raise(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.post('/create_group', json={'name': 'Team', 'description': '', 'members': [], 'permissions': []})
+
+    with test_app.app_context():
+        member = db.session.scalar(db.select(Member))
+        with pytest.raises(InvalidRequestError):
+            member.group
+
+        member = db.session.scalar(db.select(Member).options(joinedload(Member.group)).execution_options(populate_existing=True))
+        assert member.group.group_name == 'Team'
+
+def test_routes_do_not_walk_relationships(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    alice.post('/create_group', json={'name': 'Team', 'description': '', 'members': ['bob@example.com'], 'permissions': ['Editor']})
+    group_id = next(group['group_id'] for group in alice.get('/get_groups').json if group['name'] == 'Team')
+    invite = bob.get('/check_invites').json['invites'][0]
+
+    for client, method, url in (
+        (bob, 'get', f"/invite_description/group/{invite['id']}"),
+        (bob, 'get', '/get_notifications'),
+        (bob, 'get', '/get_badge_counts'),
+        (alice, 'get', f'/group_info/{group_id}'),
+        (alice, 'get', f'/data/{group_id}'),
+        (alice, 'get', f'/data/{group_id}/updates?cursor=0'),
+        (alice, 'get', '/calendar')
+    ):
+        assert getattr(client, method)(url).status_code == 200, url
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+from Project import app, db
+from Project.models import Event, ChangeLog, change_replay_floor
+
+OCTOBER = {'start': '2026-10-01T00:00:00Z', 'end': '2026-11-01T00:00:00Z'}
+
+def create_group(client, name, members=()):
+    client.post('/create_group', json={'name': name, 'description': '', 'members': list(members), 'permissions': ['Editor'] * len(members)})
+    return next(group['group_id'] for group in client.get('/get_groups').json if group['name'] == name)
+
+def accept_group_invites(client):
+    for invite in client.get('/check_invites', query_string={'type': 'group'}).json['invites']:
+        assert client.post('/check_invites', json={'invite_type': 'group', 'invite_id': invite['id'], 'status': 'Accepted'}).status_code == 200
+
+def event_times(day, hour=10, month=10):
+    start = datetime(2026, month, day, hour, tzinfo=timezone.utc)
+    return {'start': start.isoformat(), 'end': (start + timedelta(hours=1)).isoformat()}
+
+def add_event(client, group_id, title, day, participants=()):
+    response = client.post('/add_event', json=dict(
+        event_times(day), title=title, description='', group_id=str(group_id),
+        participants=[{'name': email} for email in participants]
+    ))
+    assert response.status_code == 200
+    return next(event['event_id'] for event in client.get(f'/data/{group_id}', query_string=OCTOBER).json if event['title'] == title)
+
+def update_event(client, event_id, title, times):
+    with app.app_context():
+        version = db.session.get(Event, event_id).version_number
+    response = client.put(f'/update_event/{event_id}', json=dict(
+        times, title=title, description='', version=version,
+        added_participants=[], changed_participants=[], deleted_participants=[]
+    ))
+    assert response.status_code == 200
+
+# Cursor of a fresh load of a feed
+def feed_cursor(client, group_id):
+    response = client.get(f'/data/{group_id}', query_string=OCTOBER)
+    response.close()
+    return int(response.headers['X-Change-Cursor'])
+
+def get_updates(client, group_id, cursor):
+    response = client.get(f'/data/{group_id}/updates', query_string=dict(OCTOBER, cursor=cursor))
+    assert response.status_code == 200
+    return response.json
+
+def test_update_inside_the_window(sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    group_id = create_group(alice, 'Team')
+    planning = add_event(alice, group_id, 'Planning', 5)
+    add_event(alice, group_id, 'Review', 6)
+    cursor = feed_cursor(alice, group_id)
+
+    assert get_updates(alice, group_id, cursor) == {'updated_events': [], 'deleted_events': [], 'cursor': cursor}
+
+    update_event(alice, planning, 'Planning (moved)', event_times(7))
+    updates = get_updates(alice, group_id, cursor)
+
+    assert [(event['event_id'], event['title']) for event in updates['updated_events']] == [(planning, 'Planning (moved)')]
+    assert updates['deleted_events'] == []
+    assert updates['cursor'] > cursor
+    # Nothing changed since the returned cursor
+    assert get_updates(alice, group_id, updates['cursor'])['updated_events'] == []
+
+def test_event_moved_out_of_the_window_is_deleted(sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    group_id = create_group(alice, 'Team')
+    planning = add_event(alice, group_id, 'Planning', 5)
+    cursor = feed_cursor(alice, group_id)
+
+    update_event(alice, planning, 'Planning', event_times(5, month=12))
+    updates = get_updates(alice, group_id, cursor)
+
+    assert updates['updated_events'] == []
+    assert updates['deleted_events'] == [planning]
+
+# A removed member loses the group feed, and the group events they took part in leave
+# their personal feed
+def test_membership_removal(sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    bob = sign_in('bob@example.com', 'Bob')
+    alice.get('/data/1')
+    bob.get('/data/1')
+    group_id = create_group(alice, 'Team', ['bob@example.com'])
+    accept_group_invites(bob)
+    planning = add_event(alice, group_id, 'Planning', 5, ['bob@example.com'])
+    bob_cursor = feed_cursor(bob, 1)
+    alice_cursor = feed_cursor(alice, group_id)
+    assert [event['event_id'] for event in bob.get('/data/1', query_string=OCTOBER).json] == [planning]
+
+    version = alice.get(f'/group_info/{group_id}').json['version']
+    response = alice.put(f'/group_info/{group_id}', json={
+        'version': version, 'name': 'Team', 'description': '',
+        'new_members': [], 'updated_members': [], 'deleted_members': [{'email': 'bob@example.com'}]
+    })
+    assert response.status_code == 200
+
+    updates = get_updates(bob, 1, bob_cursor)
+    assert (updates['updated_events'], updates['deleted_events']) == ([], [planning])
+    assert bob.get(f'/data/{group_id}/updates', query_string=dict(OCTOBER, cursor=0)).status_code == 403
+    # The group feed gets the event again, without Bob among its participants
+    updated = get_updates(alice, group_id, alice_cursor)['updated_events']
+    assert [event['event_id'] for event in updated] == [planning]
+    assert 'bob@example.com' not in [participant['email'] for participant in updated[0]['participants']]
+
+# A cursor the change log cannot bring up to date asks for a full reload
+def test_expired_cursor_forces_a_reload(test_app, sign_in):
+    alice = sign_in('alice@example.com', 'Alice')
+    alice.get('/data/1')
+    group_id = create_group(alice, 'Team')
+    add_event(alice, group_id, 'Planning', 5)
+    old_cursor = feed_cursor(alice, group_id)
+    add_event(alice, group_id, 'Review', 6)
+    add_event(alice, group_id, 'Retro', 7)
+    cursor = feed_cursor(alice, group_id)
+
+    assert get_updates(alice, group_id, cursor + 1) == {'reload': True}
+
+    # The changes before the newest one are pruned: older cursors cannot be served any more
+    with test_app.app_context():
+        db.session.execute(db.delete(ChangeLog).where(ChangeLog.change_id < cursor))
+        db.session.commit()
+    assert get_updates(alice, group_id, old_cursor) == {'reload': True}
+    assert get_updates(alice, group_id, cursor)['cursor'] == cursor
+
+    # An emptied log only serves the cursor of an empty database
+    with test_app.app_context():
+        db.session.execute(db.delete(ChangeLog))
+        db.session.commit()
+    assert get_updates(alice, group_id, cursor) == {'reload': True}
+    assert get_updates(alice, group_id, 0) == {'updated_events': [], 'deleted_events': [], 'cursor': 0}
+
+# Readers replay the changes written within CHANGE_REPLAY_SECONDS before their cursor
+def test_change_replay_floor(test_app):
+    start = datetime(2026, 10, 1, 10, tzinfo=timezone.utc)
+    saved = test_app.config['CHANGE_REPLAY_SECONDS']
+    test_app.config['CHANGE_REPLAY_SECONDS'] = 30
+    try:
+        with test_app.app_context():
+            for seconds in (0, 10, 20, 40, 50, 60):
+                db.session.add(ChangeLog(event_id=1, group_id=2, action='Updated', change_time=start + timedelta(seconds=seconds)))
+            db.session.commit()
+            ids = db.session.scalars(db.select(ChangeLog.change_id).order_by(ChangeLog.change_id)).all()
+
+            # Cursor at +50s: the changes after +20s are replayed
+            assert change_replay_floor(ids[4]) == ids[2]
+            # Nothing is 30 seconds older than +20s
+            assert change_replay_floor(ids[2]) == 0
+            assert change_replay_floor(0) == 0
+
+            test_app.config['CHANGE_REPLAY_SECONDS'] = 0
+            assert change_replay_floor(ids[4]) == ids[4]
+    finally:
+        test_app.config['CHANGE_REPLAY_SECONDS'] = saved